@@ -0,0 +1,43 @@
+from typing import List, NamedTuple, Tuple
+
+# 英文检测模式没有关键词，统一显示为这个标签
+ENGLISH_LABEL = "英文段落"
+
+class Hit(NamedTuple):
+    """一条命中，只记录位置和编号，不保存段落文本（文本在显示或删除时才从文件中读取）
+    
+    keyword模式：段落所在行的位置、段落校验和、命中的关键词编号（可能有多个）
+    english模式：段落所在行的位置、段落校验和，关键词编号为空
+    garbled模式：位置和校验和为0，关键词编号为命中的乱码关键词编号（统计评分命中时指向关键词表末尾的
+    评分标签），整个文件作为一条命中
+    """
+    start: int
+    end: int
+    checksum: int
+    label_ids: Tuple[int, ...] = ()
+
+def hit_label(mode: str, labels: List[str], hit: Hit) -> str:
+    """把命中的关键词编号还原为显示用的文字，多个关键词之间以空格分隔"""
+    if mode == 'english':
+        return ENGLISH_LABEL
+    return " ".join(labels[label_id] for label_id in hit.label_ids)
+
+def hit_text(mode: str, content: str, hit: Hit) -> str:
+    """从文件内容中切出命中的文本：段落内容；乱码检测模式下为整个文件的内容"""
+    if mode == 'garbled':
+        return content
+    return content[hit.start:hit.end].strip()
+
+class ModeResult(dict):
+    """一个分析模式的结果 {相对路径: [Hit]}，附带关键词表，用于把关键词编号还原为关键词"""
+    
+    __slots__ = ('mode', 'labels')
+    
+    def __init__(self, mode: str, labels: List[str]):
+        super().__init__()
+        self.mode = mode
+        self.labels = labels  # keyword模式为去重后的关键词列表，garbled模式为乱码关键词列表加评分标签
+    
+    def get_label(self, hit: Hit) -> str:
+        """获取一条命中的关键词文字"""
+        return hit_label(self.mode, self.labels, hit)
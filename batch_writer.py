@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, NamedTuple, Tuple
+
+# 批量写入时的默认线程数：写入主要在等待磁盘，线程数不必与CPU核数相同
+DEFAULT_WRITE_WORKERS = 8
+
+class FileOutcome(NamedTuple):
+    """一个文件的处理结果"""
+    filename: str  # 相对路径
+    success: bool
+    message: str = ""  # 失败原因
+
+class BatchSummary:
+    """一批文件的处理结果，按提交顺序排列"""
+    
+    def __init__(self, outcomes: List[FileOutcome]):
+        self.outcomes = outcomes
+    
+    @property
+    def succeeded(self) -> List[FileOutcome]:
+        """处理成功的文件"""
+        return [outcome for outcome in self.outcomes if outcome.success]
+    
+    @property
+    def failed(self) -> List[FileOutcome]:
+        """处理失败的文件"""
+        return [outcome for outcome in self.outcomes if not outcome.success]
+    
+    @property
+    def ok(self) -> bool:
+        """是否全部成功"""
+        return all(outcome.success for outcome in self.outcomes)
+    
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+def write_file_atomic(file_path: str, content: str, encoding: str = 'utf-8'):
+    """
+    原子地写入文件：先写入同一目录下的临时文件并fsync，再用os.replace替换原文件，
+    写入过程中程序崩溃或断电时原文件保持完整
+    
+    Args:
+        file_path: 文件路径
+        content: 文件内容（不转换换行符）
+        encoding: 编码
+    
+    Raises:
+        OSError, UnicodeEncodeError: 写入失败，此时原文件没有被修改
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    try:
+        with open(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            # 临时文件的权限是0600，沿用原文件的权限
+            shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def apply_batch(tasks: Iterable[Tuple[str, Callable[[], None]]],
+                max_workers: int = DEFAULT_WRITE_WORKERS) -> BatchSummary:
+    """
+    在有界线程池中执行一批文件操作
+    
+    Args:
+        tasks: [(相对路径, 操作)]，操作抛出异常表示失败，异常信息作为失败原因
+        max_workers: 最大线程数
+    
+    Returns:
+        BatchSummary: 各文件的处理结果，顺序与tasks一致
+    """
+    def run(task: Tuple[str, Callable[[], None]]) -> FileOutcome:
+        filename, action = task
+        try:
+            action()
+            return FileOutcome(filename, True)
+        except Exception as e:
+            return FileOutcome(filename, False, str(e))
+    
+    tasks = list(tasks)
+    if len(tasks) <= 1 or max_workers <= 1:
+        return BatchSummary([run(task) for task in tasks])
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        return BatchSummary(list(executor.map(run, tasks)))
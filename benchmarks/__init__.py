@@ -0,0 +1,7 @@
+"""
+性能基准测试：用固定种子生成合成语料，测量TextProcessor各项操作的速度并与保存的基准对比
+
+    python -m benchmarks.run --files 2000 --seed 1            # 生成语料并测量
+    python -m benchmarks.run --save-baseline baseline.json     # 保存为基准
+    python -m benchmarks.run --baseline baseline.json          # 与基准对比，变慢超过容差时退出码为1
+"""
@@ -0,0 +1,105 @@
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+# 生成语料时使用的关键词和乱码关键词，同时写入语料目录下的config.txt
+CORPUS_KEYWORDS = ['此处省略', '一个AI', '篇幅限制', '图片1', '已去除']
+CORPUS_GARBLED_KEYWORDS = ['╋', 'ソ', '€']
+
+# 英文句子和带英文属性的HTML标签（后者不应被判为英文段落）
+ENGLISH_SENTENCES = [
+    'This is a sample sentence.',
+    'The quick brown fox jumps over the lazy dog.',
+    'Please refer to the attached document for details.',
+]
+HTML_TAGS = [
+    '<td style="border:1px solid black; padding: 8px;">',
+    '<div class="content main">',
+    '<span lang="en">',
+]
+
+class CorpusSpec(NamedTuple):
+    """合成语料的参数"""
+    files: int = 1000  # 文件数
+    median_size: int = 8 * 1024  # 文件大小的中位数（字节），大小按对数正态分布
+    size_sigma: float = 1.0  # 对数正态分布的sigma，越大文件大小越分散
+    paragraph_chars: int = 80  # 段落的平均字符数
+    keyword_rate: float = 0.02  # 含关键词的段落比例
+    english_rate: float = 0.02  # 含英文句子的段落比例
+    html_rate: float = 0.05  # 含HTML标签（标签内有英文）的段落比例
+    garbled_rate: float = 0.02  # 乱码文件比例
+    gbk_rate: float = 0.1  # 以GB18030编码保存的文件比例
+    subdirectories: int = 10  # 文件分布的子目录数
+    seed: int = 1  # 随机种子，相同参数和种子生成的语料完全相同
+
+def _chinese_text(rng: random.Random, length: int) -> str:
+    """生成指定长度的随机常用汉字文本"""
+    return ''.join(chr(rng.randint(0x4e00, 0x7fff)) for _ in range(length))
+
+def _paragraph(rng: random.Random, spec: CorpusSpec) -> str:
+    """按比例生成一个普通、含关键词、含英文句子或含HTML标签的段落"""
+    length = max(1, int(rng.expovariate(1 / spec.paragraph_chars)))
+    text = _chinese_text(rng, length)
+    roll = rng.random()
+    if roll < spec.keyword_rate:
+        position = rng.randint(0, len(text))
+        return text[:position] + rng.choice(CORPUS_KEYWORDS) + text[position:]
+    roll -= spec.keyword_rate
+    if roll < spec.english_rate:
+        return text + rng.choice(ENGLISH_SENTENCES)
+    roll -= spec.english_rate
+    if roll < spec.html_rate:
+        return rng.choice(HTML_TAGS) + text + '</td>'
+    return text
+
+def _garbled_text(rng: random.Random, text: str) -> str:
+    """把正常文本变成乱码：UTF-8字节按GBK解读（与实际遇到的乱码相同），或插入乱码关键词"""
+    if rng.random() < 0.5:
+        return text.encode('utf-8').decode('gbk', errors='replace')
+    position = rng.randint(0, len(text))
+    return text[:position] + rng.choice(CORPUS_GARBLED_KEYWORDS) + text[position:]
+
+def generate_corpus(directory: str, spec: CorpusSpec) -> Dict[str, int]:
+    """
+    在directory下生成合成语料：files/目录中是txt文件，config.txt是对应的配置
+    
+    Args:
+        directory: 输出目录（已有的同名文件会被覆盖）
+        spec: 语料参数
+    
+    Returns:
+        Dict[str, int]: 统计信息 {'files': 文件数, 'bytes': 总字节数, 'paragraphs': 段落数}
+    """
+    rng = random.Random(spec.seed)
+    files_directory = os.path.join(directory, 'files')
+    subdirectories = [''] + [f'dir{index:03d}' for index in range(spec.subdirectories)]
+    for name in subdirectories:
+        os.makedirs(os.path.join(files_directory, name), exist_ok=True)
+    
+    stats = {'files': 0, 'bytes': 0, 'paragraphs': 0}
+    for index in range(spec.files):
+        target_size = max(64, int(rng.lognormvariate(0, spec.size_sigma) * spec.median_size))
+        paragraphs: List[str] = []
+        size = 0
+        while size < target_size:
+            paragraph = _paragraph(rng, spec)
+            paragraphs.append(paragraph)
+            size += len(paragraph.encode('utf-8')) + 1
+        
+        content = '\n'.join(paragraphs) + '\n'
+        if rng.random() < spec.garbled_rate:
+            content = _garbled_text(rng, content)
+        encoding = 'gb18030' if rng.random() < spec.gbk_rate else 'utf-8'
+        
+        data = content.encode(encoding, errors='replace')
+        path = os.path.join(files_directory, rng.choice(subdirectories), f'doc{index:06d}.txt')
+        with open(path, 'wb') as f:
+            f.write(data)
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+        stats['paragraphs'] += len(paragraphs)
+    
+    with open(os.path.join(directory, 'config.txt'), 'w', encoding='utf-8') as f:
+        f.write(f"keywords = {'  '.join(CORPUS_KEYWORDS)}\n")
+        f.write(f"check_garbled = {' '.join(CORPUS_GARBLED_KEYWORDS)}\n")
+    return stats
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from processor import TextProcessor
+
+# 与基准对比时允许的变慢比例，超过即视为性能退化
+DEFAULT_TOLERANCE = 0.25
+
+class Measurement:
+    """测量with块内的耗时；trace为True时同时记录块内Python内存分配的峰值
+    
+    tracemalloc会明显拖慢执行，所以计时和内存峰值分开测量：计时的运行不跟踪内存，
+    另外单独运行一次跟踪内存。峰值只统计被测操作自己的分配，不受之前操作的影响。
+    """
+    
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.seconds = 0.0
+        self.peak_mb: Optional[float] = None
+    
+    def __enter__(self):
+        if self.trace:
+            tracemalloc.start()
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self._start
+        if self.trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_mb = round(peak / (1024 * 1024), 1)
+
+def make_processor(files_directory: str, config_path: str) -> TextProcessor:
+    """创建不使用扫描缓存和撤销日志的处理器，每次测量都完整扫描"""
+    processor = TextProcessor()
+    processor.set_files_directory(files_directory)
+    processor.config_manager.set_config_path(config_path)
+    processor.use_scan_cache = False
+    processor.use_undo_journal = False
+    return processor
+
+# 被测操作：参数为是否跟踪内存，返回(被测部分的测量结果, 处理的文件数, 处理的字节数)
+Action = Callable[[bool], Tuple[Measurement, int, int]]
+
+def measure_best(action: Action, repeat: int) -> Tuple[float, Optional[float], int, int]:
+    """
+    重复执行repeat次取最短耗时，再跟踪内存执行一次取内存峰值
+    
+    Args:
+        action: 被测操作
+        repeat: 计时的重复次数
+    
+    Returns:
+        Tuple[float, Optional[float], int, int]: (最短耗时, 内存峰值(MB), 文件数, 字节数)
+    """
+    seconds, files, size = min((measurement.seconds, files, size)
+                               for measurement, files, size in (action(False) for _ in range(max(1, repeat))))
+    measurement, _, _ = action(True)
+    return seconds, measurement.peak_mb, files, size
+
+def run_benchmarks(corpus_directory: str, corpus_stats: Dict[str, int], repeat: int) -> Dict[str, Dict]:
+    """
+    测量各项操作
+    
+    Returns:
+        Dict[str, Dict]: {操作名: {'seconds', 'files', 'bytes', 'files_per_sec', 'mb_per_sec', 'peak_mb'}}
+    """
+    files_directory = os.path.join(corpus_directory, 'files')
+    config_path = os.path.join(corpus_directory, 'config.txt')
+    total = (corpus_stats['files'], corpus_stats['bytes'])
+    
+    def scan(method_name: str) -> Action:
+        def action(trace: bool):
+            processor = make_processor(files_directory, config_path)
+            with Measurement(trace) as measurement:
+                getattr(processor, method_name)()
+            return (measurement,) + total
+        return action
+    
+    scratch_root = tempfile.mkdtemp(prefix='txt_bench_')
+    
+    def remove_paragraphs(trace: bool) -> Tuple[Measurement, int, int]:
+        # 每次在语料的副本上删除全部关键词段落，复制和分析不计入耗时和内存峰值
+        scratch = os.path.join(scratch_root, 'files')
+        shutil.rmtree(scratch, ignore_errors=True)
+        shutil.copytree(files_directory, scratch)
+        processor = make_processor(scratch, config_path)
+        result = processor.find_keyword_paragraphs()
+        paths = [(os.path.join(scratch, rel_path), hits) for rel_path, hits in result.items()]
+        size = sum(os.path.getsize(path) for path, _ in paths)
+        
+        with Measurement(trace) as measurement:
+            for path, hits in paths:
+                processor.remove_paragraphs_from_file(path, hits)
+        return measurement, len(paths), size
+    
+    operations: List[Tuple[str, Action]] = [
+        ('find_keyword_paragraphs', scan('find_keyword_paragraphs')),
+        ('find_english_paragraphs', scan('find_english_paragraphs')),
+        ('find_garbled_files', scan('find_garbled_files')),
+        ('analyze_files', scan('analyze_files')),
+        ('remove_paragraphs_from_file', remove_paragraphs),
+    ]
+    
+    results = {}
+    try:
+        for name, action in operations:
+            results[name] = make_record(*measure_best(action, repeat))
+    finally:
+        shutil.rmtree(scratch_root, ignore_errors=True)
+    return results
+
+def make_record(seconds: float, peak_mb: Optional[float], files: int, size: int) -> Dict:
+    """一项操作的测量结果，peak_mb是该操作自身的Python内存分配峰值"""
+    seconds = max(seconds, 1e-9)
+    return {
+        'seconds': round(seconds, 4),
+        'files': files,
+        'bytes': size,
+        'files_per_sec': round(files / seconds, 1),
+        'mb_per_sec': round(size / seconds / (1024 * 1024), 2),
+        'peak_mb': peak_mb,
+    }
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """
+    与基准对比耗时
+    
+    Returns:
+        List[str]: 变慢超过容差的操作
+    """
+    regressions = []
+    print(f"\n与基准对比（容差 {tolerance:.0%}）:")
+    for name, record in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f"  {name:<30} 基准中没有该操作")
+            continue
+        ratio = record['seconds'] / max(base['seconds'], 1e-9)
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  <-- 变慢'
+            regressions.append(name)
+        print(f"  {name:<30} {base['seconds']:>9.3f}s -> {record['seconds']:>9.3f}s  ({ratio:.2f}x){flag}")
+    return regressions
+
+def print_results(results: Dict[str, Dict]):
+    """打印测量结果表"""
+    print(f"{'操作':<30} {'耗时(s)':>9} {'文件/秒':>10} {'MB/秒':>8} {'内存峰值(MB)':>12}")
+    for name, record in results.items():
+        peak = record['peak_mb']
+        print(f"{name:<30} {record['seconds']:>9.3f} {record['files_per_sec']:>10.1f} "
+              f"{record['mb_per_sec']:>8.2f} {peak if peak is not None else '-':>12}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    基准测试入口
+    
+    Returns:
+        int: 退出码，与基准对比有性能退化时为1
+    """
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='TextProcessor性能基准测试')
+    for field in CorpusSpec._fields:
+        default = getattr(defaults, field)
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default,
+                            help=f'语料参数，默认为{default}')
+    parser.add_argument('--corpus-dir', help='语料目录，默认为临时目录（测量后删除）')
+    parser.add_argument('--repeat', type=int, default=3, help='每项操作重复次数，取最短耗时')
+    parser.add_argument('--baseline', help='与这个基准JSON对比')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的变慢比例')
+    parser.add_argument('--save-baseline', help='把本次结果保存为基准JSON')
+    args = parser.parse_args(argv)
+    
+    spec = CorpusSpec(**{field: getattr(args, field) for field in CorpusSpec._fields})
+    corpus_directory = args.corpus_dir or tempfile.mkdtemp(prefix='txt_corpus_')
+    try:
+        print(f"生成语料: {corpus_directory}")
+        corpus_stats = generate_corpus(corpus_directory, spec)
+        print(f"{corpus_stats['files']} 个文件，{corpus_stats['bytes'] / (1024 * 1024):.1f} MB，"
+              f"{corpus_stats['paragraphs']} 个段落\n")
+        results = run_benchmarks(corpus_directory, corpus_stats, args.repeat)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_directory, ignore_errors=True)
+    
+    print_results(results)
+    report = {'spec': spec._asdict(), 'corpus': corpus_stats, 'results': results}
+    
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基准已保存: {args.save_baseline}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('spec') != report['spec']:
+            print("\n注意：基准使用的语料参数与本次不同，对比结果仅供参考")
+        if compare_with_baseline(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
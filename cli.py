@@ -0,0 +1,232 @@
+"""
+命令行批量模式：不启动图形界面，扫描结果以JSON Lines格式逐行输出，可按条件直接执行删除
+
+用法示例：
+    python main.py --headless --dir /data/txt --mode keyword --output hits.jsonl
+    python main.py --headless --dir /data/txt --mode garbled --delete --delete-glob "inbox/*"
+
+本模块及其导入的模块都不导入tkinter，可以在没有图形环境的服务器上运行。
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from analysis_result import hit_label, hit_text
+from config_manager import ConfigManager
+from file_analyzer import ANALYSIS_MODES
+from instrumentation import metrics, profile_to
+from processor import TextProcessor
+from verdict_cache import DEFAULT_VERDICT_CACHE_SIZE
+
+# 退出码（1是Python未捕获异常时的退出码，不使用）
+EXIT_OK = 0  # 完成，没有命中（执行删除时：全部删除成功）
+EXIT_HITS = 10  # 完成，有命中（只扫描不删除时）
+EXIT_USAGE = 2  # 参数错误（与argparse一致）
+EXIT_DELETE_FAILED = 3  # 有文件删除失败
+EXIT_ERROR = 4  # 目录不存在、配置无法读取、指定的模式缺少关键词等错误
+EXIT_INTERRUPTED = 130  # 被Ctrl+C中断
+
+# 需要配置文件中的关键词才能分析的模式
+CONFIG_MODES = {'keyword', 'garbled'}
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='main.py --headless',
+        description='文本段落批量处理工具（命令行模式）：扫描结果以JSON Lines格式输出'
+    )
+    parser.add_argument('--headless', action='store_true', help='以命令行模式运行（由main.py识别）')
+    parser.add_argument('--dir', required=True, help='待处理文件目录')
+    parser.add_argument('--config', default='config.txt', help='配置文件路径（默认为当前目录下的config.txt）')
+    parser.add_argument('--mode', action='append', choices=ANALYSIS_MODES,
+                        help='分析模式，可以重复指定，默认为全部模式')
+    parser.add_argument('--output', help='输出文件，默认为标准输出')
+    parser.add_argument('--with-text', action='store_true', help='输出命中段落的文本（乱码模式下不输出）')
+    parser.add_argument('--workers', type=int, default=1, help='并行扫描的进程数，默认为1')
+    parser.add_argument('--no-cache', action='store_true', help='不使用增量扫描缓存')
+    parser.add_argument('--verdict-cache-size', type=int, default=DEFAULT_VERDICT_CACHE_SIZE,
+                        help=f'英文检测中含标签段落的判定缓存条数，0表示不缓存，默认为{DEFAULT_VERDICT_CACHE_SIZE}')
+    parser.add_argument('--no-dedup', action='store_true', help='不合并内容相同的文件，每个文件都单独分析')
+    parser.add_argument('--persist-verdicts', action='store_true', help='把段落判定缓存保存到扫描缓存中，供下次运行使用')
+    parser.add_argument('--exclude', action='append', default=[], help='排除的glob模式，可以重复指定')
+    parser.add_argument('--max-depth', type=int, help='遍历目录的最大深度，0表示只处理根目录中的文件')
+    parser.add_argument('--persist-listing', action='store_true',
+                        help='把目录清单保存到扫描缓存，下次只重新列出有变化的目录（使用--no-cache时无效）')
+    parser.add_argument('--delete', action='store_true', help='扫描后删除符合过滤条件的命中（需要只指定一个模式）')
+    parser.add_argument('--delete-label', action='append', default=[],
+                        help='只删除命中这些关键词的段落，可以重复指定')
+    parser.add_argument('--delete-glob', action='append', default=[],
+                        help='只删除相对路径与这些glob模式匹配的文件中的命中，可以重复指定')
+    parser.add_argument('--no-undo', action='store_true', help='删除时不记录撤销日志')
+    parser.add_argument('--stats', action='store_true', help='在末尾输出各阶段耗时等性能统计记录')
+    parser.add_argument('--profile', help='用cProfile分析整个运行过程，结果保存到这个文件')
+    return parser
+
+class JsonLinesWriter:
+    """逐行输出JSON记录，每行写完立即刷新，下游可以边扫描边处理"""
+    
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+    
+    def write(self, record: Dict):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+def matches_delete_filter(args: argparse.Namespace, filename: str, label: str) -> bool:
+    """一条命中是否符合删除过滤条件，没有指定过滤条件时全部符合"""
+    if args.delete_glob and not any(fnmatch.fnmatch(filename.replace('\\', '/'), pattern)
+                                    for pattern in args.delete_glob):
+        return False
+    if args.delete_label and not set(args.delete_label) & set(label.split()):
+        return False
+    return True
+
+def run(args: argparse.Namespace, writer: JsonLinesWriter) -> int:
+    """
+    执行扫描（和删除），结果写入writer
+    
+    Returns:
+        int: 退出码
+    """
+    if not os.path.isdir(args.dir):
+        print(f"目录不存在: {args.dir}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    requested_modes = [mode for mode in ANALYSIS_MODES if mode in (args.mode or ANALYSIS_MODES)]
+    if set(requested_modes) & CONFIG_MODES:
+        # ConfigManager读取失败时只打印信息并返回空配置，这里先确认配置文件可以读取
+        try:
+            with open(args.config, 'r', encoding='utf-8') as f:
+                ConfigManager.parse_config(f.read())
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"无法读取配置文件 {args.config}: {e}", file=sys.stderr)
+            return EXIT_ERROR
+    
+    processor = TextProcessor()
+    processor.set_files_directory(args.dir)
+    processor.config_manager.set_config_path(args.config)
+    processor.set_parallel_options(args.workers)
+    processor.set_index_options(args.exclude, args.max_depth, args.persist_listing)
+    processor.use_scan_cache = not args.no_cache
+    processor.set_verdict_cache_options(args.verdict_cache_size, args.persist_verdicts)
+    processor.detect_duplicates = not args.no_dedup
+    processor.use_undo_journal = not args.no_undo
+    
+    modes = processor.resolve_modes(requested_modes)
+    if args.mode and modes != requested_modes:
+        # 明确指定的模式因配置中没有关键词而无法分析
+        dropped = [mode for mode in requested_modes if mode not in modes]
+        print(f"配置文件 {args.config} 中缺少以下模式所需的关键词: {', '.join(dropped)}", file=sys.stderr)
+        processor.close()
+        return EXIT_ERROR
+    metrics.enable(args.stats)
+    metrics.reset()
+    cancel_event = threading.Event()
+    analysis = processor.iter_analysis(modes, cancel_event)
+    try:
+        exit_code = write_results(args, processor, analysis, modes, writer)
+        if args.stats:
+            writer.write(dict(type='stats', **metrics.summary()))
+        return exit_code
+    except KeyboardInterrupt:
+        cancel_event.set()
+        analysis.close()
+        print("扫描被中断", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    finally:
+        processor.close()
+
+def write_results(args: argparse.Namespace, processor: TextProcessor, analysis: Iterator[Tuple[str, Dict[str, List]]],
+                  modes: List[str], writer: JsonLinesWriter) -> int:
+    """
+    逐个文件输出命中记录和汇总记录，指定--delete时再删除符合过滤条件的命中并输出每个文件的删除结果
+    
+    Returns:
+        int: 退出码
+    """
+    start_time = time.monotonic()
+    file_counts = {mode: 0 for mode in modes}
+    hit_counts = {mode: 0 for mode in modes}
+    selected_items: Dict[str, List] = {}
+    
+    for filename, file_result in analysis:
+        content = None
+        for mode, items in file_result.items():
+            file_counts[mode] += 1
+            hit_counts[mode] += len(items)
+            labels = processor.result_labels.get(mode, [])
+            for hit in items:
+                label = hit_label(mode, labels, hit)
+                record = {'type': 'hit', 'mode': mode, 'file': filename, 'label': label}
+                if mode != 'garbled':
+                    record.update(start=hit.start, end=hit.end, checksum=hit.checksum)
+                    if args.with_text:
+                        if content is None:
+                            content = processor.read_file_content(os.path.join(args.dir, filename))
+                        record['text'] = hit_text(mode, content, hit)
+                writer.write(record)
+                
+                if args.delete and matches_delete_filter(args, filename, label):
+                    spans = selected_items.setdefault(filename, [])
+                    if mode != 'garbled':
+                        spans.append((hit.start, hit.end, hit.checksum))
+    
+    writer.write({
+        'type': 'summary',
+        'directory': args.dir,
+        'modes': modes,
+        'files_with_hits': file_counts,
+        'hits': hit_counts,
+        'elapsed': round(time.monotonic() - start_time, 3),
+    })
+    
+    if not args.delete:
+        return EXIT_HITS if any(hit_counts.values()) else EXIT_OK
+    
+    summary = processor.apply_deletion(modes[0], selected_items)
+    for outcome in summary.outcomes:
+        record = {'type': 'deletion', 'mode': modes[0], 'file': outcome.filename, 'success': outcome.success}
+        if outcome.message:
+            record['message'] = outcome.message
+        writer.write(record)
+    return EXIT_OK if summary.ok else EXIT_DELETE_FAILED
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+    
+    Args:
+        argv: 命令行参数（不含程序名），默认为sys.argv[1:]
+    
+    Returns:
+        int: 退出码
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.delete and len(args.mode or ANALYSIS_MODES) != 1:
+        parser.error('--delete 需要用 --mode 指定一个分析模式')
+    
+    output = sys.stdout
+    try:
+        if args.output:
+            output = open(args.output, 'w', encoding='utf-8')
+    except OSError as e:
+        print(f"无法打开输出文件: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    try:
+        # 分析过程中的提示信息输出到标准错误，标准输出只有JSON记录
+        with contextlib.redirect_stdout(sys.stderr), profile_to(args.profile):
+            return run(args, JsonLinesWriter(output))
+    except Exception as e:
+        print(f"运行出错: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -1,69 +1,120 @@
+import hashlib
+import json
 import os
-from typing import List
+from typing import List, NamedTuple, Optional, Tuple
+from garbled_detector import DEFAULT_GARBLED_THRESHOLD
+
+class ConfigSnapshot(NamedTuple):
+    """配置文件解析一次后的结果"""
+    keywords: Tuple[str, ...]  # keywords = 行中的关键词
+    garbled_keywords: Tuple[str, ...]  # check_garbled = 行中的乱码检测关键词
+    garbled_threshold: float  # garbled_threshold = 行中的乱码字符比例阈值，0表示不做统计评分
+    version: str  # 配置内容的哈希，配置变化时改变，下游的缓存（编译好的匹配器等）以此为键
+
+# 配置文件不存在或读取出错时使用的空配置：没有关键词，也不做统计评分（否则会把所有文件按默认阈值评分）
+EMPTY_SNAPSHOT = ConfigSnapshot((), (), 0, '')
 
 class ConfigManager:
-    """配置文件管理类，负责读取和管理关键词配置"""
+    """配置文件管理类，负责读取和管理关键词配置
+    
+    配置文件只在修改时间或大小变化后才重新读取和解析，两种关键词一次解析得到。
+    """
     
     def __init__(self, config_path: str = 'config.txt'):
         self.config_path = config_path
         self.keywords = []
         self.garbled_keywords = []
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._snapshot_stat: Optional[Tuple[int, int]] = None  # 解析时配置文件的(修改时间, 文件大小)
     
-    def load_keywords(self) -> List[str]:
-        """从配置文件加载关键词列表"""
+    def get_snapshot(self) -> ConfigSnapshot:
+        """
+        获取当前配置，配置文件没有变化时直接返回上次的解析结果
+        
+        Returns:
+            ConfigSnapshot: 配置快照
+        """
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    for line in lines:
-                        line = line.strip()
-                        # 检查是否包含 "keywords = " 前缀
-                        if line.startswith('keywords ='):
-                            # 移除 "keywords = " 前缀，然后按空格分割关键词
-                            keywords_content = line[10:].strip()  # 移除 "keywords = " (10个字符)
-                            self.keywords = [keyword.strip() for keyword in keywords_content.split() if keyword.strip()]
-                            break
-                    else:
-                        # 如果没有找到 keywords = 行，设置为空列表
-                        self.keywords = []
-            else:
-                print(f"配置文件不存在: {self.config_path}")
-                self.keywords = []
-        except Exception as e:
+            stat = os.stat(self.config_path)
+        except FileNotFoundError:
+            print(f"配置文件不存在: {self.config_path}")
+            return self._set_snapshot(EMPTY_SNAPSHOT, None)
+        except OSError as e:
             print(f"读取配置文件时出错: {e}")
-            self.keywords = []
+            return self._set_snapshot(EMPTY_SNAPSHOT, None)
+        
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        if self._snapshot is not None and self._snapshot_stat == file_stat:
+            return self._snapshot
         
-        return self.keywords
-    
-    def load_garbled_keywords(self) -> List[str]:
-        """从配置文件加载乱码检测关键词列表"""
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        # 查找 "check_garbled = " 行
-                        lines = content.split('\n')
-                        for line in lines:
-                            line = line.strip()
-                            if line.startswith('check_garbled = '):
-                                # 移除 "check_garbled = " 前缀，然后按空格分割关键词
-                                garbled_content = line[16:].strip()  # 移除 "check_garbled = " (16个字符)
-                                self.garbled_keywords = [keyword.strip() for keyword in garbled_content.split() if keyword.strip()]
-                                break
-                        else:
-                            # 如果没有找到 check_garbled 行，设置为空列表
-                            self.garbled_keywords = []
-                    else:
-                        self.garbled_keywords = []
-            else:
-                print(f"配置文件不存在: {self.config_path}")
-                self.garbled_keywords = []
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                snapshot = self.parse_config(f.read())
         except Exception as e:
             print(f"读取配置文件时出错: {e}")
-            self.garbled_keywords = []
+            return self._set_snapshot(EMPTY_SNAPSHOT, None)
         
-        return self.garbled_keywords
+        return self._set_snapshot(snapshot, file_stat)
+    
+    def _set_snapshot(self, snapshot: ConfigSnapshot, file_stat: Optional[Tuple[int, int]]) -> ConfigSnapshot:
+        """保存解析结果，file_stat为None时下次重新读取"""
+        self._snapshot = snapshot if file_stat is not None else None
+        self._snapshot_stat = file_stat
+        self.keywords = list(snapshot.keywords)
+        self.garbled_keywords = list(snapshot.garbled_keywords)
+        return snapshot
+    
+    @staticmethod
+    def parse_config(content: str) -> ConfigSnapshot:
+        """
+        解析配置文件内容
+        
+        Args:
+            content: 配置文件内容
+        
+        Returns:
+            ConfigSnapshot: 配置快照，没有找到的配置项为空
+        """
+        keywords = None
+        garbled_keywords = None
+        garbled_threshold = None
+        for line in content.split('\n'):
+            line = line.strip()
+            # 检查是否包含 "keywords = " 前缀，只使用第一个
+            if keywords is None and line.startswith('keywords ='):
+                # 移除 "keywords = " 前缀，然后按空格分割关键词
+                keywords_content = line[10:].strip()  # 移除 "keywords = " (10个字符)
+                keywords = tuple(keyword.strip() for keyword in keywords_content.split() if keyword.strip())
+            # 查找 "check_garbled = " 行，只使用第一个
+            elif garbled_keywords is None and line.startswith('check_garbled = '):
+                # 移除 "check_garbled = " 前缀，然后按空格分割关键词
+                garbled_content = line[16:].strip()  # 移除 "check_garbled = " (16个字符)
+                garbled_keywords = tuple(keyword.strip() for keyword in garbled_content.split() if keyword.strip())
+            # 查找 "garbled_threshold = " 行，只使用第一个
+            elif garbled_threshold is None and line.startswith('garbled_threshold ='):
+                try:
+                    garbled_threshold = float(line[19:].strip())  # 移除 "garbled_threshold =" (19个字符)
+                except ValueError:
+                    print(f"乱码字符比例阈值格式错误，使用默认值 {DEFAULT_GARBLED_THRESHOLD}: {line}")
+                    garbled_threshold = DEFAULT_GARBLED_THRESHOLD
+        
+        # 如果没有找到对应的行，设置为空
+        keywords = keywords or ()
+        garbled_keywords = garbled_keywords or ()
+        if garbled_threshold is None:
+            garbled_threshold = DEFAULT_GARBLED_THRESHOLD
+        version = hashlib.sha1(
+            json.dumps([keywords, garbled_keywords, garbled_threshold], ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return ConfigSnapshot(keywords, garbled_keywords, garbled_threshold, version)
+    
+    def load_keywords(self) -> List[str]:
+        """从配置文件加载关键词列表（配置文件没有变化时不重新读取）"""
+        return list(self.get_snapshot().keywords)
+    
+    def load_garbled_keywords(self) -> List[str]:
+        """从配置文件加载乱码检测关键词列表（配置文件没有变化时不重新读取）"""
+        return list(self.get_snapshot().garbled_keywords)
     
     def get_keywords(self) -> List[str]:
         """获取当前加载的关键词列表"""
@@ -76,5 +127,5 @@ class ConfigManager:
     def set_config_path(self, path: str):
         """设置配置文件路径"""
         self.config_path = path
-        self.load_keywords()
-        self.load_garbled_keywords() 
\ No newline at end of file
+        self._snapshot = None
+        self.get_snapshot()
@@ -0,0 +1,124 @@
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from file_indexer import FileEntry
+from instrumentation import metrics
+
+# 流式计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 大小相同的文件先比较开头这么多字节的哈希，开头就不同的文件不需要读完
+HEAD_SIZE = 64 * 1024
+
+# 文件内容的哈希 {文件路径: (文件大小, 修改时间, 哈希)}
+DigestTable = Dict[str, Tuple[int, int, bytes]]
+
+def file_digest(file_path: str, limit: Optional[int] = None) -> bytes:
+    """
+    流式计算文件内容的哈希，不把整个文件读入内存
+    
+    Args:
+        file_path: 文件路径
+        limit: 只计算开头limit个字节，为None时计算整个文件
+    
+    Returns:
+        bytes: 16字节的blake2b摘要
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = limit
+    with open(file_path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(HASH_CHUNK_SIZE if remaining is None else min(HASH_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.digest()
+
+class DuplicateResolver:
+    """按需找出内容完全相同的文件
+    
+    大小唯一的文件不需要读取；大小相同的文件先比较开头的哈希，开头也相同时再比较完整内容的哈希。
+    哈希在查询到某个文件时才按文件顺序计算到该文件为止，扫描可以边判断边进行，不需要在开始前
+    读完所有大小相同的文件。
+    """
+    
+    def __init__(self, entries: List[FileEntry], known: DigestTable = None):
+        """
+        Args:
+            entries: 文件列表（FileIndexer.scan的结果），文件顺序决定哪个文件是一组中的第一个
+            known: 上次计算的完整哈希，文件大小和修改时间都没有变化时直接使用，不再读取文件
+        """
+        known = known or {}
+        self._entries = entries
+        self._entry_by_path = {entry.path: entry for entry in entries}
+        self._position = 0  # 已经判断到entries中的位置
+        # 空文件没有任何命中，不需要合并
+        sizes = Counter(entry.size for entry in entries)
+        self._shared_sizes = {size for size, count in sizes.items() if count > 1 and size > 0}
+        self._originals: Dict[str, Optional[str]] = {}  # {文件路径: 内容相同的第一个文件，自己就是第一个时为None}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}  # {(文件大小, 开头的哈希): [各不相同的第一个文件]}
+        self._heads: Dict[str, bytes] = {}  # {文件路径: 开头HEAD_SIZE个字节的哈希}
+        # 本次计算或沿用的完整哈希，可保存供下次使用
+        self.digests: DigestTable = {}
+        for entry in entries:
+            cached = known.get(entry.path)
+            if cached and (cached[0], cached[1]) == (entry.size, entry.mtime_ns):
+                self.digests[entry.path] = cached
+    
+    def may_have_copies(self, file_path: str) -> bool:
+        """文件是否可能与其他文件内容相同（有大小相同的其他文件）"""
+        entry = self._entry_by_path.get(file_path)
+        return entry is not None and entry.size in self._shared_sizes
+    
+    def find_original(self, file_path: str) -> Optional[str]:
+        """
+        查找与file_path内容相同的第一个文件
+        
+        Args:
+            file_path: entries中的文件路径
+        
+        Returns:
+            Optional[str]: entries中排在前面的内容相同的第一个文件；file_path自己就是第一个、
+            无法读取或不在entries中时返回None
+        """
+        while file_path not in self._originals and self._position < len(self._entries):
+            entry = self._entries[self._position]
+            self._position += 1
+            if entry.size in self._shared_sizes:
+                with metrics.stage('dedup'):
+                    self._originals[entry.path] = self._resolve(entry)
+            else:
+                self._originals[entry.path] = None
+        return self._originals.get(file_path)
+    
+    def _resolve(self, entry: FileEntry) -> Optional[str]:
+        """与之前大小相同的文件逐一比较，返回内容相同的第一个文件"""
+        try:
+            originals = self._buckets.setdefault((entry.size, self._head(entry)), [])
+            for original in originals:
+                # 不超过HEAD_SIZE的文件开头的哈希就是完整内容的哈希
+                if entry.size <= HEAD_SIZE or self._full(original) == self._full(entry.path):
+                    return original
+        except OSError:
+            return None
+        originals.append(entry.path)
+        return None
+    
+    def _head(self, entry: FileEntry) -> bytes:
+        """开头HEAD_SIZE个字节的哈希"""
+        if entry.size <= HEAD_SIZE:
+            return self._full(entry.path)
+        head = self._heads.get(entry.path)
+        if head is None:
+            head = self._heads[entry.path] = file_digest(entry.path, HEAD_SIZE)
+        return head
+    
+    def _full(self, file_path: str) -> bytes:
+        """完整内容的哈希"""
+        cached = self.digests.get(file_path)
+        if cached is None:
+            entry = self._entry_by_path[file_path]
+            cached = self.digests[file_path] = (entry.size, entry.mtime_ns, file_digest(file_path))
+        return cached[2]
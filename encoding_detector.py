@@ -0,0 +1,141 @@
+import codecs
+import os
+from typing import Dict, Optional, Tuple
+from instrumentation import metrics
+
+# 判断编码时试解码的文件开头字节数
+SNIFF_SIZE = 64 * 1024
+
+# 带BOM的编码，UTF-32的BOM以UTF-16的BOM开头，需要先检查
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# 没有BOM时依次尝试的编码：语料是UTF-8和GBK混合的，GB18030兼容GBK
+CANDIDATE_ENCODINGS = ('utf-8', 'gb18030')
+
+def sniff_encoding(prefix: bytes, complete: bool = False) -> str:
+    """
+    根据文件开头的字节判断编码：先检查BOM，再依次试解码
+    
+    Args:
+        prefix: 文件开头的字节
+        complete: prefix是否就是整个文件（否则末尾可能截断了一个多字节字符）
+    
+    Returns:
+        str: 编码名称，都无法解码时返回第一个候选编码（读取时用替换字符处理错误字节）
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if prefix.startswith(bom):
+            return encoding
+    
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=complete)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CANDIDATE_ENCODINGS[0]
+
+def decode_content(data: bytes, encoding: str) -> Tuple[str, Optional[str]]:
+    """
+    按判断出的编码解码文件内容，开头之后出现无法解码的字节时再尝试其他候选编码
+    
+    Args:
+        data: 文件的全部字节
+        encoding: sniff_encoding判断出的编码
+    
+    Returns:
+        Tuple[str, Optional[str]]: (文件内容, 实际使用的编码)；所有编码都无法完整解码时，
+        错误字节用替换字符代替，其余内容照常返回，编码为None（这样的文件不能按原编码写回）
+    """
+    for candidate in (encoding,) + tuple(e for e in CANDIDATE_ENCODINGS if e != encoding):
+        try:
+            return data.decode(candidate), candidate
+        except UnicodeDecodeError:
+            continue
+    return data.decode(encoding, errors='replace'), None
+
+class EncodingDetector:
+    """文件编码检测器，按文件缓存检测结果，文件大小或修改时间变化后重新检测"""
+    
+    def __init__(self):
+        self._cache: Dict[str, Tuple[int, int, str]] = {}  # {文件路径: (文件大小, 修改时间, 编码)}
+    
+    def detect(self, file_path: str) -> str:
+        """
+        获取文件的编码，只读取文件开头的SNIFF_SIZE个字节
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            str: 编码名称
+        """
+        stat = os.stat(file_path)
+        cached = self._cache.get(file_path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        
+        with open(file_path, 'rb') as f:
+            prefix = f.read(SNIFF_SIZE)
+        encoding = sniff_encoding(prefix, complete=len(prefix) >= stat.st_size)
+        self._cache[file_path] = (stat.st_size, stat.st_mtime_ns, encoding)
+        return encoding
+    
+    def remember(self, file_path: str, encoding: str):
+        """完整解码时发现开头判断的编码不对，记录实际使用的编码"""
+        cached = self._cache.get(file_path)
+        if cached:
+            self._cache[file_path] = (cached[0], cached[1], encoding)
+
+# 进程内共用的检测器（每个工作进程各有一份缓存）
+_detector = EncodingDetector()
+
+def detect_file_encoding(file_path: str) -> str:
+    """获取文件的编码（按文件缓存）"""
+    return _detector.detect(file_path)
+
+def read_text(file_path: str, data: bytes = None) -> Tuple[str, Optional[str]]:
+    """
+    按检测出的编码读取文件内容（不转换换行符）
+    
+    Args:
+        file_path: 文件路径
+        data: 已经读取的文件字节，为None时从文件读取
+    
+    Returns:
+        Tuple[str, Optional[str]]: 与decode_content相同
+    """
+    encoding = _detector.detect(file_path)
+    if data is None:
+        with metrics.stage('read'):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        metrics.count('bytes_read', len(data))
+    with metrics.stage('decode'):
+        content, used_encoding = decode_content(data, encoding)
+    if used_encoding is not None and used_encoding != encoding:
+        _detector.remember(file_path, used_encoding)
+    return content, used_encoding
+
+def read_text_prefix(file_path: str, size: int) -> str:
+    """
+    按检测出的编码读取文件开头的一部分，用于预览，不读取整个文件
+    
+    Args:
+        file_path: 文件路径
+        size: 最多读取的字节数
+    
+    Returns:
+        str: 解码后的文本，末尾截断的多字节字符被丢弃，无法解码的字节用替换字符代替
+    """
+    encoding = _detector.detect(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read(size)
+        complete = not f.read(1)
+    return codecs.getincrementaldecoder(encoding)(errors='replace').decode(data, final=complete)
@@ -1,5 +1,8 @@
 import re
+from bisect import bisect_right
+from itertools import accumulate
 from typing import List, Tuple
+from verdict_cache import VerdictCache
 
 class EnglishDetector:
     """英文句子检测器，用于检测段落中是否包含英文句子"""
@@ -11,6 +14,17 @@ class EnglishDetector:
         self.english_sentence_pattern = re.compile(r'[a-zA-Z]+\s+[a-zA-Z]+')
         # HTML标签模式，用于排除HTML标签内的英文
         self.html_tag_pattern = re.compile(r'<[^>]*>')
+        # 一次扫描完成标签排除和英文句子检测，不需要先生成去掉标签的副本：
+        # 扫描时遇到的标签整体作为一个匹配跳过，所以不会从标签内部开始匹配句子；
+        # 句子分支中单词与空白之间允许夹着标签，与去掉标签后再匹配english_sentence_pattern等价
+        self.english_sentence_outside_tags_pattern = re.compile(
+            r'<[^>]*>|([a-zA-Z](?:<[^>]*>)*\s(?:\s|<[^>]*>)*[a-zA-Z])'
+        )
+        # 在整段文本上批量检测时使用的候选模式：与上面的句子分支相同，但不跨越换行符。
+        # 包含英文句子的行一定能匹配；行内没有'<'时匹配即是结论，有'<'时匹配可能位于标签内部，需要逐行核对
+        self.english_sentence_line_pattern = re.compile(
+            r'[a-zA-Z](?:<[^>\n]*>)*[^\S\n](?:[^\S\n]|<[^>\n]*>)*[a-zA-Z]'
+        )
     
     def contains_english_sentence(self, text: str) -> bool:
         """
@@ -30,12 +44,20 @@ class EnglishDetector:
         if not text or not text.strip():
             return False
         
-        # 移除HTML标签，避免误判
-        text_without_tags = self.html_tag_pattern.sub('', text)
+        # 没有英文字母的段落（大多数中文段落）不需要运行正则表达式：
+        # 先取出段落中的ASCII字符，其中大小写转换前后相同说明没有字母
+        ascii_chars = text.encode('ascii', 'ignore')
+        if ascii_chars.lower() == ascii_chars.upper():
+            return False
+        
+        # 没有标签的段落直接检测英文句子模式
+        if '<' not in text:
+            return self.english_sentence_pattern.search(text) is not None
         
-        # 检测是否包含英文句子模式
-        if self.english_sentence_pattern.search(text_without_tags):
-            return True
+        # 跳过HTML标签的同时检测英文句子，命中句子分支时分组1有值
+        for match in self.english_sentence_outside_tags_pattern.finditer(text):
+            if match.group(1):
+                return True
         
         return False
     
@@ -49,13 +71,78 @@ class EnglishDetector:
         Returns:
             List[Tuple[int, str]]: 包含(段落索引, 段落内容)的列表
         """
-        english_paragraphs = []
+        mask = self.english_sentence_mask(paragraphs)
+        return [(i, paragraph) for i, paragraph in enumerate(paragraphs) if mask[i]]
+    
+    def english_sentence_mask(self, paragraphs: List[str]) -> bytearray:
+        """
+        批量检测一组段落（一个文件或一块段落），结果与逐段调用contains_english_sentence相同
+        
+        段落以换行符连接后整体扫描一次，只有候选段落才需要逐段处理
+        
+        Args:
+            paragraphs: 段落列表
+            
+        Returns:
+            bytearray: 与paragraphs等长的掩码，1表示该段落包含英文句子
+        """
+        mask = bytearray(len(paragraphs))
+        text = '\n'.join(paragraphs)
+        if text.count('\n') != len(paragraphs) - 1:
+            # 段落本身含有换行符时不能按行对应，逐段检测
+            for i, paragraph in enumerate(paragraphs):
+                mask[i] = self.contains_english_sentence(paragraph)
+            return mask
+        
+        # 各段落在连接后文本中的起始位置
+        starts = [0] + list(accumulate(len(paragraph) + 1 for paragraph in paragraphs))
+        for start, _, _ in self.find_english_spans(text):
+            mask[bisect_right(starts, start) - 1] = 1
+        return mask
+    
+    def find_english_spans(self, text: str, verdicts: VerdictCache = None) -> List[Tuple[int, int, str]]:
+        """
+        在整个文本中查找包含英文句子的段落，结果与先用extract_paragraph_spans切分、
+        再逐段调用contains_english_sentence相同
+        
+        没有英文字母的文本直接返回；否则用候选模式在C层扫描整个文本，
+        只对命中的行切出段落，行内有'<'时再按标签规则逐段核对
+        
+        Args:
+            text: 原始文本
+            verdicts: 段落判定缓存，重复出现的段落只按标签规则核对一次
+            
+        Returns:
+            List[Tuple[int, int, str]]: [(段落所在行的起始位置, 结束位置(不含换行符), 段落内容)]
+        """
+        spans = []
+        if not text:
+            return spans
         
-        for i, paragraph in enumerate(paragraphs):
-            if self.contains_english_sentence(paragraph):
-                english_paragraphs.append((i, paragraph))
+        # 整个文本都没有英文字母（纯中文文件）时不需要扫描
+        ascii_chars = text.encode('ascii', 'ignore')
+        if ascii_chars.lower() == ascii_chars.upper():
+            return spans
         
-        return english_paragraphs
+        pattern = self.english_sentence_line_pattern
+        match = pattern.search(text)
+        while match:
+            start = text.rfind('\n', 0, match.start()) + 1
+            end = text.find('\n', match.end())
+            if end == -1:
+                end = len(text)
+            
+            paragraph = text[start:end].strip()
+            if '<' not in paragraph:
+                spans.append((start, end, paragraph))
+            elif (verdicts.lookup('english', paragraph, self.contains_english_sentence) if verdicts is not None
+                  else self.contains_english_sentence(paragraph)):
+                spans.append((start, end, paragraph))
+            
+            # 同一行只处理一次，从下一行开始继续查找
+            match = pattern.search(text, end)
+        
+        return spans
     
     def extract_paragraphs_from_text(self, text: str) -> List[str]:
         """
@@ -72,4 +159,29 @@ class EnglishDetector:
         
         # 按换行符分割，并过滤空段落
         paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-        return paragraphs 
\ No newline at end of file
+        return paragraphs
+    
+    def extract_paragraph_spans(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        从文本中提取段落及其在文本中的位置（按换行符分割）
+        
+        Args:
+            text: 原始文本
+            
+        Returns:
+            List[Tuple[int, int, str]]: [(段落所在行的起始位置, 结束位置(不含换行符), 段落内容)]，
+            段落内容与extract_paragraphs_from_text的结果一致
+        """
+        spans = []
+        if not text:
+            return spans
+        
+        start = 0
+        for line in text.split('\n'):
+            end = start + len(line)
+            paragraph = line.strip()
+            if paragraph:
+                spans.append((start, end, paragraph))
+            start = end + 1
+        
+        return spans 
\ No newline at end of file
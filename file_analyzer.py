@@ -0,0 +1,163 @@
+import time
+import zlib
+from typing import Dict, Iterable, List, Set
+from analysis_result import Hit
+from encoding_detector import detect_file_encoding, read_text
+from english_detector import EnglishDetector
+from garbled_detector import DEFAULT_GARBLED_THRESHOLD, READ_FAILED, GarbledDetector
+from instrumentation import metrics
+from keyword_matcher import KeywordMatcher
+from verdict_cache import VerdictCache
+
+# 支持的分析模式：关键词段落、英文段落、乱码文件
+ANALYSIS_MODES = ('keyword', 'english', 'garbled')
+
+# 检测规则或结果格式的版本号，修改检测逻辑时递增，使旧的扫描缓存失效
+ANALYSIS_VERSION = 7
+
+def read_file_content(file_path: str) -> str:
+    """读取文件内容（按检测出的编码解码，不转换换行符，段落位置与文件中的实际位置一致）"""
+    try:
+        content, encoding = read_text(file_path)
+    except OSError as e:
+        print(f"读取文件 {file_path} 时出错: {e}")
+        return ""
+    
+    if encoding is None:
+        # 只有无法解码的字节被替换，其余内容照常检测
+        print(f"文件 {file_path} 包含无法解码的字节，已用替换字符代替")
+    return content
+
+
+def paragraph_checksum(paragraph: str) -> int:
+    """段落校验和，删除前用来核对文件中该位置的内容是否仍是分析时的段落"""
+    return zlib.crc32(paragraph.encode('utf-8'))
+
+class FileAnalyzer:
+    """单文件分析器：文件只切分一次，在同一份内存内容上运行所有启用的检测器"""
+    
+    def __init__(self, keywords: List[str], garbled_keywords: List[str], english_detector: EnglishDetector = None,
+                 garbled_threshold: float = DEFAULT_GARBLED_THRESHOLD, verdict_cache: VerdictCache = None):
+        self.keyword_matcher = KeywordMatcher(keywords)
+        self.garbled_detector = GarbledDetector(garbled_keywords, garbled_threshold)
+        self.english_detector = english_detector or EnglishDetector()
+        # 段落判定缓存，必须与关键词属于同一配置版本；为None时不缓存
+        self.verdict_cache = verdict_cache
+    
+    def analyze_file(self, file_path: str, modes: Iterable[str]) -> Dict[str, List]:
+        """
+        读取一个文件并运行启用的检测器
+        
+        Args:
+            file_path: 文件路径
+            modes: 启用的分析模式
+        
+        Returns:
+            Dict[str, List]: 与analyze_content相同
+        """
+        if not metrics.enabled:
+            return self._analyze_file(file_path, modes)
+        
+        start = time.perf_counter()
+        try:
+            return self._analyze_file(file_path, modes)
+        finally:
+            metrics.count('files_analyzed')
+            metrics.record_file(file_path, time.perf_counter() - start)
+    
+    def _analyze_file(self, file_path: str, modes: Iterable[str]) -> Dict[str, List]:
+        """analyze_file的实现"""
+        modes = set(modes)
+        if modes == {'garbled'}:
+            # 只检测乱码时不需要整个文件的内容，按块读取，找到第一个乱码关键词即停止
+            try:
+                with metrics.stage('garbled'):
+                    keyword_id = self.garbled_detector.find_in_file(file_path, detect_file_encoding(file_path))
+            except OSError:
+                keyword_id = READ_FAILED
+            if keyword_id != READ_FAILED:
+                return {'garbled': [Hit(0, 0, 0, (keyword_id,))]} if keyword_id is not None else {}
+        
+        content = read_file_content(file_path)
+        if not content:
+            return {}
+        return self.analyze_content(content, modes)
+    
+    def analyze_content(self, content: str, modes: Iterable[str]) -> Dict[str, List]:
+        """
+        对一个文件的内容运行启用的检测器
+        
+        Args:
+            content: 文件内容
+            modes: 启用的分析模式（ANALYSIS_MODES中的若干项）
+        
+        Returns:
+            Dict[str, List]: {分析模式: [Hit]}，没有命中的模式不出现在结果中。
+            位置为段落所在行在文件内容中的字符偏移，删除时据此直接切除；
+            结果中不保存段落文本，显示时再按位置从文件中读取
+        """
+        results = {}
+        modes = set(modes)
+        if metrics.enabled:
+            metrics.count('paragraphs', content.count('\n') + 1)
+        
+        if 'keyword' in modes and self.keyword_matcher.keywords:
+            with metrics.stage('keyword'):
+                matching_paragraphs = self.find_keyword_hits(content)
+            if matching_paragraphs:
+                results['keyword'] = matching_paragraphs
+        
+        if 'english' in modes:
+            # 整个文件扫描一次，只有包含英文句子的行才切出段落
+            with metrics.stage('english'):
+                english_paragraphs = [
+                    Hit(start, end, paragraph_checksum(paragraph))
+                    for start, end, paragraph in self.english_detector.find_english_spans(content, self.verdict_cache)
+                ]
+            if english_paragraphs:
+                results['english'] = english_paragraphs
+        
+        if 'garbled' in modes:
+            # 文件中最靠前的乱码关键词，找到一个就够了；没有关键词时按可疑字符的比例评分
+            with metrics.stage('garbled'):
+                keyword_id = self.garbled_detector.find_in_text(content)
+            if keyword_id is not None:
+                results['garbled'] = [Hit(0, 0, 0, (keyword_id,))]
+        
+        return results
+    
+    def find_keyword_hits(self, content: str) -> List[Hit]:
+        """
+        查找包含关键词的段落：自动机在整个文件内容上扫描一次，再把命中的关键词归入所在的行，
+        没有关键词的行不需要切分
+        
+        Args:
+            content: 文件内容
+        
+        Returns:
+            List[Hit]: 按行顺序排列的命中项，段落的划分与EnglishDetector.extract_paragraph_spans一致
+        """
+        hits = []
+        start = end = -1
+        keyword_ids = set()
+        for position, index in self.keyword_matcher.iter_matches(content):
+            if position > end:
+                # 关键词中不含换行符，起始位置在当前行之后就属于新的一行
+                if keyword_ids:
+                    hits.append(self._keyword_hit(content, start, end, keyword_ids))
+                start = content.rfind('\n', 0, position) + 1
+                end = content.find('\n', position)
+                if end == -1:
+                    end = len(content)
+                keyword_ids = set()
+            keyword_ids.add(index)
+        
+        if keyword_ids:
+            hits.append(self._keyword_hit(content, start, end, keyword_ids))
+        return hits
+    
+    @staticmethod
+    def _keyword_hit(content: str, start: int, end: int, keyword_ids: Set[int]) -> Hit:
+        """一行的命中项（关键词中不含空白字符，所在的行去掉首尾空白后一定不是空段落）"""
+        paragraph = content[start:end].strip()
+        return Hit(start, end, paragraph_checksum(paragraph), tuple(sorted(keyword_ids)))
@@ -0,0 +1,112 @@
+import fnmatch
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+class FileEntry(NamedTuple):
+    """目录索引中的一个文件"""
+    path: str  # 完整路径
+    size: int  # 文件大小
+    mtime_ns: int  # 修改时间（纳秒）
+
+# 目录清单：{相对目录: (目录修改时间, [txt文件名], [子目录名])}，根目录的相对路径为'.'
+DirectoryListing = Dict[str, Tuple[int, List[str], List[str]]]
+
+class FileIndexer:
+    """目录索引器：用os.scandir遍历目录，列出txt文件及扫描阶段需要的大小和修改时间
+    
+    遍历顺序与os.walk相同（先列出目录中的文件，再依次进入子目录），不进入指向目录的符号链接。
+    给出上次保存的目录清单时，修改时间没有变化的目录不再列目录，直接使用清单中的文件名和子目录名；
+    在目录中新增、删除或重命名文件会改变目录的修改时间，而修改文件内容不会，所以文件的大小和
+    修改时间总是重新读取。
+    """
+    
+    def __init__(self, root: str, extensions: Iterable[str] = ('.txt',), exclude_patterns: Iterable[str] = (),
+                 max_depth: Optional[int] = None, listing: DirectoryListing = None):
+        """
+        Args:
+            root: 根目录
+            extensions: 要列出的文件扩展名（小写）
+            exclude_patterns: 排除的glob模式，与相对路径（以/分隔）或文件名、目录名匹配时跳过，
+                目录被排除时不再进入
+            max_depth: 最大深度，0表示只列出根目录中的文件，None表示不限
+            listing: 上次保存的目录清单，为None时不使用
+        """
+        self.root = root
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.exclude_patterns = [pattern.replace('\\', '/') for pattern in exclude_patterns if pattern]
+        self.max_depth = max_depth
+        self.old_listing = listing or {}
+        self.listing: DirectoryListing = {}  # 本次遍历得到的目录清单，可保存供下次使用
+        self.reused_directories = 0  # 使用清单而没有重新列出的目录数
+    
+    def is_excluded(self, rel_path: str, name: str) -> bool:
+        """相对路径或名称是否与排除模式匹配"""
+        return any(fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern)
+                   for pattern in self.exclude_patterns)
+    
+    def scan(self) -> List[FileEntry]:
+        """
+        遍历目录
+        
+        Returns:
+            List[FileEntry]: 文件列表（无法读取大小的文件不包括在内）
+        """
+        entries = []
+        self.listing = {}
+        self.reused_directories = 0
+        self._scan_directory(self.root, '.', 0, entries)
+        return entries
+    
+    def _scan_directory(self, directory: str, rel_directory: str, depth: int, entries: List[FileEntry]):
+        """遍历一个目录，文件追加到entries，再依次遍历子目录"""
+        try:
+            directory_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        
+        cached = self.old_listing.get(rel_directory)
+        if cached and cached[0] == directory_mtime:
+            # 目录没有变化：使用清单中的名称，只重新读取文件的大小和修改时间
+            self.reused_directories += 1
+            _, file_names, dir_names = cached
+            for name in file_names:
+                self._add_file(os.path.join(directory, name), rel_directory, name, None, entries)
+        else:
+            file_names, dir_names = [], []
+            try:
+                with os.scandir(directory) as iterator:
+                    for entry in iterator:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            continue
+                        if is_dir:
+                            # 与os.walk一样不进入指向目录的符号链接
+                            if not entry.is_symlink():
+                                dir_names.append(entry.name)
+                        elif entry.name.lower().endswith(self.extensions):
+                            file_names.append(entry.name)
+                            self._add_file(entry.path, rel_directory, entry.name, entry, entries)
+            except OSError:
+                return
+        
+        self.listing[rel_directory] = (directory_mtime, file_names, dir_names)
+        
+        if self.max_depth is not None and depth >= self.max_depth:
+            return
+        for name in dir_names:
+            rel_path = name if rel_directory == '.' else f'{rel_directory}/{name}'
+            if not self.is_excluded(rel_path, name):
+                self._scan_directory(os.path.join(directory, name), rel_path, depth + 1, entries)
+    
+    def _add_file(self, path: str, rel_directory: str, name: str, entry: Optional[os.DirEntry],
+                  entries: List[FileEntry]):
+        """读取文件的大小和修改时间并加入列表，DirEntry的stat结果由os.scandir缓存"""
+        rel_path = name if rel_directory == '.' else f'{rel_directory}/{name}'
+        if self.is_excluded(rel_path, name):
+            return
+        try:
+            stat = entry.stat() if entry is not None else os.stat(path)
+        except OSError:
+            return
+        entries.append(FileEntry(path, stat.st_size, stat.st_mtime_ns))
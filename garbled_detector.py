@@ -0,0 +1,174 @@
+import codecs
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+from instrumentation import metrics
+
+# 流式检测时每次读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+# 统计评分只看文件开头的这么多个字符（每个字符最多4字节，CHUNK_SIZE的第一块解码后就够）
+SAMPLE_CHARS = 16000
+
+# 样本太短时比例不可靠，不评分
+MIN_SAMPLE_CHARS = 32
+
+# 默认的乱码字符比例阈值（加权后的可疑字符数 / 样本字符数），0表示不做统计评分
+DEFAULT_GARBLED_THRESHOLD = 0.05
+
+# 统计评分命中时显示的标签
+GARBLED_SCORE_LABEL = "乱码字符比例过高"
+
+# 可疑字符的类别：(类别名, 权重, 码位范围)。正常的中文文本中很少出现这些字符，
+# 编码错误（乱码）的文本中则大量出现
+SUSPICIOUS_CLASSES = (
+    ('replacement', 1.0, (('\ufffd', '\ufffd'),)),  # 解码失败的替换字符
+    ('control', 1.0, (('\x00', '\x08'), ('\x0b', '\x0c'), ('\x0e', '\x1f'), ('\x7f', '\x9f'))),  # 控制字符（制表符和换行符除外）
+    ('box_drawing', 1.0, (('\u2500', '\u257f'),)),  # 制表符号，GBK按其他编码解读时常见
+    ('halfwidth_katakana', 1.0, (('\uff61', '\uff9f'),)),  # 半角片假名，Shift-JIS乱码常见
+    ('private_use', 1.0, (('\ue000', '\uf8ff'),)),  # 私用区字符
+    ('rare_cjk', 0.5, (('\u3400', '\u4dbf'), ('\uf900', '\ufaff'))),  # 扩展A区和兼容区汉字
+    ('latin1_letters', 0.5, (('\u00c0', '\u00ff'),)),  # 带重音的拉丁字母，UTF-8按Latin-1解读时常见
+)
+
+# find_in_file的返回值：文件无法读取或无法按给定的编码解码
+READ_FAILED = -1
+
+# 全部可疑字符合并成的字符集，一次扫描找出样本中的可疑字符
+_SUSPICIOUS_PATTERN = re.compile('[' + ''.join(
+    re.escape(low) if low == high else f'{re.escape(low)}-{re.escape(high)}'
+    for _, _, ranges in SUSPICIOUS_CLASSES for low, high in ranges
+) + ']')
+
+# 按起始码位排序的范围表，用于把找到的可疑字符归入类别
+_SUSPICIOUS_RANGES = sorted(
+    (ord(low), ord(high), name, weight)
+    for name, weight, ranges in SUSPICIOUS_CLASSES for low, high in ranges
+)
+_SUSPICIOUS_STARTS = [low for low, _, _, _ in _SUSPICIOUS_RANGES]
+
+def garbled_histogram(sample: str) -> Dict[str, int]:
+    """
+    统计样本中各类可疑字符的个数
+    
+    正则表达式在C层扫描一遍样本，Python中只处理找到的可疑字符（正常文本中很少）
+    
+    Args:
+        sample: 文本样本
+    
+    Returns:
+        Dict[str, int]: {类别名: 字符数}，只包含出现过的类别
+    """
+    histogram = {}
+    for char in _SUSPICIOUS_PATTERN.findall(sample):
+        _, _, name, _ = _SUSPICIOUS_RANGES[bisect_right(_SUSPICIOUS_STARTS, ord(char)) - 1]
+        histogram[name] = histogram.get(name, 0) + 1
+    return histogram
+
+def garbled_score(sample: str) -> Optional[float]:
+    """
+    计算样本的乱码评分：加权后的可疑字符数占样本字符数的比例
+    
+    Args:
+        sample: 文本样本（文件开头的SAMPLE_CHARS个字符）
+    
+    Returns:
+        Optional[float]: 乱码评分，样本太短时返回None
+    """
+    if len(sample) < MIN_SAMPLE_CHARS:
+        return None
+    weights = {name: weight for name, weight, _ in SUSPICIOUS_CLASSES}
+    histogram = garbled_histogram(sample)
+    return sum(weights[name] * count for name, count in histogram.items()) / len(sample)
+
+class GarbledDetector:
+    """乱码检测器：先查找乱码关键词，没有关键词时再按可疑字符的比例评分
+    
+    所有关键词合并为一个正则表达式，一次扫描就能找到最靠前的命中。
+    检测文件时按块读取并增量解码，找到关键词即停止；相邻两块之间保留
+    最长关键词长度减一个字符的重叠，跨块的关键词也能找到。
+    统计评分只使用文件开头的SAMPLE_CHARS个字符，文件和文本两种检测方式的结果相同。
+    """
+    
+    def __init__(self, garbled_keywords: List[str], threshold: float = DEFAULT_GARBLED_THRESHOLD):
+        self.garbled_keywords = list(garbled_keywords)
+        self.threshold = threshold
+        # 统计评分命中时的关键词编号，指向关键词表末尾的GARBLED_SCORE_LABEL
+        self.score_id = len(self.garbled_keywords)
+        
+        # 关键词到编号的映射，重复的关键词使用第一次出现的编号
+        self.keyword_ids = {}
+        for keyword_id, keyword in enumerate(self.garbled_keywords):
+            if keyword:
+                self.keyword_ids.setdefault(keyword, keyword_id)
+        
+        self.overlap = max((len(keyword) for keyword in self.keyword_ids), default=1) - 1
+        self.pattern = None
+        if self.keyword_ids:
+            self.pattern = re.compile('|'.join(re.escape(keyword) for keyword in self.keyword_ids))
+    
+    def is_garbled_sample(self, sample: str) -> bool:
+        """样本的乱码评分是否达到阈值"""
+        if self.threshold <= 0:
+            return False
+        score = garbled_score(sample[:SAMPLE_CHARS])
+        return score is not None and score >= self.threshold
+    
+    def find_in_text(self, text: str) -> Optional[int]:
+        """
+        在已读取的文本中查找乱码关键词，没有关键词时按统计评分判断
+        
+        Args:
+            text: 文件内容
+        
+        Returns:
+            Optional[int]: 最靠前的命中关键词的编号，评分达到阈值时为score_id，都没有命中时返回None
+        """
+        if self.pattern is not None:
+            match = self.pattern.search(text)
+            if match:
+                return self.keyword_ids[match.group()]
+        return self.score_id if self.is_garbled_sample(text[:SAMPLE_CHARS]) else None
+    
+    def find_in_file(self, file_path: str, encoding: str = 'utf-8') -> Optional[int]:
+        """
+        按块读取文件并查找乱码关键词，找到第一个即停止
+        
+        Args:
+            file_path: 文件路径
+            encoding: 文件编码
+        
+        Returns:
+            Optional[int]: 与find_in_text相同，
+            返回READ_FAILED表示文件无法读取或无法按该编码解码，由调用方读取整个文件后再检测
+        """
+        decoder = codecs.getincrementaldecoder(encoding)()
+        tail = ""
+        sample = ""
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    metrics.count('bytes_read', len(chunk))
+                    # 增量解码器会保留块末尾不完整的多字节字符，与下一块拼接后再解码
+                    decoded = decoder.decode(chunk, final=not chunk)
+                    if len(sample) < SAMPLE_CHARS:
+                        # 文件开头的SAMPLE_CHARS个字符是评分用的样本（通常第一块就够）
+                        sample += decoded[:SAMPLE_CHARS - len(sample)]
+                    text = tail + decoded
+                    if self.pattern is not None:
+                        match = self.pattern.search(text)
+                        # 从匹配位置或更靠前开始的其他关键词可能延续到下一块：匹配位置离块尾不超过overlap个字符时，
+                        # 读入下一块后再确定最靠前的命中（重叠部分包含该位置）
+                        if match and (not chunk or match.start() + self.overlap < len(text)):
+                            return self.keyword_ids[match.group()]
+                    elif not chunk or len(sample) >= SAMPLE_CHARS:
+                        # 没有关键词时只需要读到样本足够为止
+                        break
+                    if not chunk:
+                        break
+                    tail = text[-self.overlap:] if self.overlap else ""
+        except (OSError, UnicodeDecodeError):
+            return READ_FAILED
+        
+        return self.score_id if self.is_garbled_sample(sample) else None
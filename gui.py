@@ -3,7 +3,21 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 from typing import Dict, List, Callable
 import threading
 import subprocess
+import queue
+import time
 import os
+from batch_writer import BatchSummary
+from file_analyzer import ANALYSIS_MODES
+from instrumentation import metrics
+from result_store import ResultStore
+from scan_progress import ScanProgress
+from undo_journal import MAX_UNDO_BATCHES
+
+# 结果列表每页显示的行数，只有当前页的行会创建为Treeview行
+PAGE_SIZE = 500
+
+# 删除结果提示中最多列出的失败文件数
+MAX_REPORTED_FAILURES = 10
 
 class ParagraphDetailWindow:
     """段落详情窗口，用于显示段落的完整内容"""
@@ -48,12 +62,24 @@ class MainGUI:
         self.root.resizable(True, True)
         
         # 数据存储
-        self.current_data = {}  # 当前显示的数据 {文件名: [段落列表]}
-        self.selected_items = {}  # 用户选择的项目 {文件名: [段落列表]}
+        self.result_store = ResultStore("keyword")  # 当前显示的结果
+        self.current_page = 0  # 当前显示的页码
+        self.selected_items = {}  # 用户选择的项目 {文件名: [(起始位置, 结束位置, 段落校验和)]}
+        self.result_stores = {}  # 各功能的分析结果 {功能: ResultStore}
+        self.analysis_directory = ""  # 分析结果对应的目录
+        self.group_duplicates = False  # 本次分析是否合并显示内容相同的文件
         self.processor = None  # 文本处理器
+        self.analysis_mode = ""  # 流式分析时正在显示的功能
+        self.analysis_queue = None  # 分析线程产出的结果队列
+        self.busy_thread = None  # 正在进行的分析、删除或撤销线程，三者都使用处理器的状态，同一时间只能进行一个
+        self.busy_action = ""  # busy_thread正在进行的操作（分析、删除、撤销）
+        self.cancel_event = None  # 取消分析的事件
+        self.scan_progress = ScanProgress()  # 扫描进度
         self.callback_functions = {}  # 回调函数
         
         self.setup_ui()
+        # 关闭窗口时取消分析并关闭进程池，不等待已排队的文件块
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def setup_ui(self):
         """设置用户界面"""
@@ -70,6 +96,9 @@ class MainGUI:
         # 信息展示区域
         self.setup_info_display(main_frame)
         
+        # 分析进度区域
+        self.setup_progress_display(main_frame)
+        
         # 操作按钮区域
         self.setup_action_buttons(main_frame)
     
@@ -124,6 +153,22 @@ class MainGUI:
             command=self.on_function_change
         ).pack(anchor=tk.W)
         
+        # 合并分析：一次扫描得到全部功能的结果，切换功能时无需重新扫描
+        self.analyze_all_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            func_frame, 
+            text="一次分析全部功能（切换功能时直接显示结果）", 
+            variable=self.analyze_all_var
+        ).pack(anchor=tk.W, pady=(5, 0))
+        
+        # 合并重复文件：内容相同的文件只显示一个，选择和删除对全部副本生效
+        self.group_duplicates_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            func_frame, 
+            text="合并显示内容相同的文件（删除时同时处理全部副本）", 
+            variable=self.group_duplicates_var
+        ).pack(anchor=tk.W)
+        
         # 关键词显示区域
         self.keywords_frame = ttk.LabelFrame(func_frame, text="目标删除关键词", padding=5)
         self.keywords_frame.pack(fill=tk.X, pady=(10, 0))
@@ -177,6 +222,16 @@ class MainGUI:
         # 绑定事件
         self.tree.bind("<Double-1>", self.on_item_double_click)
         self.tree.bind("<Button-1>", self.on_item_click)
+        self.tree.bind("<Button-3>", self.on_item_right_click)
+        
+        # 右键菜单：按文件或按关键词批量选择
+        self.menu_index = None  # 右键点击的结果编号
+        self.row_menu = tk.Menu(self.root, tearoff=0)
+        self.row_menu.add_command(label="选择该文件的全部结果", command=lambda: self.select_menu_file(True))
+        self.row_menu.add_command(label="取消该文件的全部结果", command=lambda: self.select_menu_file(False))
+        self.row_menu.add_separator()
+        self.row_menu.add_command(label="选择该关键词的全部结果", command=lambda: self.select_menu_keyword(True))
+        self.row_menu.add_command(label="取消该关键词的全部结果", command=lambda: self.select_menu_keyword(False))
         
         # 全选/取消全选按钮
         select_frame = ttk.Frame(info_frame)
@@ -193,6 +248,42 @@ class MainGUI:
             text="取消全选", 
             command=self.deselect_all
         ).pack(side=tk.LEFT)
+        
+        # 分页浏览：结果很多时只显示当前页
+        ttk.Button(
+            select_frame, 
+            text="下一页", 
+            command=self.next_page
+        ).pack(side=tk.RIGHT)
+        
+        self.page_text_var = tk.StringVar(value="")
+        ttk.Label(select_frame, textvariable=self.page_text_var).pack(side=tk.RIGHT, padx=(5, 5))
+        
+        ttk.Button(
+            select_frame, 
+            text="上一页", 
+            command=self.prev_page
+        ).pack(side=tk.RIGHT)
+    
+    def setup_progress_display(self, parent):
+        """设置分析进度区域"""
+        progress_frame = ttk.Frame(parent)
+        progress_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, maximum=100, mode="determinate")
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.progress_text_var = tk.StringVar(value="")
+        ttk.Label(progress_frame, textvariable=self.progress_text_var, width=45).pack(side=tk.LEFT, padx=(10, 10))
+        
+        # 取消按钮，只在分析进行中可用
+        self.cancel_button = ttk.Button(
+            progress_frame, 
+            text="取消分析", 
+            command=self.cancel_analysis, 
+            state=tk.DISABLED
+        )
+        self.cancel_button.pack(side=tk.RIGHT)
     
     def setup_action_buttons(self, parent):
         """设置操作按钮区域"""
@@ -211,13 +302,65 @@ class MainGUI:
             button_frame, 
             text="执行选中段落删除", 
             command=self.execute_deletion
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # 撤销删除：按撤销日志恢复最近几批删除
+        ttk.Button(
+            button_frame, 
+            text="撤销删除", 
+            command=self.undo_deletion
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        self.undo_count_var = tk.IntVar(value=1)
+        ttk.Spinbox(
+            button_frame, 
+            from_=1, 
+            to=MAX_UNDO_BATCHES, 
+            textvariable=self.undo_count_var, 
+            width=3
         ).pack(side=tk.LEFT)
+        ttk.Label(button_frame, text="批").pack(side=tk.LEFT, padx=(5, 0))
+        
+        # 并行扫描进程数，1表示不使用多进程
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        ttk.Spinbox(
+            button_frame, 
+            from_=1, 
+            to=max(os.cpu_count() or 1, 1) * 2, 
+            textvariable=self.workers_var, 
+            width=5
+        ).pack(side=tk.RIGHT)
+        ttk.Label(button_frame, text="并行进程数:").pack(side=tk.RIGHT, padx=(0, 5))
+        
+        # 增量扫描缓存：未变化的文件直接使用上次的分析结果
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            button_frame, 
+            text="使用增量缓存", 
+            variable=self.use_cache_var
+        ).pack(side=tk.RIGHT, padx=(0, 10))
+        
+        # 保存目录清单：下次分析时只重新列出有变化的目录（保存在增量缓存中）
+        self.persist_listing_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            button_frame, 
+            text="保存目录清单", 
+            variable=self.persist_listing_var
+        ).pack(side=tk.RIGHT, padx=(0, 10))
+        
+        # 性能统计：分析结束后显示各阶段耗时和最慢的文件
+        self.instrument_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            button_frame, 
+            text="性能统计", 
+            variable=self.instrument_var
+        ).pack(side=tk.RIGHT, padx=(0, 10))
     
     def select_files_directory(self):
         """选择待处理文件目录"""
         directory = filedialog.askdirectory(title="选择待处理文件目录")
         if directory:
             self.file_path_var.set(directory)
+            self.result_stores = {}
     
     def on_function_change(self):
         """功能选择改变时的处理"""
@@ -229,6 +372,12 @@ class MainGUI:
             self.update_keywords_display()
         elif self.function_var.get() == "garbled":
             self.update_garbled_keywords_display()
+        
+        # 已有合并分析结果时直接显示，不重新扫描（分析进行中时，后续结果也会继续追加显示）
+        mode = self.function_var.get()
+        self.analysis_mode = mode
+        if self.analysis_directory == self.file_path_var.get() and mode in self.result_stores:
+            self.update_display(self.result_stores[mode], notify=False)
     
     def update_keywords_display(self):
         """更新关键词显示"""
@@ -266,11 +415,36 @@ class MainGUI:
         """清空显示区域"""
         for item in self.tree.get_children():
             self.tree.delete(item)
-        self.current_data = {}
+        self.result_store = ResultStore(self.function_var.get())
+        self.current_page = 0
         self.selected_items = {}
+        self.update_page_label()
+    
+    def check_busy(self) -> bool:
+        """有分析、删除或撤销正在进行时提示并返回True"""
+        if self.busy_thread is None:
+            return False
+        hint = "或先取消" if self.busy_action == "分析" else ""
+        messagebox.showwarning("提示", f"{self.busy_action}正在进行中，请等待完成{hint}")
+        return True
+    
+    def start_busy(self, action: str, target):
+        """在后台线程中开始一个操作，操作结束后必须在主线程中调用end_busy"""
+        self.busy_action = action
+        self.busy_thread = threading.Thread(target=target, daemon=True)
+        self.busy_thread.start()
+    
+    def end_busy(self):
+        """后台操作结束（在主线程中调用，之后才能开始下一个操作）"""
+        self.busy_thread = None
+        self.busy_action = ""
     
     def analyze_files(self):
         """分析文件"""
+        # 后台线程正在使用处理器的目录、文件签名等状态，必须在修改任何状态之前检查
+        if self.check_busy():
+            return
+        
         if not self.file_path_var.get():
             messagebox.showerror("错误", "请选择待处理文件目录")
             return
@@ -281,69 +455,180 @@ class MainGUI:
             self.processor = TextProcessor()
         
         self.processor.set_files_directory(self.file_path_var.get())
+        try:
+            self.processor.set_parallel_options(self.workers_var.get())
+        except (tk.TclError, ValueError):
+            self.processor.set_parallel_options(1)
+        self.processor.use_scan_cache = self.use_cache_var.get()
+        self.processor.persist_listing = self.persist_listing_var.get()
+        metrics.enable(self.instrument_var.get())
+        metrics.reset()
+        
+        # 合并分析时一次得到全部功能的结果，否则只分析当前功能
+        modes = ANALYSIS_MODES if self.analyze_all_var.get() else (self.function_var.get(),)
         
-        # 在新线程中执行分析
+        self.clear_display()
+        self.analysis_mode = self.function_var.get()
+        self.result_stores = {mode: ResultStore(mode) for mode in modes}
+        self.result_store = self.result_stores[self.analysis_mode]
+        self.analysis_directory = self.processor.files_directory
+        self.group_duplicates = self.group_duplicates_var.get()
+        self.analysis_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.scan_progress = ScanProgress()
+        self.cancel_button.config(state=tk.NORMAL)
+        
+        # 在新线程中执行分析，每分析完一个有命中的文件就放入队列，由主线程分批取出显示
         def analyze_thread():
             try:
-                if self.function_var.get() == "keyword":
-                    data = self.processor.find_keyword_paragraphs()
-                elif self.function_var.get() == "english":
-                    data = self.processor.find_english_paragraphs()
-                elif self.function_var.get() == "garbled":
-                    data = self.processor.find_garbled_files()
-                
-                # 在主线程中更新UI
-                self.root.after(0, lambda: self.update_display(data))
-                
+                for filename, file_result in self.processor.iter_analysis(modes, self.cancel_event, self.scan_progress):
+                    self.analysis_queue.put(("result", filename, file_result))
+                self.analysis_queue.put(("done", None, None))
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("错误", f"分析文件时出错: {e}"))
+                self.analysis_queue.put(("error", e, None))
         
-        threading.Thread(target=analyze_thread, daemon=True).start()
+        self.start_busy("分析", analyze_thread)
+        self.root.after(50, self.poll_analysis_queue)
     
-    def update_display(self, data: Dict[str, List]):
-        """更新显示区域"""
-        self.clear_display()
-        self.current_data = data
+    def poll_analysis_queue(self):
+        """定时从结果队列中取出一批结果追加到显示区域，并刷新进度"""
+        finished = False
+        error = None
+        batch_start = time.monotonic()
+        
+        try:
+            # 每批最多占用主线程50毫秒，保证界面响应
+            while time.monotonic() - batch_start < 0.05:
+                kind, value, file_result = self.analysis_queue.get_nowait()
+                if kind == "result":
+                    group = self.processor.duplicate_groups.get(value) if self.group_duplicates else None
+                    for mode, items in file_result.items():
+                        store = self.result_stores.get(mode)
+                        if store is None or (group and store.add_copy(group, value)):
+                            continue
+                        first_new = len(store)
+                        store.add_file(value, items, self.processor.result_labels.get(mode, []))
+                        if store is self.result_store:
+                            self.append_display_rows(first_new)
+                else:
+                    finished = True
+                    error = value if kind == "error" else None
+                    break
+        except queue.Empty:
+            pass
         
-        if not data:
-            messagebox.showinfo("提示", "没有找到符合条件的段落")
+        self.update_progress_display()
+        
+        if finished:
+            self.finish_analysis(error)
+        else:
+            self.root.after(50, self.poll_analysis_queue)
+    
+    def update_progress_display(self):
+        """刷新进度条和速度"""
+        progress = self.scan_progress
+        self.progress_bar["value"] = progress.percent
+        if progress.indexing:
+            self.progress_text_var.set("正在遍历目录...")
             return
+        self.progress_text_var.set(
+            f"{progress.done_files}/{progress.total_files} 个文件  "
+            f"{progress.files_per_second:.0f} 文件/秒  {progress.mb_per_second:.1f} MB/秒"
+        )
+    
+    def finish_analysis(self, error: Exception = None):
+        """分析结束（完成、取消或出错）后的处理"""
+        self.end_busy()
+        self.cancel_button.config(state=tk.DISABLED)
         
-        # 填充数据
-        for filename, items in data.items():
-            # 构建完整文件路径
-            full_file_path = os.path.join(self.file_path_var.get(), filename)
-            
-            for item in items:
-                if isinstance(item, tuple):
-                    # 关键词匹配模式或乱码检测模式：item是(paragraph, keyword)元组
-                    paragraph, keyword = item
-                    if self.function_var.get() == "garbled":
-                        # 乱码检测模式：显示文件内容的前100个字符
-                        display_text = paragraph[:100] + "..." if len(paragraph) > 100 else paragraph
-                        item_values = ("✓", filename, keyword, display_text)
-                    else:
-                        # 关键词匹配模式：显示段落内容的前100个字符
-                        display_text = paragraph[:100] + "..." if len(paragraph) > 100 else paragraph
-                        item_values = ("✓", filename, keyword, display_text)
-                else:
-                    # 英文检测模式：item是paragraph字符串
-                    paragraph = item
-                    display_text = paragraph[:100] + "..." if len(paragraph) > 100 else paragraph
-                    item_values = ("✓", filename, "英文段落", display_text)
-                
-                tree_item = self.tree.insert("", tk.END, values=item_values)
-                
-                # 使用tags存储完整内容用于双击查看，以及完整文件路径
-                self.tree.item(tree_item, tags=(paragraph, full_file_path))
+        if error is not None:
+            messagebox.showerror("错误", f"分析文件时出错: {error}")
+            return
+        
+        if self.cancel_event.is_set():
+            messagebox.showinfo("提示", f"分析已取消，已显示 {len(self.result_store.filenames)} 个文件的部分结果")
+        else:
+            self.notify_analysis_result(self.result_store)
         
-        # 默认全选
-        self.select_all()
+        if metrics.enabled:
+            ParagraphDetailWindow(self.root, "性能统计", metrics.format_report())
+    
+    def cancel_analysis(self):
+        """取消正在进行的分析"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.progress_text_var.set("正在取消...")
+    
+    def update_display(self, store: ResultStore, notify: bool = True):
+        """显示一份分析结果，从第一页开始"""
+        self.result_store = store
+        self.current_page = 0
+        self.show_page()
+        
+        if notify:
+            self.notify_analysis_result(store)
+    
+    def show_page(self):
+        """重新创建当前页的行，其他页的结果只保存在ResultStore中"""
+        with metrics.stage('display'):
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            
+            first = self.current_page * PAGE_SIZE
+            indices = range(first, min(first + PAGE_SIZE, len(self.result_store)))
+            self.result_store.load_previews(indices, self.analysis_directory)
+            for index in indices:
+                self.insert_row(index)
         
-        if self.function_var.get() == "garbled":
-            messagebox.showinfo("完成", f"分析完成，找到 {len(data)} 个包含乱码关键词的文件")
+        self.update_page_label()
+    
+    def append_display_rows(self, first_new: int):
+        """流式分析时新增了结果：只把落在当前页的新行创建出来"""
+        first = self.current_page * PAGE_SIZE
+        last = min(first + PAGE_SIZE, len(self.result_store))
+        indices = range(max(first, first_new), last)
+        with metrics.stage('display'):
+            self.result_store.load_previews(indices, self.analysis_directory)
+            for index in indices:
+                self.insert_row(index)
+        
+        self.update_page_label()
+    
+    def insert_row(self, index: int):
+        """创建一条结果对应的行，行ID就是结果编号"""
+        filename, keyword, display_text = self.result_store.get_row(index)
+        check = "✓" if self.result_store.selection.is_selected(index) else ""
+        self.tree.insert("", tk.END, iid=str(index), values=(check, filename, keyword, display_text))
+    
+    def update_page_label(self):
+        """刷新页码显示"""
+        total = len(self.result_store)
+        page_count = max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        selected = self.result_store.selection.selected_count
+        self.page_text_var.set(f"第 {self.current_page + 1}/{page_count} 页，共 {total} 条，已选 {selected} 条")
+    
+    def prev_page(self):
+        """上一页"""
+        if self.current_page > 0:
+            self.current_page -= 1
+            self.show_page()
+    
+    def next_page(self):
+        """下一页"""
+        if (self.current_page + 1) * PAGE_SIZE < len(self.result_store):
+            self.current_page += 1
+            self.show_page()
+    
+    def notify_analysis_result(self, store: ResultStore):
+        """提示分析结果"""
+        file_count = len(store.filenames)
+        copies = f"（另有 {store.copy_count} 个内容相同的副本已合并显示）" if store.copy_count else ""
+        if not file_count:
+            messagebox.showinfo("提示", "没有找到符合条件的段落")
+        elif self.function_var.get() == "garbled":
+            messagebox.showinfo("完成", f"分析完成，找到 {file_count} 个包含乱码关键词的文件{copies}")
         else:
-            messagebox.showinfo("完成", f"分析完成，找到 {len(data)} 个文件包含符合条件的段落")
+            messagebox.showinfo("完成", f"分析完成，找到 {file_count} 个文件包含符合条件的段落{copies}")
     
     def on_item_click(self, event):
         """单击项目时的处理 - 切换选择状态"""
@@ -352,25 +637,43 @@ class MainGUI:
             column = self.tree.identify_column(event.x)
             # 只在点击选择列时切换状态
             if column == "#1":  # 选择列
-                current_value = self.tree.item(item, "values")[0]
-                new_value = "" if current_value == "✓" else "✓"
-                self.tree.set(item, "选择", new_value)
-                self.update_selected_items()
+                selected = self.result_store.selection.toggle(int(item))
+                self.tree.set(item, "选择", "✓" if selected else "")
+                self.update_page_label()
+    
+    def on_item_right_click(self, event):
+        """右键单击项目时弹出批量选择菜单"""
+        item = self.tree.identify_row(event.y)
+        if item:
+            self.menu_index = int(item)
+            self.row_menu.tk_popup(event.x_root, event.y_root)
+    
+    def select_menu_file(self, selected: bool):
+        """选择或取消右键点击的结果所在文件的全部结果"""
+        if self.menu_index is not None:
+            self.result_store.selection.set_file(self.result_store.get_file_id(self.menu_index), selected)
+            self.refresh_check_column()
+    
+    def select_menu_keyword(self, selected: bool):
+        """选择或取消与右键点击的结果命中相同关键词的全部结果"""
+        if self.menu_index is not None:
+            _, label, _ = self.result_store.get_row(self.menu_index)
+            for keyword in label.split():
+                self.result_store.selection.set_indices(self.result_store.get_keyword_indices(keyword), selected)
+            self.refresh_check_column()
     
     def on_item_double_click(self, event):
         """双击项目时的处理"""
         item = self.tree.identify_row(event.y)
         if item:
             column = self.tree.identify_column(event.x)
-            filename = self.tree.item(item, "values")[1]  # 文件名列现在是第2列
-            tags = self.tree.item(item, "tags")
-            paragraph_full = tags[0] if tags else ""
-            full_file_path = tags[1] if len(tags) > 1 else ""  # 完整文件路径
+            index = int(item)
+            filename = self.result_store.get_filename(index)
+            full_file_path = os.path.join(self.analysis_directory, filename)  # 完整文件路径
             
             # 检查是否双击了文件名列（第2列）
             if column == "#2":  # 文件名列
-                # 使用存储的完整文件路径
-                if full_file_path and os.path.exists(full_file_path):
+                if os.path.exists(full_file_path):
                     try:
                         # 使用系统默认程序打开文件（记事本）
                         subprocess.Popen(['notepad.exe', full_file_path])
@@ -379,9 +682,10 @@ class MainGUI:
                 else:
                     messagebox.showerror("错误", f"文件不存在: {full_file_path}")
             else:
-                # 其他列的双击行为保持不变
+                # 其他列的双击行为保持不变，完整内容此时才从文件中读取
+                paragraph_full = self.result_store.load_text(index, self.analysis_directory)
                 if paragraph_full:
-                    if self.function_var.get() == "garbled":
+                    if self.result_store.mode == "garbled":
                         # 乱码检测模式：显示整个文件内容
                         ParagraphDetailWindow(
                             self.root, 
@@ -398,74 +702,167 @@ class MainGUI:
     
     def select_all(self):
         """全选"""
-        for item in self.tree.get_children():
-            self.tree.set(item, "选择", "✓")
-        self.update_selected_items()
+        self.result_store.selection.set_all(True)
+        self.refresh_check_column()
     
     def deselect_all(self):
         """取消全选"""
-        for item in self.tree.get_children():
-            self.tree.set(item, "选择", "")
-        self.update_selected_items()
+        self.result_store.selection.set_all(False)
+        self.refresh_check_column()
     
-    def update_selected_items(self):
-        """更新选中的项目"""
-        self.selected_items = {}
-        
+    def refresh_check_column(self):
+        """批量修改选择状态后，只刷新当前页各行的勾选列"""
+        selection = self.result_store.selection
         for item in self.tree.get_children():
-            values = self.tree.item(item, "values")
-            if values[0] == "✓":  # 被选中
-                filename = values[1]  # 文件名列现在是第2列
-                tags = self.tree.item(item, "tags")
-                paragraph_full = tags[0] if tags else ""
-                
-                if filename not in self.selected_items:
-                    self.selected_items[filename] = []
-                
-                if paragraph_full:
-                    self.selected_items[filename].append(paragraph_full)
+            self.tree.set(item, "选择", "✓" if selection.is_selected(int(item)) else "")
+        self.update_page_label()
     
     def execute_deletion(self):
         """执行删除操作"""
+        if self.check_busy():
+            return
+        
+        # 只在执行删除时才把选择状态整理成按文件分组的删除列表
+        self.selected_items = self.result_store.get_selected_items()
         if not self.selected_items:
             messagebox.showwarning("警告", "没有选择要删除的段落")
             return
+        # 删除的模式与选择所在的结果一致，在主线程中取出，后台线程不访问Tk变量
+        mode = self.result_store.mode
+        selected_items = self.selected_items
         
         # 确认删除
-        if self.function_var.get() == "garbled":
+        if mode == "garbled":
             result = messagebox.askyesno(
                 "确认删除", 
-                f"确定要删除选中的 {len(self.selected_items)} 个文件吗？\n此操作不可撤销！"
+                f"确定要删除选中的 {len(self.selected_items)} 个文件吗？\n删除后可以用“撤销删除”恢复。"
             )
         else:
             result = messagebox.askyesno(
                 "确认删除", 
-                f"确定要删除选中的 {len(self.selected_items)} 个文件中的段落吗？\n此操作不可撤销！"
+                f"确定要删除选中的 {len(self.selected_items)} 个文件中的段落吗？\n删除后可以用“撤销删除”恢复。"
             )
         
         if not result:
             return
         
+        # 目录没有切换时只需重新分析被改写的文件，否则重新完整分析
+        incremental = self.analysis_directory == self.file_path_var.get()
+        
         # 在新线程中执行删除
         def delete_thread():
             try:
-                if self.function_var.get() == "keyword":
-                    success = self.processor.process_keyword_deletion(self.selected_items)
-                elif self.function_var.get() == "english":
-                    success = self.processor.process_english_deletion(self.selected_items)
-                elif self.function_var.get() == "garbled":
-                    success = self.processor.process_garbled_deletion(self.selected_items)
+                summary = self.processor.apply_deletion(mode, selected_items)
+                self.root.after(0, lambda: self.notify_deletion_result(summary))
                 
-                if success:
-                    self.root.after(0, lambda: messagebox.showinfo("完成", "删除操作完成"))
-                    self.root.after(0, self.analyze_files)  # 重新分析
-                else:
-                    self.root.after(0, lambda: messagebox.showerror("错误", "删除操作失败"))
+                # 部分文件处理失败时其余文件也已改写，同样需要刷新结果
+                updates = self.processor.reanalyze_files(selected_items) if incremental else None
+                self.root.after(0, lambda: self.apply_deletion_updates(updates))
                     
             except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("错误", f"删除时出错: {e}"))
+                self.root.after(0, lambda: self.report_busy_error("删除", e))
+        
+        self.start_busy("删除", delete_thread)
+    
+    def undo_deletion(self):
+        """撤销最近几批删除，恢复后只重新分析恢复的文件"""
+        if self.check_busy():
+            return
+        if not self.processor or not self.processor.files_directory:
+            messagebox.showwarning("警告", "请先分析文件")
+            return
+        try:
+            count = self.undo_count_var.get()
+        except (tk.TclError, ValueError):
+            count = 1
+        
+        if not messagebox.askyesno("确认撤销", f"确定要撤销最近 {count} 批删除吗？"):
+            return
+        
+        incremental = self.analysis_directory == self.processor.files_directory
+        
+        def undo_thread():
+            try:
+                summary = self.processor.undo_deletions(count)
+                self.root.after(0, lambda: self.notify_undo_result(summary))
+                
+                restored = [outcome.filename for outcome in summary.succeeded]
+                updates = self.processor.reanalyze_files(restored) if incremental else None
+                self.root.after(0, lambda: self.apply_deletion_updates(updates))
+            except Exception as e:
+                self.root.after(0, lambda: self.report_busy_error("撤销", e))
+        
+        self.start_busy("撤销", undo_thread)
+    
+    def report_busy_error(self, action: str, error: Exception):
+        """删除或撤销线程出错后结束操作并提示"""
+        self.end_busy()
+        messagebox.showerror("错误", f"{action}时出错: {error}")
+    
+    def notify_undo_result(self, summary: BatchSummary):
+        """提示撤销结果，列出恢复失败的文件及原因"""
+        if not len(summary):
+            messagebox.showinfo("提示", "没有可以撤销的删除")
+        elif summary.ok:
+            messagebox.showinfo("完成", f"撤销完成，共恢复 {len(summary)} 个文件")
+        else:
+            self.show_failures(summary, "恢复")
+    
+    def show_failures(self, summary: BatchSummary, action: str):
+        """列出处理失败的文件及原因"""
+        failed = summary.failed
+        lines = [f"{outcome.filename}: {outcome.message}" for outcome in failed[:MAX_REPORTED_FAILURES]]
+        if len(failed) > MAX_REPORTED_FAILURES:
+            lines.append(f"……另有 {len(failed) - MAX_REPORTED_FAILURES} 个文件")
+        messagebox.showerror(
+            "错误",
+            f"{len(summary.succeeded)} 个文件{action}成功，{len(failed)} 个文件{action}失败：\n" + "\n".join(lines)
+        )
+    
+    def notify_deletion_result(self, summary: BatchSummary):
+        """提示删除结果，列出处理失败的文件及原因"""
+        if summary.ok:
+            messagebox.showinfo("完成", f"删除操作完成，共处理 {len(summary)} 个文件")
+        else:
+            self.show_failures(summary, "处理")
+    
+    def apply_deletion_updates(self, updates):
+        """
+        删除后刷新结果：用重新分析的结果替换被改写文件的命中项，其余结果不变
+        
+        Args:
+            updates: TextProcessor.reanalyze_files的结果，为None时（目录或配置已变化）重新完整分析
+        """
+        # 删除或撤销到这里才算结束，期间不能开始新的分析，结果不会替换到新分析的结果上
+        self.end_busy()
+        if updates is None:
+            self.analyze_files()
+            return
         
-        threading.Thread(target=delete_thread, daemon=True).start()
+        for mode, store in self.result_stores.items():
+            mode_results = {filename: file_result.get(mode, []) for filename, file_result in updates.items()}
+            self.result_stores[mode] = store.replace_files(mode_results, self.processor.result_labels.get(mode, []))
+        
+        self.selected_items = {}
+        store = self.result_stores.get(self.function_var.get())
+        if store is None:
+            return
+        self.result_store = store
+        # 删除后结果变少，当前页可能已经超出范围
+        self.current_page = min(self.current_page, max((len(store) - 1) // PAGE_SIZE, 0))
+        self.show_page()
+    
+    def on_close(self):
+        """关闭窗口：取消正在进行的分析，关闭并行扫描的进程池后退出"""
+        if self.busy_action in ("删除", "撤销"):
+            # 删除和撤销逐个文件进行，中途退出会留下只处理了一部分的批次
+            messagebox.showwarning("提示", f"{self.busy_action}正在进行中，请等待完成后再关闭")
+            return
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        if self.processor:
+            self.processor.close(wait=False)
+        self.root.destroy()
     
     def run(self):
         """运行GUI"""
@@ -0,0 +1,192 @@
+import cProfile
+import contextlib
+import heapq
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 报告中列出的最慢文件数
+SLOWEST_FILES = 10
+
+# 报告中各阶段和计数的显示名称
+STAGE_NAMES = {
+    'index': '遍历目录',
+    'dedup': '查找重复文件',
+    'cache': '读取缓存',
+    'read': '读取文件',
+    'decode': '解码',
+    'keyword': '关键词匹配',
+    'english': '英文检测',
+    'garbled': '乱码检测',
+    'display': '界面显示',
+}
+COUNTER_NAMES = {
+    'files_listed': '列出的文件',
+    'files_analyzed': '分析的文件',
+    'bytes_read': '读取的字节',
+    'paragraphs': '检查的段落',
+    'verdict_hits': '段落判定命中',
+    'verdict_misses': '段落判定未命中',
+    'duplicate_files': '跳过的重复文件',
+}
+
+class _NullTimer:
+    """关闭统计时stage()返回的空计时器，进入和退出都不做任何事"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _StageTimer:
+    """一个阶段的计时器，退出时把耗时累加到所属的统计中"""
+    
+    __slots__ = ('metrics', 'name', 'start')
+    
+    def __init__(self, metrics: 'Instrumentation', name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        metrics = self.metrics
+        metrics.stage_seconds[self.name] = metrics.stage_seconds.get(self.name, 0.0) + time.perf_counter() - self.start
+        metrics.stage_calls[self.name] = metrics.stage_calls.get(self.name, 0) + 1
+        return False
+
+class Instrumentation:
+    """热点路径的计时和计数
+    
+    各阶段（遍历目录、读取、解码、各检测器、界面显示）用stage()计时，数量用count()累加，
+    每个文件的分析耗时只保留最慢的几个。关闭时stage()返回共用的空计时器，count()直接返回，
+    调用方不需要额外判断。多进程扫描时工作进程各自统计每个文件块，用snapshot()随结果返回，
+    由主进程merge()合并，此时各阶段的耗时是所有进程的累计，可能超过总耗时。
+    """
+    
+    def __init__(self, slowest_count: int = SLOWEST_FILES):
+        self.enabled = False
+        self.slowest_count = slowest_count
+        self.reset()
+    
+    def reset(self):
+        """清空统计，开始新的一轮"""
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.slowest: List[Tuple[float, str]] = []  # 最慢文件的小顶堆 [(耗时, 文件路径)]
+        self.start_time = time.perf_counter()
+    
+    def enable(self, enabled: bool = True):
+        """开启或关闭统计"""
+        self.enabled = enabled
+    
+    def stage(self, name: str):
+        """返回一个阶段的计时器，用于with语句"""
+        return _StageTimer(self, name) if self.enabled else _NULL_TIMER
+    
+    def count(self, name: str, amount: int = 1):
+        """累加计数"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def record_file(self, file_path: str, seconds: float):
+        """记录一个文件的分析耗时，只保留最慢的slowest_count个"""
+        if not self.enabled:
+            return
+        if len(self.slowest) < self.slowest_count:
+            heapq.heappush(self.slowest, (seconds, file_path))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, file_path))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """当前统计的原始数据（可以在进程之间传递），用merge合并到另一份统计中"""
+        return {
+            'stage_seconds': dict(self.stage_seconds),
+            'stage_calls': dict(self.stage_calls),
+            'counters': dict(self.counters),
+            'slowest': list(self.slowest),
+        }
+    
+    def merge(self, snapshot: Dict[str, Any]):
+        """
+        合并另一份统计（例如工作进程中一个文件块的统计）
+        
+        Args:
+            snapshot: Instrumentation.snapshot()的结果
+        """
+        if not self.enabled:
+            return
+        for name, seconds in snapshot['stage_seconds'].items():
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        for name, calls in snapshot['stage_calls'].items():
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + calls
+        for name, value in snapshot['counters'].items():
+            self.count(name, value)
+        for seconds, file_path in snapshot['slowest']:
+            self.record_file(file_path, seconds)
+    
+    def summary(self) -> Dict:
+        """
+        本轮统计的汇总，可以直接输出为JSON
+        
+        Returns:
+            Dict: {'elapsed': 总耗时, 'stages': {阶段: {'seconds', 'calls'}}, 'counters': {计数名: 数量},
+            'slowest_files': [{'path', 'seconds'}]}
+        """
+        return {
+            'elapsed': round(time.perf_counter() - self.start_time, 4),
+            'stages': {
+                name: {'seconds': round(seconds, 4), 'calls': self.stage_calls[name]}
+                for name, seconds in sorted(self.stage_seconds.items(), key=lambda item: -item[1])
+            },
+            'counters': dict(self.counters),
+            'slowest_files': [
+                {'path': file_path, 'seconds': round(seconds, 4)}
+                for seconds, file_path in sorted(self.slowest, reverse=True)
+            ],
+        }
+    
+    def format_report(self) -> str:
+        """生成供界面显示的文字报告"""
+        summary = self.summary()
+        lines = [f"总耗时: {summary['elapsed']:.3f} 秒", "", "各阶段耗时:"]
+        for name, stage in summary['stages'].items():
+            lines.append(f"  {STAGE_NAMES.get(name, name):<12} {stage['seconds']:>9.3f} 秒  {stage['calls']:>8} 次")
+        lines.extend(["", "计数:"])
+        for name, value in summary['counters'].items():
+            lines.append(f"  {COUNTER_NAMES.get(name, name):<12} {value:>12}")
+        lines.extend(["", "最慢的文件:"])
+        for item in summary['slowest_files']:
+            lines.append(f"  {item['seconds']:>9.4f} 秒  {item['path']}")
+        return "\n".join(lines)
+
+# 进程内共用的统计，默认关闭
+metrics = Instrumentation()
+
+@contextlib.contextmanager
+def profile_to(output_path: Optional[str]) -> Iterator[None]:
+    """
+    用cProfile分析with语句中的代码，结束后把结果保存到output_path（可用pstats或snakeviz查看）
+    
+    Args:
+        output_path: 结果文件路径，为None时不做分析
+    """
+    if not output_path:
+        yield
+        return
+    
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_path)
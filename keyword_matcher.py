@@ -0,0 +1,121 @@
+import re
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+def unique_keywords(keywords: List[str]) -> List[str]:
+    """去掉空关键词和重复的关键词，保持配置文件中的顺序（关键词编号即在该列表中的位置）"""
+    return list(dict.fromkeys(keyword for keyword in keywords if keyword))
+
+class KeywordMatcher:
+    """多关键词匹配器，基于Aho-Corasick自动机，一次线性扫描即可找出文本中的全部关键词"""
+    
+    def __init__(self, keywords: List[str]):
+        # 去重并保持配置文件中的顺序（配置中可能有重复的关键词）
+        self.keywords = unique_keywords(keywords)
+        
+        # 自动机状态表：goto为状态转移，fail为失败指针，output为该状态命中的关键词索引
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        
+        self._build()
+        
+        # 关键词首字符组成的字符集：自动机处于根状态时，只有首字符能让它离开根状态，
+        # 用字符集在C层跳过其余字符。判断一个字符是否属于字符集的开销与关键词数无关
+        self._start_pattern = None
+        if self.keywords:
+            self._start_pattern = re.compile('[' + ''.join(sorted({re.escape(keyword[0]) for keyword in self.keywords})) + ']')
+    
+    def _build(self):
+        """构建自动机：先插入所有关键词形成字典树，再按层次遍历计算失败指针"""
+        goto, fail, output = self._goto, self._fail, self._output
+        
+        # 1. 构建字典树
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    fail.append(0)
+                    output.append(())
+                state = next_state
+            output[state] = output[state] + (index,)
+        
+        # 2. 按层次遍历计算失败指针，并合并失败状态的输出
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if output[fail[next_state]]:
+                    output[next_state] = output[next_state] + output[fail[next_state]]
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        扫描文本，逐个产出命中的关键词
+        
+        Args:
+            text: 要扫描的文本
+        
+        Returns:
+            Iterator[Tuple[int, int]]: (关键词在文本中的起始位置, 关键词索引)
+        """
+        if self._start_pattern is None:
+            return
+        
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        search = self._start_pattern.search
+        state = 0
+        position = 0
+        length = len(text)
+        
+        while position < length:
+            if not state:
+                # 根状态下直接跳到下一个关键词首字符，没有首字符时扫描结束
+                match = search(text, position)
+                if match is None:
+                    return
+                position = match.start()
+            
+            char = text[position]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for index in output[state]:
+                    yield position - len(keywords[index]) + 1, index
+            position += 1
+    
+    def find_keywords(self, text: str) -> List[str]:
+        """
+        查找文本中出现的全部关键词
+        
+        Args:
+            text: 要扫描的文本
+        
+        Returns:
+            List[str]: 命中的关键词列表（去重，按配置文件中的顺序排列）
+        """
+        return [self.keywords[index] for index in self.find_keyword_ids(text)]
+    
+    def find_keyword_ids(self, text: str) -> Tuple[int, ...]:
+        """
+        查找文本中出现的全部关键词的编号
+        
+        Args:
+            text: 要扫描的文本
+        
+        Returns:
+            Tuple[int, ...]: 命中的关键词编号（去重，从小到大排列）
+        """
+        if not text or not self.keywords:
+            return ()
+        
+        return tuple(sorted({index for _, index in self.iter_matches(text)}))
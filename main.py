@@ -7,11 +7,25 @@
 1. 删除包含指定关键词的段落
 2. 删除包含英文句子的段落
 
+命令行模式：python main.py --headless --dir 目录 [--mode keyword] [--output 结果.jsonl]，
+详见 python main.py --headless --help
+
 作者：AI Assistant
 版本：1.0
 """
 
+import multiprocessing
+import sys
+
 if __name__ == "__main__":
+    # 打包为exe后，多进程扫描的工作进程需要此调用
+    multiprocessing.freeze_support()
+    
+    # 命令行模式：不导入tkinter，可以在没有图形环境的服务器上运行
+    if "--headless" in sys.argv[1:]:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    
     try:
         from gui import MainGUI
         
@@ -0,0 +1,145 @@
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from file_analyzer import FileAnalyzer
+from instrumentation import metrics
+from verdict_cache import DEFAULT_VERDICT_CACHE_SIZE, VerdictCache
+
+# 每个工作进程最多同时排队的文件块数：保证工作进程不空闲，又不会在取消或退出时留下大量已提交的任务
+MAX_PENDING_CHUNKS_PER_WORKER = 2
+
+# 工作进程内的文件分析器，在进程初始化时构建一次，供该进程处理的所有文件共用
+_worker_analyzer = None
+
+def _init_worker(keywords: List[str], garbled_keywords: List[str], garbled_threshold: float,
+                 verdict_cache_size: int = DEFAULT_VERDICT_CACHE_SIZE):
+    """工作进程初始化：构建关键词自动机、正则表达式等检测器状态，每个工作进程有自己的段落判定缓存"""
+    global _worker_analyzer
+    verdict_cache = VerdictCache(verdict_cache_size) if verdict_cache_size > 0 else None
+    _worker_analyzer = FileAnalyzer(keywords, garbled_keywords, garbled_threshold=garbled_threshold,
+                                    verdict_cache=verdict_cache)
+
+def _analyze_chunk(tasks: List[Tuple[str, List[str]]],
+                   collect_metrics: bool = False) -> Tuple[List[Dict[str, List]], Optional[Dict[str, Any]]]:
+    """
+    在工作进程中分析一块文件
+    
+    Args:
+        tasks: [(文件路径, 需要分析的模式)]
+        collect_metrics: 是否统计这一块的各阶段耗时和计数（主进程开启了性能统计）
+    
+    Returns:
+        Tuple: (分析结果，顺序与tasks一致, 这一块的统计Instrumentation.snapshot()，不统计时为None)
+    """
+    if not collect_metrics:
+        metrics.enable(False)
+        return [_worker_analyzer.analyze_file(file_path, modes) for file_path, modes in tasks], None
+    
+    metrics.enable()
+    metrics.reset()
+    verdicts = _worker_analyzer.verdict_cache
+    verdict_counts = (verdicts.hits, verdicts.misses) if verdicts is not None else None
+    results = [_worker_analyzer.analyze_file(file_path, modes) for file_path, modes in tasks]
+    if verdicts is not None:
+        metrics.count('verdict_hits', verdicts.hits - verdict_counts[0])
+        metrics.count('verdict_misses', verdicts.misses - verdict_counts[1])
+    return results, metrics.snapshot()
+
+class ParallelScanner:
+    """多进程扫描器：把文件列表分块交给进程池处理，再按原文件顺序合并结果
+    
+    进程池在多次扫描之间保留，配置版本不变时工作进程中已构建的检测器直接复用。
+    """
+    
+    def __init__(self, max_workers: int, chunk_size: int = 64, verdict_cache_size: int = DEFAULT_VERDICT_CACHE_SIZE):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.verdict_cache_size = verdict_cache_size  # 工作进程中段落判定缓存的大小，0表示不缓存
+        self._executor = None
+        self._executor_version = None  # 进程池中检测器对应的配置版本
+        self._futures = deque()  # 已提交、结果还没有取出的文件块
+    
+    def _get_executor(self, keywords: List[str], garbled_keywords: List[str], garbled_threshold: float,
+                      config_version: str) -> ProcessPoolExecutor:
+        """获取进程池，配置版本变化（或没有版本）时重新创建"""
+        if self._executor is not None and config_version is not None and config_version == self._executor_version:
+            return self._executor
+        
+        self.close()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(keywords, garbled_keywords, garbled_threshold, self.verdict_cache_size)
+        )
+        self._executor_version = config_version
+        return self._executor
+    
+    def close(self, wait: bool = True):
+        """
+        关闭进程池，还没开始的文件块直接取消（可以在其他线程中调用，例如关闭窗口时）
+        
+        Args:
+            wait: 是否等待正在运行的文件块结束
+        """
+        for _, future in list(self._futures):
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._executor_version = None
+    
+    def scan(self, tasks: Iterable[Tuple[str, List[str]]], keywords: List[str], garbled_keywords: List[str],
+             garbled_threshold: float, cancel_event: threading.Event = None,
+             config_version: str = None) -> Iterator[Tuple[str, Dict[str, List]]]:
+        """
+        并行分析文件列表
+        
+        Args:
+            tasks: 要分析的文件 [(文件路径, 需要分析的模式)]，可以是迭代器，提交文件块时才逐块取出
+            keywords: 关键词列表
+            garbled_keywords: 乱码检测关键词列表
+            garbled_threshold: 乱码字符比例阈值
+            cancel_event: 取消事件，设置后不再开始新的文件块
+            config_version: 配置版本，与上次扫描相同时复用进程池，为None时每次新建
+        
+        Returns:
+            Iterator[Tuple[str, Dict[str, List]]]: 按tasks顺序产出(文件路径, 该文件的分析结果)，
+            结果与FileAnalyzer.analyze_file的顺序执行结果完全相同
+        """
+        tasks = iter(tasks)
+        executor = self._get_executor(keywords, garbled_keywords, garbled_threshold, config_version)
+        futures = self._futures
+        max_pending = self.max_workers * MAX_PENDING_CHUNKS_PER_WORKER
+        collect_metrics = metrics.enabled
+        
+        def submit_chunks():
+            # 只保持有限个文件块在排队，取出一块的结果后再提交下一块
+            while len(futures) < max_pending and not (cancel_event is not None and cancel_event.is_set()):
+                chunk = list(islice(tasks, self.chunk_size))
+                if not chunk:
+                    return
+                futures.append((chunk, executor.submit(_analyze_chunk, chunk, collect_metrics)))
+        
+        try:
+            submit_chunks()
+            # 按提交顺序取回结果，保证合并后的顺序与顺序扫描一致
+            while futures:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                chunk, future = futures[0]
+                chunk_results, chunk_metrics = future.result()
+                futures.popleft()
+                if chunk_metrics is not None:
+                    metrics.merge(chunk_metrics)
+                submit_chunks()
+                for (file_path, _), file_result in zip(chunk, chunk_results):
+                    yield file_path, file_result
+        finally:
+            # 取消还没开始的文件块
+            while futures:
+                futures.popleft()[1].cancel()
+            if config_version is None:
+                # 不复用的进程池在正在运行的块结束后退出
+                self.close()
@@ -1,8 +1,23 @@
 import os
-import glob
-from typing import Dict, List, Tuple
-from config_manager import ConfigManager
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from analysis_result import Hit, ModeResult, hit_text
+from batch_writer import DEFAULT_WRITE_WORKERS, BatchSummary, apply_batch, write_file_atomic
+from config_manager import ConfigManager, ConfigSnapshot
+from duplicate_finder import DuplicateResolver
+from encoding_detector import read_text
 from english_detector import EnglishDetector
+from file_analyzer import ANALYSIS_MODES, ANALYSIS_VERSION, FileAnalyzer, paragraph_checksum, read_file_content
+from file_indexer import FileEntry, FileIndexer
+from garbled_detector import GARBLED_SCORE_LABEL
+from instrumentation import metrics
+from keyword_matcher import unique_keywords
+from parallel_scanner import ParallelScanner
+from scan_cache import ScanCache, make_config_hash, open_scan_cache
+from scan_progress import ScanProgress
+from undo_journal import open_undo_journal
+from verdict_cache import DEFAULT_VERDICT_CACHE_SIZE, VerdictCache
 
 class TextProcessor:
     """文本处理核心类，负责文件读取、内容处理和文件写入"""
@@ -12,11 +27,60 @@ class TextProcessor:
         self.english_detector = EnglishDetector()
         self.files_directory = ""
         self.config_directory = ""
+        self.max_workers = 1  # 并行扫描的进程数，1表示在当前进程中顺序扫描
+        self.chunk_size = 64  # 并行扫描时每次交给工作进程的文件数
+        self.write_workers = DEFAULT_WRITE_WORKERS  # 批量删除时写入文件的线程数
+        self.use_undo_journal = True  # 删除时是否记录撤销日志
+        self.verdict_cache = VerdictCache()  # 含'<'的英文候选段落的判定缓存，重复出现的段落只核对一次，为None时不缓存
+        self.persist_verdicts = False  # 是否把段落判定缓存保存到扫描缓存，下次分析时继续使用
+        self.use_scan_cache = True  # 是否使用增量扫描缓存，跳过未变化的文件
+        self.file_signatures = {}  # 上次分析时有命中的文件的签名 {相对路径: (文件大小, 修改时间)}
+        self.result_labels = {}  # 上次分析的关键词表 {分析模式: 关键词列表}，命中项中的关键词编号指向该表
+        self.result_modes = []  # 上次分析实际启用的模式
+        self.result_version = None  # 上次分析使用的配置版本
+        self._analyzer = None  # 顺序扫描用的文件分析器，配置不变时重复使用
+        self._analyzer_version = None  # _analyzer对应的配置版本
+        self._scanner = None  # 并行扫描器，配置不变时重复使用其中的工作进程
+        self.exclude_patterns = []  # 遍历目录时排除的glob模式
+        self.max_depth = None  # 遍历目录的最大深度，None表示不限
+        self.persist_listing = False  # 是否把目录清单保存到扫描缓存，下次只重新列出有变化的目录
+        self.detect_duplicates = True  # 内容相同的文件是否只分析一个，其余直接使用它的结果
+        self.duplicate_groups = {}  # 上次分析找到的重复文件 {相对路径: 所在组的全部相对路径}
+    
+    def close(self, wait: bool = True):
+        """
+        关闭并行扫描保留的工作进程，还没开始的文件块直接取消
+        
+        Args:
+            wait: 是否等待正在运行的文件块结束（关闭窗口时不等待）
+        """
+        if self._scanner is not None:
+            self._scanner.close(wait)
+            self._scanner = None
     
     def set_files_directory(self, directory: str):
         """设置待处理文件目录"""
         self.files_directory = directory
     
+    def set_parallel_options(self, max_workers: int, chunk_size: int = 64):
+        """设置并行扫描的进程数和分块大小"""
+        self.max_workers = max(1, int(max_workers))
+        self.chunk_size = max(1, int(chunk_size))
+    
+    def set_index_options(self, exclude_patterns: Iterable[str] = (), max_depth: int = None,
+                          persist_listing: bool = False):
+        """设置遍历目录时的排除模式、最大深度和是否保存目录清单"""
+        self.exclude_patterns = [pattern.strip() for pattern in exclude_patterns if pattern.strip()]
+        self.max_depth = None if max_depth is None else max(0, int(max_depth))
+        self.persist_listing = persist_listing
+    
+    def set_verdict_cache_options(self, max_size: int = DEFAULT_VERDICT_CACHE_SIZE, persist: bool = False):
+        """设置段落判定缓存的大小（0表示不缓存）和是否在两次运行之间保存"""
+        max_size = max(0, int(max_size))
+        self.verdict_cache = VerdictCache(max_size) if max_size else None
+        self.persist_verdicts = persist
+        self._analyzer = None
+    
     def set_config_directory(self, directory: str):
         """设置配置文件目录"""
         self.config_directory = directory
@@ -24,178 +88,514 @@ class TextProcessor:
     
     def get_txt_files(self) -> List[str]:
         """获取目录下所有txt文件（包括子目录）"""
+        return [entry.path for entry in self.index_files()]
+    
+    def index_files(self, cache: ScanCache = None) -> List[FileEntry]:
+        """
+        遍历目录，列出txt文件及其大小和修改时间
+        
+        Args:
+            cache: 已打开的扫描缓存，开启persist_listing时从中读取并保存目录清单
+        
+        Returns:
+            List[FileEntry]: 文件列表，顺序与os.walk相同
+        """
         if not self.files_directory or not os.path.exists(self.files_directory):
             return []
         
-        txt_files = []
-        # 使用os.walk递归遍历目录及其所有子目录
-        for root, dirs, files in os.walk(self.files_directory):
-            for file in files:
-                if file.lower().endswith('.txt'):
-                    txt_files.append(os.path.join(root, file))
-        
-        return txt_files
+        use_listing = cache is not None and self.persist_listing
+        indexer = FileIndexer(self.files_directory, exclude_patterns=self.exclude_patterns,
+                              max_depth=self.max_depth, listing=cache.load_listing() if use_listing else None)
+        with metrics.stage('index'):
+            entries = indexer.scan()
+        metrics.count('files_listed', len(entries))
+        if use_listing:
+            cache.store_listing(indexer.listing)
+        return entries
     
     def read_file_content(self, file_path: str) -> str:
         """读取文件内容"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-
-        # 如果所有编码都失败，尝试用错误处理方式读取
-        except Exception as e:
-            print(f"读取文件 {file_path} 时出错: {e}")
-            return "格式错误，可能包含乱码€ ╋ ╅  ソ ュ等"
+        return read_file_content(file_path)
     
-    def write_file_content(self, file_path: str, content: str):
-        """写入文件内容"""
+    def write_file_content(self, file_path: str, content: str, encoding: str = 'utf-8'):
+        """写入文件内容（按读取时检测出的编码写回，不改变文件的编码）"""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_file_atomic(file_path, content, encoding)
             return True
         except Exception as e:
             print(f"写入文件 {file_path} 时出错: {e}")
             return False
     
-    def find_keyword_paragraphs(self) -> Dict[str, List[Tuple[str, str]]]:
+    def analyze_files(self, modes: Iterable[str] = ANALYSIS_MODES) -> Dict[str, Dict[str, List]]:
         """
-        查找包含关键词的段落
+        一次遍历目录，对每个文件只读取、切分一次，同时运行所有启用的检测器
         
+        Args:
+            modes: 启用的分析模式，默认为全部模式（keyword、english、garbled）
+            
         Returns:
-            Dict[str, List[Tuple[str, str]]]: {相对路径: [(段落内容, 匹配的关键词)]}
+            Dict[str, ModeResult]: {分析模式: {相对路径: [Hit]}}，与对应的find_*方法的结果相同
         """
-        result = {}
-        keywords = self.config_manager.load_keywords()
+        modes = [mode for mode in ANALYSIS_MODES if mode in modes]
+        result = {mode: ModeResult(mode, []) for mode in modes}
         
-        if not keywords:
-            print("没有加载到关键词")
-            return result
+        for rel_path, file_result in self.iter_analysis(modes):
+            for mode, items in file_result.items():
+                result[mode][rel_path] = items
         
-        txt_files = self.get_txt_files()
+        # 关键词表在分析开始时才加载
+        for mode, mode_result in result.items():
+            mode_result.labels = self.result_labels.get(mode, [])
         
-        for file_path in txt_files:
-            # 获取相对于files_directory的相对路径
-            rel_path = os.path.relpath(file_path, self.files_directory)
-            content = self.read_file_content(file_path)
+        return result
+    
+    def iter_analysis(self, modes: Iterable[str] = ANALYSIS_MODES, cancel_event: threading.Event = None,
+                      progress: ScanProgress = None) -> Iterator[Tuple[str, Dict[str, List]]]:
+        """
+        流式分析：按文件遍历顺序逐个产出有命中的文件，调用方可以边分析边显示
+        
+        Args:
+            modes: 启用的分析模式
+            cancel_event: 取消事件，设置后停止分析（包括工作进程中尚未开始的任务）
+            progress: 扫描进度，分析过程中持续更新
             
-            if not content:
+        Returns:
+            Iterator[Tuple[str, Dict[str, List]]]: (相对路径, {分析模式: [Hit]})，
+            命中项中的关键词编号指向self.result_labels中该模式的关键词表
+        """
+        # 配置文件只在修改后才重新解析
+        snapshot = self.config_manager.get_snapshot()
+        modes = self.resolve_modes(modes, snapshot)
+        keywords = unique_keywords(snapshot.keywords) if 'keyword' in modes else []
+        garbled_keywords = list(snapshot.garbled_keywords) if 'garbled' in modes else []
+        
+        self.file_signatures = {}
+        # 乱码检测的关键词表末尾是统计评分命中时的标签
+        self.result_labels = {'keyword': keywords, 'english': [], 'garbled': garbled_keywords + [GARBLED_SCORE_LABEL]}
+        self.result_modes = list(modes)
+        self.result_version = snapshot.version
+        self.duplicate_groups = {}
+        if not modes:
+            return
+        
+        # 遍历目录之前就开始计时，界面上显示正在遍历目录
+        if progress:
+            progress.start()
+        
+        cache = open_scan_cache(self.files_directory) if self.use_scan_cache else None
+        
+        # 记录分析时的文件大小和修改时间，用于缓存校验和删除前的校验（遍历目录时已经读取）
+        entries = self.index_files(cache)
+        file_stats = {entry.path: (entry.size, entry.mtime_ns) for entry in entries}
+        # 重复文件在扫描过程中按需判断，不需要在开始前读完所有大小相同的文件
+        resolver = self._duplicate_resolver(entries, cache)
+        
+        if progress:
+            progress.set_totals(len(file_stats), sum(size for size, _ in file_stats.values()))
+        
+        config_hashes = {mode: self._get_config_hash(mode, snapshot) for mode in modes}
+        verdicts = self.verdict_cache
+        persist_verdicts = bool(cache and verdicts is not None and self.persist_verdicts)
+        if verdicts is not None:
+            verdicts.set_version(snapshot.version)
+            if persist_verdicts and not len(verdicts):
+                with metrics.stage('cache'):
+                    verdicts.load(cache.load_verdicts(snapshot.version))
+            verdict_counts = (verdicts.hits, verdicts.misses)
+        if cache:
+            with metrics.stage('cache'):
+                cached_results, pending = self._load_cached_results(cache, file_stats, modes, config_hashes)
+        else:
+            cached_results, pending = {}, [(file_path, modes) for file_path in file_stats]
+        
+        # 只分析缓存未命中的文件和模式，结果顺序与pending一致
+        pending_modes = dict(pending)
+        scanned = self._scan_unique(pending, resolver, snapshot, cancel_event)
+        records = {mode: [] for mode in modes}
+        
+        try:
+            for file_path, stat in file_stats.items():
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                
+                rel_path = os.path.relpath(file_path, self.files_directory)
+                file_result = cached_results.pop(file_path, {})
+                if resolver is not None:
+                    self._add_duplicate(resolver.find_original(file_path), rel_path)
+                
+                if file_path in pending_modes:
+                    scanned_path, scanned_result = next(scanned, (None, None))
+                    if scanned_path is None:
+                        # 扫描被取消
+                        break
+                    file_result.update(scanned_result)
+                    for mode in pending_modes[file_path]:
+                        records[mode].append((rel_path, stat[0], stat[1], scanned_result.get(mode, [])))
+                
+                if progress:
+                    progress.advance(stat[0])
+                
+                file_result = {mode: items for mode, items in file_result.items() if items}
+                if file_result:
+                    self.file_signatures[rel_path] = stat
+                    yield rel_path, file_result
+        finally:
+            if verdicts is not None:
+                # 多进程扫描时判定在工作进程的缓存中进行，由工作进程随每个文件块的统计返回
+                metrics.count('verdict_hits', verdicts.hits - verdict_counts[0])
+                metrics.count('verdict_misses', verdicts.misses - verdict_counts[1])
+            if cache:
+                for mode in modes:
+                    cache.store(mode, config_hashes[mode], records[mode])
+                if resolver is not None:
+                    cache.store_digests({os.path.relpath(file_path, self.files_directory): digest
+                                         for file_path, digest in resolver.digests.items()})
+                if persist_verdicts:
+                    cache.store_verdicts(snapshot.version, verdicts.items())
+                cache.close()
+    
+    def resolve_modes(self, modes: Iterable[str], snapshot: ConfigSnapshot = None) -> List[str]:
+        """
+        去掉按当前配置无法分析的模式：没有关键词时的关键词模式，没有乱码关键词且不做统计评分时的乱码模式
+        
+        Args:
+            modes: 请求的分析模式
+            snapshot: 配置快照，为None时读取当前配置
+        
+        Returns:
+            List[str]: 实际启用的模式，按ANALYSIS_MODES的顺序排列
+        """
+        if snapshot is None:
+            snapshot = self.config_manager.get_snapshot()
+        modes = [mode for mode in ANALYSIS_MODES if mode in modes]
+        
+        if 'keyword' in modes and not unique_keywords(snapshot.keywords):
+            print("没有加载到关键词")
+            modes.remove('keyword')
+        
+        if 'garbled' in modes and not snapshot.garbled_keywords:
+            print("没有加载到乱码检测关键词")
+            if snapshot.garbled_threshold <= 0:
+                modes.remove('garbled')
+        return modes
+    
+    def reanalyze_files(self, rel_paths: Iterable[str]) -> Optional[Dict[str, Dict[str, List]]]:
+        """
+        只重新分析指定的文件（例如删除段落后被改写或删除的文件），更新文件签名和扫描缓存，
+        耗时只与文件数有关，与目录中的文件总数无关
+        
+        Args:
+            rel_paths: 相对路径
+        
+        Returns:
+            Optional[Dict[str, Dict[str, List]]]: {相对路径: {分析模式: [Hit]}}，与iter_analysis产出的结果相同，
+            文件已不存在或没有命中时为空字典；配置在上次分析之后被修改时返回None，需要重新完整分析
+        """
+        snapshot = self.config_manager.get_snapshot()
+        if self.result_version is None or snapshot.version != self.result_version:
+            return None
+        
+        modes = self.result_modes
+        results = {}
+        file_stats = {}
+        for rel_path in rel_paths:
+            results[rel_path] = {}
+            self.file_signatures.pop(rel_path, None)
+            file_path = os.path.join(self.files_directory, rel_path)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
                 continue
+            file_stats[file_path] = (stat.st_size, stat.st_mtime_ns)
+        if not modes or not file_stats:
+            return results
+        
+        # 对多个副本执行同样的删除后，副本的内容仍然相同，只需重新分析一个
+        resolver = None
+        if self.detect_duplicates:
+            resolver = DuplicateResolver([FileEntry(file_path, *stat) for file_path, stat in file_stats.items()])
+        
+        records = {mode: [] for mode in modes}
+        tasks = [(file_path, modes) for file_path in file_stats]
+        for file_path, file_result in self._scan_unique(tasks, resolver, snapshot):
+            rel_path = os.path.relpath(file_path, self.files_directory)
+            stat = file_stats[file_path]
+            for mode in modes:
+                records[mode].append((rel_path, stat[0], stat[1], file_result.get(mode, [])))
             
-            # 提取段落
-            paragraphs = self.english_detector.extract_paragraphs_from_text(content)
-            matching_paragraphs = []
-            
-            # 检查每个段落是否包含关键词
-            for paragraph in paragraphs:
-                for keyword in keywords:
-                    if keyword in paragraph:
-                        matching_paragraphs.append((paragraph, keyword))
-                        break  # 找到一个关键词就够了
-            
-            if matching_paragraphs:
-                result[rel_path] = matching_paragraphs
+            file_result = {mode: items for mode, items in file_result.items() if items}
+            if file_result:
+                self.file_signatures[rel_path] = stat
+            results[rel_path] = file_result
         
-        return result
+        cache = open_scan_cache(self.files_directory) if self.use_scan_cache else None
+        if cache:
+            for mode in modes:
+                cache.store(mode, self._get_config_hash(mode, snapshot), records[mode])
+            cache.close()
+        return results
     
-    def find_english_paragraphs(self) -> Dict[str, List[str]]:
+    def _duplicate_resolver(self, entries: List[FileEntry], cache: ScanCache = None) -> Optional[DuplicateResolver]:
         """
-        查找包含英文句子的段落
+        创建判断重复文件的DuplicateResolver，未开启detect_duplicates时返回None
+        
+        Args:
+            entries: 文件列表
+            cache: 已打开的扫描缓存，从中读取文件内容哈希，未变化的文件不再重新计算
+        """
+        if not self.detect_duplicates:
+            return None
+        known = {}
+        if cache:
+            with metrics.stage('cache'):
+                known = {os.path.join(self.files_directory, rel_path): digest
+                         for rel_path, digest in cache.load_digests().items()}
+        return DuplicateResolver(entries, known)
+    
+    def _add_duplicate(self, original: Optional[str], rel_path: str):
+        """把一个副本加入duplicate_groups中所在的组（组在分析过程中逐渐补全，第一个文件总在组的开头）"""
+        if original is None:
+            return
+        rel_original = os.path.relpath(original, self.files_directory)
+        group = self.duplicate_groups.get(rel_original)
+        if group is None:
+            group = self.duplicate_groups[rel_original] = [rel_original]
+        group.append(rel_path)
+        self.duplicate_groups[rel_path] = group
+    
+    def _scan_unique(self, tasks: List[Tuple[str, List[str]]], resolver: Optional[DuplicateResolver],
+                     snapshot: ConfigSnapshot, cancel_event: threading.Event = None) -> Iterator[Tuple[str, Dict[str, List]]]:
+        """
+        与_scan_files相同，但内容相同且需要分析的模式相同的文件只分析第一个，其余文件直接使用它的结果，
+        分析耗时只与不同内容的数量有关
+        
+        Args:
+            tasks: [(文件路径, 需要分析的模式)]
+            resolver: 判断重复文件的DuplicateResolver，为None时不合并
+        """
+        if resolver is None:
+            return self._scan_files(tasks, snapshot, cancel_event)
+        
+        representatives = {}  # {文件路径: 代表文件路径，自己就是代表文件时为None}
+        first = {}  # {(内容相同的第一个文件, 需要分析的模式): 代表文件路径}
+        
+        def representative(file_path: str, modes: List[str]) -> Optional[str]:
+            # 扫描和合并都按tasks顺序逐个判断，先判断到的文件总在前面，结果与判断的先后无关
+            if file_path not in representatives:
+                key = (resolver.find_original(file_path) or file_path, tuple(modes))
+                chosen = first.setdefault(key, file_path)
+                representatives[file_path] = chosen if chosen != file_path else None
+            return representatives[file_path]
+        
+        unique_tasks = (task for task in tasks if representative(*task) is None)
+        scanned = self._scan_files(unique_tasks, snapshot, cancel_event, len(tasks))
+        return self._merge_duplicates(tasks, scanned, representative, resolver)
+    
+    @staticmethod
+    def _merge_duplicates(tasks: List[Tuple[str, List[str]]], scanned: Iterator[Tuple[str, Dict[str, List]]],
+                          representative: Callable[[str, List[str]], Optional[str]],
+                          resolver: DuplicateResolver) -> Iterator[Tuple[str, Dict[str, List]]]:
+        """按tasks顺序产出分析结果，副本使用代表文件的结果（代表文件总在副本之前）"""
+        shared = {}  # 可能有副本的文件的结果
+        for file_path, modes in tasks:
+            original = representative(file_path, modes)
+            if original is None:
+                scanned_path, file_result = next(scanned, (None, None))
+                if scanned_path is None:
+                    # 扫描被取消
+                    return
+                if resolver.may_have_copies(file_path):
+                    shared[file_path] = file_result
+            else:
+                metrics.count('duplicate_files')
+                file_result = {mode: list(items) for mode, items in shared[original].items()}
+            yield file_path, file_result
+    
+    def _scan_files(self, tasks: Iterable[Tuple[str, List[str]]], snapshot: ConfigSnapshot,
+                    cancel_event: threading.Event = None, task_count: int = None) -> Iterator[Tuple[str, Dict[str, List]]]:
+        """
+        分析文件列表，tasks为[(文件路径, 需要分析的模式)]，按tasks顺序产出(文件路径, 分析结果)
+        
+        tasks可以是迭代器（在扫描过程中逐个取出），此时由task_count给出任务数的上限，用于决定是否使用多进程
+        """
+        if task_count is None:
+            task_count = len(tasks)
+        # 检测器总是用配置中的全部关键词构建，关键词编号与result_labels一致，也不随本次分析的模式变化
+        keywords = unique_keywords(snapshot.keywords)
+        garbled_keywords = list(snapshot.garbled_keywords)
+        
+        if self.max_workers > 1 and task_count > self.chunk_size:
+            # 多进程扫描：检测器状态在每个工作进程中只构建一次，配置不变时工作进程跨多次分析复用
+            scanner = self._scanner
+            verdict_cache_size = self.verdict_cache.max_size if self.verdict_cache is not None else 0
+            options = (self.max_workers, self.chunk_size, verdict_cache_size)
+            if scanner is None or (scanner.max_workers, scanner.chunk_size, scanner.verdict_cache_size) != options:
+                if scanner is not None:
+                    scanner.close()
+                scanner = self._scanner = ParallelScanner(*options)
+            return scanner.scan(tasks, keywords, garbled_keywords, snapshot.garbled_threshold, cancel_event,
+                                snapshot.version)
+        
+        # 顺序扫描：检测器状态（关键词自动机等）每个配置版本只构建一次
+        if self._analyzer is None or self._analyzer_version != snapshot.version:
+            if self.verdict_cache is not None:
+                self.verdict_cache.set_version(snapshot.version)
+            self._analyzer = FileAnalyzer(keywords, garbled_keywords, self.english_detector, snapshot.garbled_threshold,
+                                          self.verdict_cache)
+            self._analyzer_version = snapshot.version
+        analyzer = self._analyzer
+        return ((file_path, analyzer.analyze_file(file_path, modes)) for file_path, modes in tasks)
+    
+    def _get_config_hash(self, mode: str, snapshot: ConfigSnapshot) -> str:
+        """计算某个分析模式相关配置的哈希，用作扫描缓存的键"""
+        if mode == 'keyword':
+            return make_config_hash(ANALYSIS_VERSION, mode, unique_keywords(snapshot.keywords))
+        if mode == 'garbled':
+            return make_config_hash(ANALYSIS_VERSION, mode, list(snapshot.garbled_keywords), snapshot.garbled_threshold)
+        return make_config_hash(ANALYSIS_VERSION, mode)
+    
+    def _load_cached_results(self, cache: ScanCache, file_stats: Dict[str, Tuple[int, int]], modes: List[str],
+                             config_hashes: Dict[str, str]) -> Tuple[Dict[str, Dict[str, List]], List[Tuple[str, List[str]]]]:
+        """
+        从扫描缓存中取出未变化文件的结果
         
         Returns:
-            Dict[str, List[str]]: {相对路径: [段落内容列表]}
+            Tuple: ({文件路径: {分析模式: 命中项列表}}, 需要重新分析的文件[(文件路径, 缺失的模式)])
         """
-        result = {}
-        txt_files = self.get_txt_files()
+        cached = {mode: cache.load(mode, config_hashes[mode]) for mode in modes}
+        cached_results = {}
+        pending = []
         
-        for file_path in txt_files:
-            # 获取相对于files_directory的相对路径
+        for file_path, stat in file_stats.items():
             rel_path = os.path.relpath(file_path, self.files_directory)
-            content = self.read_file_content(file_path)
-            
-            if not content:
-                continue
-            
-            # 提取段落
-            paragraphs = self.english_detector.extract_paragraphs_from_text(content)
-            english_paragraphs = []
-            
-            # 检查每个段落是否包含英文句子
-            for paragraph in paragraphs:
-                if self.english_detector.contains_english_sentence(paragraph):
-                    english_paragraphs.append(paragraph)
+            missing_modes = []
+            for mode in modes:
+                entry = cached[mode].get(rel_path)
+                if entry and (entry[0], entry[1]) == stat:
+                    cached_results.setdefault(file_path, {})[mode] = ScanCache.decode_items(entry[2])
+                else:
+                    missing_modes.append(mode)
             
-            if english_paragraphs:
-                result[rel_path] = english_paragraphs
+            if missing_modes:
+                pending.append((file_path, missing_modes))
         
-        return result
+        return cached_results, pending
     
-    def find_garbled_files(self) -> Dict[str, List[Tuple[str, str]]]:
+    def find_keyword_paragraphs(self) -> ModeResult:
         """
-        查找包含乱码关键词的文件
+        查找包含关键词的段落
         
         Returns:
-            Dict[str, List[Tuple[str, str]]]: {相对路径: [(文件内容, 匹配的关键词)]}
+            ModeResult: {相对路径: [Hit(起始位置, 结束位置, 段落校验和, 关键词编号)]}，
+            关键词文字用ModeResult.get_label获取，段落内容用load_hit_text读取
+        """
+        return self.analyze_files(('keyword',))['keyword']
+    
+    def find_english_paragraphs(self) -> ModeResult:
         """
-        result = {}
-        garbled_keywords = self.config_manager.load_garbled_keywords()
+        查找包含英文句子的段落
         
-        if not garbled_keywords:
-            print("没有加载到乱码检测关键词")
-            return result
+        Returns:
+            ModeResult: {相对路径: [Hit(起始位置, 结束位置, 段落校验和)]}
+        """
+        return self.analyze_files(('english',))['english']
+    
+    def find_garbled_files(self) -> ModeResult:
+        """
+        查找包含乱码关键词的文件
         
-        txt_files = self.get_txt_files()
+        Returns:
+            ModeResult: {相对路径: [Hit(0, 0, 0, (乱码关键词编号,))]}，每个文件一条命中；
+            没有乱码关键词但可疑字符比例达到garbled_threshold的文件也包括在内
+        """
+        return self.analyze_files(('garbled',))['garbled']
+    
+    def load_hit_text(self, rel_path: str, mode: str, hit: Hit) -> str:
+        """
+        从文件中读取一条命中的文本
         
-        for file_path in txt_files:
-            # 获取相对于files_directory的相对路径
-            rel_path = os.path.relpath(file_path, self.files_directory)
-            content = self.read_file_content(file_path)
-            
-            if not content:
-                continue
+        Args:
+            rel_path: 相对路径
+            mode: 分析模式
+            hit: 命中项
             
-            # 检查整个文件内容是否包含乱码关键词
-            for keyword in garbled_keywords:
-                if keyword in content:
-                    result[rel_path] = [(content, keyword)]
-                    break  # 找到一个关键词就够了
-        
-        return result
+        Returns:
+            str: 段落内容；乱码检测模式下为整个文件的内容
+        """
+        content = self.read_file_content(os.path.join(self.files_directory, rel_path))
+        return hit_text(mode, content, hit)
     
-    def remove_paragraphs_from_file(self, file_path: str, paragraphs_to_remove: List[str]) -> bool:
+    def remove_paragraphs_from_file(self, file_path: str, spans_to_remove: List[Tuple[int, int, int]],
+                                    signature: Tuple[int, int] = None) -> bool:
         """
-        从文件中删除指定段落
+        从文件中删除指定段落：按分析时记录的位置一次性切除段落所在的行，
+        文件的其余内容（空行、缩进等）保持不变
         
         Args:
             file_path: 文件路径
-            paragraphs_to_remove: 要删除的段落列表
+            spans_to_remove: 要删除的段落 [(起始位置, 结束位置, 段落校验和)]，也可以直接传入分析得到的[Hit]
+            signature: 分析时记录的(文件大小, 修改时间)，与当前文件不一致时拒绝写入
             
         Returns:
             bool: 是否成功删除
         """
         try:
-            content = self.read_file_content(file_path)
-            if not content:
-                return False
-            
-            # 提取所有段落
-            all_paragraphs = self.english_detector.extract_paragraphs_from_text(content)
-            
-            # 过滤掉要删除的段落
-            remaining_paragraphs = []
-            for paragraph in all_paragraphs:
-                if paragraph not in paragraphs_to_remove:
-                    remaining_paragraphs.append(paragraph)
-            
-            # 重新组合内容
-            new_content = '\n'.join(remaining_paragraphs)
-            
-            # 写入文件
-            return self.write_file_content(file_path, new_content)
-            
+            self._remove_paragraphs(file_path, spans_to_remove, signature)
+            return True
         except Exception as e:
             print(f"删除段落时出错: {e}")
             return False
     
+    def _remove_paragraphs(self, file_path: str, spans_to_remove: List[Tuple[int, int, int]],
+                           signature: Tuple[int, int] = None) -> Tuple[List[Tuple[int, str]], str]:
+        """
+        remove_paragraphs_from_file的实现，失败时抛出异常（ValueError的信息是失败原因）
+        
+        Returns:
+            Tuple[List[Tuple[int, str]], str]: (被删除的内容[(在删除后内容中的位置, 被删除的文本)], 文件编码)，用于撤销
+        """
+        # 文件在分析之后被修改过，记录的位置已经失效
+        if signature is not None:
+            stat = os.stat(file_path)
+            if (stat.st_size, stat.st_mtime_ns) != tuple(signature):
+                raise ValueError(f"文件在分析后已被修改，请重新分析: {file_path}")
+        
+        content, encoding = read_text(file_path)
+        if not content:
+            raise ValueError(f"文件为空或无法读取: {file_path}")
+        if encoding is None:
+            # 按原编码写回会把替换字符写进文件，损坏无法解码的部分
+            raise ValueError(f"文件包含无法解码的字节，为避免损坏不做修改: {file_path}")
+        
+        pieces = []
+        removed = []
+        kept_length = 0
+        cursor = 0
+        for span in sorted(set(spans_to_remove)):
+            start, end, checksum = span[:3]
+            # 逐段核对位置上的内容，防止误删
+            if paragraph_checksum(content[start:end].strip()) != checksum:
+                raise ValueError(f"段落位置与文件内容不一致，请重新分析: {file_path}")
+            
+            if end < len(content) and content[end] == '\n':
+                # 连同行尾的换行符一起删除
+                end += 1
+            elif start > 0:
+                # 最后一行没有换行符，删除它前面的换行符
+                start -= 2 if content[start - 2:start] == '\r\n' else 1
+            
+            start = max(start, cursor)
+            pieces.append(content[cursor:start])
+            kept_length += start - cursor
+            if end > start:
+                removed.append((kept_length, content[start:end]))
+            cursor = max(end, cursor)
+        pieces.append(content[cursor:])
+        
+        # 先写临时文件再替换，写入中途出错时原文件保持完整
+        write_file_atomic(file_path, ''.join(pieces), encoding)
+        return removed, encoding
+    
     def delete_file(self, file_path: str) -> bool:
         """
         删除文件
@@ -217,83 +617,106 @@ class TextProcessor:
             print(f"删除文件时出错: {e}")
             return False
     
-    def process_keyword_deletion(self, selected_items: Dict[str, List[str]]) -> bool:
+    def apply_deletion(self, mode: str, selected_items: Dict[str, List]) -> BatchSummary:
         """
-        处理关键词删除
+        在线程池中批量执行删除：keyword、english模式删除文件中的段落，garbled模式删除整个文件
         
         Args:
-            selected_items: 用户选择的要删除的项目 {文件名: [段落列表]}
-            
+            mode: 分析模式
+            selected_items: 用户选择的要删除的项目 {文件名: [(起始位置, 结束位置, 段落校验和)]}，
+                garbled模式下只使用文件名
+        
         Returns:
-            bool: 是否成功处理
+            BatchSummary: 各文件的处理结果
         """
-        success_count = 0
-        total_count = len(selected_items)
+        # 开启撤销日志时，记录被删除的段落，被删除的文件移动到备份目录
+        journal = open_undo_journal(self.files_directory) if self.use_undo_journal else None
+        batch_id = journal.begin_batch(mode) if journal else None
         
-        for filename, paragraphs in selected_items.items():
+        def make_action(index: int, filename: str, spans: List) -> Callable[[], None]:
             file_path = os.path.join(self.files_directory, filename)
-            if os.path.exists(file_path):
-                if self.remove_paragraphs_from_file(file_path, paragraphs):
-                    success_count += 1
-                    print(f"成功处理文件: {filename}")
+            
+            def action():
+                if not os.path.exists(file_path):
+                    raise ValueError(f"文件不存在: {filename}")
+                if mode == 'garbled':
+                    if journal:
+                        # 先记录日志再移动文件
+                        journal.stash_file(batch_id, index, filename, file_path)
+                    else:
+                        os.remove(file_path)
                 else:
-                    print(f"处理文件失败: {filename}")
-            else:
-                print(f"文件不存在: {filename}")
+                    signature = self.file_signatures.get(filename)
+                    removed, encoding = self._remove_paragraphs(file_path, spans, signature)
+                    if journal:
+                        # 改写后立即记录，批次中途被中断时已改写的文件仍可撤销
+                        stat = os.stat(file_path)
+                        try:
+                            journal.record_entry(batch_id, filename,
+                                                 ('spans', encoding, stat.st_size, stat.st_mtime_ns, removed),
+                                                 signature)
+                        except sqlite3.Error as e:
+                            raise ValueError(f"段落已删除，但保存撤销日志时出错: {e}")
+            return action
         
-        print(f"关键词删除完成: {success_count}/{total_count} 个文件处理成功")
-        return success_count == total_count
+        try:
+            return apply_batch(((filename, make_action(index, filename, spans))
+                                for index, (filename, spans) in enumerate(selected_items.items())), self.write_workers)
+        finally:
+            if journal:
+                journal.finish_batch(batch_id)
+                journal.close()
     
-    def process_english_deletion(self, selected_items: Dict[str, List[str]]) -> bool:
+    def undo_deletions(self, count: int = 1) -> BatchSummary:
         """
-        处理英文句子删除
+        撤销最近count批删除操作
         
         Args:
-            selected_items: 用户选择的要删除的项目 {文件名: [段落列表]}
-            
+            count: 撤销的批次数
+        
         Returns:
-            bool: 是否成功处理
+            BatchSummary: 各文件的恢复结果，恢复后的文件需要重新分析（见reanalyze_files）
         """
-        success_count = 0
-        total_count = len(selected_items)
+        journal = open_undo_journal(self.files_directory)
+        if journal is None:
+            return BatchSummary([])
+        try:
+            return journal.undo(count)
+        finally:
+            journal.close()
+    
+    def process_keyword_deletion(self, selected_items: Dict[str, List[Tuple[int, int, int]]]) -> bool:
+        """
+        处理关键词删除
         
-        for filename, paragraphs in selected_items.items():
-            file_path = os.path.join(self.files_directory, filename)
-            if os.path.exists(file_path):
-                if self.remove_paragraphs_from_file(file_path, paragraphs):
-                    success_count += 1
-                    print(f"成功处理文件: {filename}")
-                else:
-                    print(f"处理文件失败: {filename}")
-            else:
-                print(f"文件不存在: {filename}")
+        Args:
+            selected_items: 用户选择的要删除的项目 {文件名: [(起始位置, 结束位置, 段落校验和)]}
+            
+        Returns:
+            bool: 是否全部处理成功（各文件的结果见apply_deletion）
+        """
+        return self.apply_deletion('keyword', selected_items).ok
+    
+    def process_english_deletion(self, selected_items: Dict[str, List[Tuple[int, int, int]]]) -> bool:
+        """
+        处理英文句子删除
         
-        print(f"英文句子删除完成: {success_count}/{total_count} 个文件处理成功")
-        return success_count == total_count
+        Args:
+            selected_items: 用户选择的要删除的项目 {文件名: [(起始位置, 结束位置, 段落校验和)]}
+            
+        Returns:
+            bool: 是否全部处理成功（各文件的结果见apply_deletion）
+        """
+        return self.apply_deletion('english', selected_items).ok
     
-    def process_garbled_deletion(self, selected_items: Dict[str, List[str]]) -> bool:
+    def process_garbled_deletion(self, selected_items: Dict[str, List]) -> bool:
         """
         处理乱码文件删除
         
         Args:
-            selected_items: 用户选择的要删除的项目 {文件名: [文件内容列表]}
+            selected_items: 用户选择的要删除的项目 {文件名: [...]}，只使用文件名，整个文件删除
             
         Returns:
-            bool: 是否成功处理
+            bool: 是否全部删除成功（各文件的结果见apply_deletion）
         """
-        success_count = 0
-        total_count = len(selected_items)
-        
-        for filename, _ in selected_items.items():
-            file_path = os.path.join(self.files_directory, filename)
-            if os.path.exists(file_path):
-                if self.delete_file(file_path):
-                    success_count += 1
-                    print(f"成功删除文件: {filename}")
-                else:
-                    print(f"删除文件失败: {filename}")
-            else:
-                print(f"文件不存在: {filename}")
-        
-        print(f"乱码文件删除完成: {success_count}/{total_count} 个文件删除成功")
-        return success_count == total_count 
\ No newline at end of file
+        return self.apply_deletion('garbled', selected_items).ok
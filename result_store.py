@@ -0,0 +1,255 @@
+import os
+from array import array
+from typing import Dict, Iterable, List, Tuple
+from analysis_result import Hit, hit_label, hit_text
+from encoding_detector import read_text_prefix
+from file_analyzer import paragraph_checksum, read_file_content
+from selection_model import SelectionModel
+
+# 预览文本的最大长度，完整内容在需要时再从文件中读取
+PREVIEW_LENGTH = 100
+
+# 乱码文件的预览只读取开头这么多字节（足够解码出PREVIEW_LENGTH个字符）
+PREVIEW_BYTES = 4096
+
+# 最多缓存的预览条数，超过后清空（只需容纳当前显示的一页）
+PREVIEW_CACHE_SIZE = 2000
+
+class ResultStore:
+    """分析结果的紧凑存储：每条命中只保存文件编号、位置、关键词编号和校验和，
+    预览文本在所在页显示时、完整的段落（或乱码文件的全部内容）在打开详情时才从磁盘读取"""
+    
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.filenames: List[str] = []  # 文件表，命中记录中保存的是文件编号
+        self.file_ids: Dict[str, int] = {}
+        self.labels: List[str] = []  # 匹配关键词表，命中记录中保存的是关键词编号
+        self.label_ids: Dict[Tuple[int, ...], int] = {}  # {命中的关键词编号: 标签编号}
+        
+        # 每条命中一项，按添加顺序排列
+        self.hit_files = array('I')
+        self.hit_labels = array('I')
+        self.hit_starts = array('q')
+        self.hit_ends = array('q')
+        self.hit_checksums = array('L')
+        self.previews: Dict[int, str] = {}  # 已读取的预览 {命中编号: 预览文本}
+        self.label_hits: Dict[int, array] = {}  # 每个关键词对应的结果编号，用于按关键词选择
+        self.copies: Dict[int, List[str]] = {}  # 合并显示的重复文件 {文件编号: [内容相同的其他文件]}
+        self.selection = SelectionModel()  # 选择状态
+    
+    def __len__(self) -> int:
+        return len(self.hit_files)
+    
+    def add_file(self, filename: str, items: List[Hit], labels: List[str]):
+        """
+        添加一个文件的命中项，新命中项默认选中。每个文件只添加一次，同一文件的结果编号连续
+        
+        Args:
+            filename: 相对路径
+            items: 该文件的命中项，与TextProcessor.find_*的结果相同
+            labels: 命中项中关键词编号对应的关键词表（TextProcessor.result_labels）
+        """
+        if not items:
+            return
+        
+        file_id = len(self.filenames)
+        self.file_ids[filename] = file_id
+        self.filenames.append(filename)
+        
+        for hit in items:
+            label_id = self.label_ids.get(hit.label_ids)
+            if label_id is None:
+                label_id = len(self.labels)
+                self.label_ids[hit.label_ids] = label_id
+                self.labels.append(hit_label(self.mode, labels, hit))
+                self.label_hits[label_id] = array('I')
+            
+            self.label_hits[label_id].append(len(self.hit_files))
+            self.hit_files.append(file_id)
+            self.hit_labels.append(label_id)
+            self.hit_starts.append(hit.start)
+            self.hit_ends.append(hit.end)
+            self.hit_checksums.append(hit.checksum)
+        
+        self.selection.add_file(len(items))
+    
+    def add_copy(self, group: List[str], filename: str) -> bool:
+        """
+        把一个重复文件合并到同组中已添加的文件下，不单独显示，删除时与该文件使用同样的选择
+        
+        Args:
+            group: filename所在的重复文件组（TextProcessor.duplicate_groups）
+            filename: 相对路径
+        
+        Returns:
+            bool: 是否已合并；同组文件都还没有添加时返回False，此时应正常添加
+        """
+        for member in group:
+            file_id = self.file_ids.get(member)
+            if file_id is not None and member != filename:
+                self.copies.setdefault(file_id, []).append(filename)
+                return True
+        return False
+    
+    @property
+    def copy_count(self) -> int:
+        """合并显示的重复文件数"""
+        return sum(len(copies) for copies in self.copies.values())
+    
+    def replace_files(self, results: Dict[str, List[Hit]], labels: List[str]) -> 'ResultStore':
+        """
+        用重新分析得到的命中项替换部分文件的结果，其余文件的结果和选择状态保持不变
+        
+        Args:
+            results: {相对路径: 重新分析得到的命中项}，命中项为空表示该文件已没有命中（或已删除）
+            labels: 命中项中关键词编号对应的关键词表（与原结果相同）
+        
+        Returns:
+            ResultStore: 新的结果存储，文件保持原来的顺序，原来没有命中的文件追加在末尾
+        """
+        store = ResultStore(self.mode)
+        label_keys = {label_id: key for key, label_id in self.label_ids.items()}
+        selection = self.selection
+        copied = {copy for copies in self.copies.values() for copy in copies}
+        separated = {}  # 与合并到的文件内容不再相同的副本 {相对路径: 命中项}
+        
+        for file_id, filename in enumerate(self.filenames):
+            start, size = selection.file_starts[file_id], selection.file_sizes[file_id]
+            first_new = len(store)
+            old_items = None
+            if filename in results:
+                # 位置已经变化，按段落校验和沿用原来的选择状态，新出现的段落默认选中
+                selected = {self.hit_checksums[index]: selection.is_selected(index) for index in range(start, start + size)}
+                items = results[filename]
+                store.add_file(filename, items, labels)
+                flags = [selected.get(hit.checksum, True) for hit in items]
+            else:
+                items = old_items = [Hit(self.hit_starts[index], self.hit_ends[index], self.hit_checksums[index],
+                                         label_keys[self.hit_labels[index]]) for index in range(start, start + size)]
+                store.add_file(filename, items, labels)
+                flags = [selection.is_selected(index) for index in range(start, start + size)]
+            for offset, flag in enumerate(flags):
+                if not flag:
+                    store.selection.set(first_new + offset, False)
+            
+            # 重新分析后命中项仍然相同的副本继续合并，其余的单独显示
+            for copy in self.copies.get(file_id, ()):
+                if copy in results:
+                    copy_items = results[copy]
+                else:
+                    if old_items is None:
+                        old_items = [Hit(self.hit_starts[index], self.hit_ends[index], self.hit_checksums[index],
+                                         label_keys[self.hit_labels[index]]) for index in range(start, start + size)]
+                    copy_items = old_items
+                if not (items and copy_items == items and store.add_copy([filename], copy)):
+                    separated[copy] = copy_items
+        
+        for filename, items in results.items():
+            if filename not in self.file_ids and filename not in copied:
+                store.add_file(filename, items, labels)
+        for filename, items in separated.items():
+            store.add_file(filename, items, labels)
+        return store
+    
+    def get_row(self, index: int) -> Tuple[str, str, str]:
+        """获取一条命中的显示内容：(文件名, 匹配关键词, 预览文本)，预览需先用load_previews读取"""
+        file_id = self.hit_files[index]
+        filename = self.filenames[file_id]
+        if file_id in self.copies:
+            filename = f"{filename} (+{len(self.copies[file_id])}个副本)"
+        return filename, self.labels[self.hit_labels[index]], self.previews.get(index, "")
+    
+    def load_previews(self, indices: Iterable[int], files_directory: str):
+        """
+        读取一批命中（通常是当前页）的预览文本，同一文件只读取一次
+        
+        Args:
+            indices: 命中编号
+            files_directory: 待处理文件目录
+        """
+        indices = [index for index in indices if index not in self.previews]
+        if len(self.previews) + len(indices) > PREVIEW_CACHE_SIZE:
+            self.previews.clear()
+        
+        content_file_id = None
+        content = ""
+        for index in indices:
+            file_id = self.hit_files[index]
+            if file_id != content_file_id:
+                content_file_id = file_id
+                content = self.read_preview_content(os.path.join(files_directory, self.filenames[file_id]))
+            
+            text = self.slice_text(index, content)
+            if self.mode != "garbled" and paragraph_checksum(text) != self.hit_checksums[index]:
+                # 文件在分析之后被修改过，位置已经失效
+                text = "（文件已修改，请重新分析）"
+            self.previews[index] = text[:PREVIEW_LENGTH] + "..." if len(text) > PREVIEW_LENGTH else text
+    
+    def read_preview_content(self, file_path: str) -> str:
+        """读取生成预览所需的文件内容：乱码检测模式的预览是文件开头，只读取开头的PREVIEW_BYTES个字节"""
+        if self.mode != "garbled":
+            return read_file_content(file_path)
+        try:
+            return read_text_prefix(file_path, PREVIEW_BYTES)
+        except OSError as e:
+            print(f"读取文件 {file_path} 时出错: {e}")
+            return ""
+    
+    def slice_text(self, index: int, content: str) -> str:
+        """从所在文件的内容中切出一条命中的文本"""
+        return hit_text(self.mode, content, Hit(self.hit_starts[index], self.hit_ends[index], self.hit_checksums[index]))
+    
+    def get_filename(self, index: int) -> str:
+        """获取一条命中所在的文件"""
+        return self.filenames[self.hit_files[index]]
+    
+    def get_file_id(self, index: int) -> int:
+        """获取一条命中所在文件的编号"""
+        return self.hit_files[index]
+    
+    def get_keyword_indices(self, keyword: str) -> List[int]:
+        """获取命中某个关键词的全部结果编号（一个段落命中多个关键词时也包括在内）"""
+        indices = []
+        for label_id, label in enumerate(self.labels):
+            if keyword in label.split():
+                indices.extend(self.label_hits[label_id])
+        return indices
+    
+    def get_span(self, index: int) -> Tuple[int, int, int]:
+        """获取一条命中的删除位置：(起始位置, 结束位置, 段落校验和)"""
+        return self.hit_starts[index], self.hit_ends[index], self.hit_checksums[index]
+    
+    def load_text(self, index: int, files_directory: str) -> str:
+        """
+        从磁盘读取一条命中的完整内容
+        
+        Args:
+            index: 命中编号
+            files_directory: 待处理文件目录
+        
+        Returns:
+            str: 段落内容；乱码检测模式下为整个文件的内容
+        """
+        content = read_file_content(os.path.join(files_directory, self.get_filename(index)))
+        return self.slice_text(index, content)
+    
+    def get_selected_items(self) -> Dict[str, List[Tuple[int, int, int]]]:
+        """
+        获取选中的命中项，供TextProcessor.process_*_deletion使用
+        
+        Returns:
+            Dict[str, List[Tuple[int, int, int]]]: {文件名: [(起始位置, 结束位置, 段落校验和)]}，
+            乱码检测模式下列表为空（整个文件删除）；合并显示的副本与所在文件使用同样的删除项
+        """
+        selected_items = {}
+        for index in self.selection.selected_indices():
+            spans = selected_items.setdefault(self.get_filename(index), [])
+            if self.mode != "garbled":
+                spans.append(self.get_span(index))
+        
+        for file_id, copies in self.copies.items():
+            spans = selected_items.get(self.filenames[file_id])
+            if spans is not None:
+                for copy in copies:
+                    selected_items[copy] = list(spans)
+        return selected_items
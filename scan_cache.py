@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+from analysis_result import Hit
+
+# 缓存文件名，保存在待处理文件目录下（不是txt文件，不会被扫描到）
+CACHE_FILENAME = '.txt_scan_cache.sqlite3'
+
+class ScanCache:
+    """增量扫描缓存，按(相对路径, 分析模式)保存每个文件的检测结果
+    
+    缓存命中的条件是文件大小、修改时间和该模式的配置哈希都与保存时一致，
+    任何一项变化都会让该文件在该模式下重新分析。
+    """
+    
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.connection = sqlite3.connect(cache_path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS scan_results ('
+            'path TEXT NOT NULL, '
+            'mode TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'mtime_ns INTEGER NOT NULL, '
+            'config_hash TEXT NOT NULL, '
+            'result TEXT NOT NULL, '
+            'PRIMARY KEY (path, mode))'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS directory_listing ('
+            'path TEXT PRIMARY KEY, '
+            'mtime_ns INTEGER NOT NULL, '
+            'files TEXT NOT NULL, '
+            'dirs TEXT NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS paragraph_verdicts ('
+            'version TEXT NOT NULL, '
+            'kind TEXT NOT NULL, '
+            'digest BLOB NOT NULL, '
+            'verdict TEXT NOT NULL, '
+            'PRIMARY KEY (kind, digest))'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS file_digests ('
+            'path TEXT PRIMARY KEY, '
+            'size INTEGER NOT NULL, '
+            'mtime_ns INTEGER NOT NULL, '
+            'digest BLOB NOT NULL)'
+        )
+        self.connection.commit()
+    
+    def load(self, mode: str, config_hash: str) -> Dict[str, Tuple[int, int, str]]:
+        """
+        一次性读取某个模式下与当前配置匹配的全部缓存记录
+        
+        Args:
+            mode: 分析模式
+            config_hash: 当前配置的哈希
+        
+        Returns:
+            Dict[str, Tuple[int, int, str]]: {相对路径: (文件大小, 修改时间, 结果JSON)}
+        """
+        rows = self.connection.execute(
+            'SELECT path, size, mtime_ns, result FROM scan_results WHERE mode = ? AND config_hash = ?',
+            (mode, config_hash)
+        )
+        return {path: (size, mtime_ns, result) for path, size, mtime_ns, result in rows}
+    
+    def store(self, mode: str, config_hash: str, records: Iterable[Tuple[str, int, int, List]]):
+        """
+        批量保存检测结果（没有命中的文件也要保存，下次才能跳过）
+        
+        Args:
+            mode: 分析模式
+            config_hash: 当前配置的哈希
+            records: [(相对路径, 文件大小, 修改时间, 命中项列表)]
+        """
+        try:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO scan_results (path, mode, size, mtime_ns, config_hash, result) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((path, mode, size, mtime_ns, config_hash, self.encode_items(items))
+                 for path, size, mtime_ns, items in records)
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"保存扫描缓存时出错: {e}")
+    
+    def load_listing(self) -> Dict[str, Tuple[int, List[str], List[str]]]:
+        """
+        读取上次保存的目录清单
+        
+        Returns:
+            Dict[str, Tuple[int, List[str], List[str]]]: {相对目录: (目录修改时间, [txt文件名], [子目录名])}
+        """
+        rows = self.connection.execute('SELECT path, mtime_ns, files, dirs FROM directory_listing')
+        return {path: (mtime_ns, json.loads(files), json.loads(dirs)) for path, mtime_ns, files, dirs in rows}
+    
+    def store_listing(self, listing: Dict[str, Tuple[int, List[str], List[str]]]):
+        """保存目录清单（替换上次保存的全部清单）"""
+        try:
+            self.connection.execute('DELETE FROM directory_listing')
+            self.connection.executemany(
+                'INSERT INTO directory_listing (path, mtime_ns, files, dirs) VALUES (?, ?, ?, ?)',
+                ((path, mtime_ns, json.dumps(files, ensure_ascii=False), json.dumps(dirs, ensure_ascii=False))
+                 for path, (mtime_ns, files, dirs) in listing.items())
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"保存目录清单时出错: {e}")
+    
+    def load_verdicts(self, version: str) -> List[Tuple[str, bytes, object]]:
+        """
+        读取保存的段落判定缓存（只读取与当前配置版本相同的记录）
+        
+        Returns:
+            List[Tuple[str, bytes, object]]: [(判定类型, 段落摘要, 判定结果)]，按保存顺序排列
+        """
+        rows = self.connection.execute(
+            'SELECT kind, digest, verdict FROM paragraph_verdicts WHERE version = ? ORDER BY rowid', (version,)
+        )
+        items = []
+        for kind, digest, verdict in rows:
+            value = json.loads(verdict)
+            # 元组形式的判定结果在JSON中保存为列表
+            items.append((kind, digest, tuple(value) if isinstance(value, list) else value))
+        return items
+    
+    def store_verdicts(self, version: str, items: Iterable[Tuple[str, bytes, object]]):
+        """保存段落判定缓存（替换上次保存的全部记录）"""
+        try:
+            self.connection.execute('DELETE FROM paragraph_verdicts')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO paragraph_verdicts (version, kind, digest, verdict) VALUES (?, ?, ?, ?)',
+                ((version, kind, digest, json.dumps(value)) for kind, digest, value in items)
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"保存段落判定缓存时出错: {e}")
+    
+    def load_digests(self) -> Dict[str, Tuple[int, int, bytes]]:
+        """
+        读取上次保存的文件内容哈希（用于查找重复文件）
+        
+        Returns:
+            Dict[str, Tuple[int, int, bytes]]: {相对路径: (文件大小, 修改时间, 哈希)}
+        """
+        rows = self.connection.execute('SELECT path, size, mtime_ns, digest FROM file_digests')
+        return {path: (size, mtime_ns, digest) for path, size, mtime_ns, digest in rows}
+    
+    def store_digests(self, digests: Dict[str, Tuple[int, int, bytes]]):
+        """保存文件内容哈希（替换上次保存的全部记录）"""
+        try:
+            self.connection.execute('DELETE FROM file_digests')
+            self.connection.executemany(
+                'INSERT INTO file_digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)',
+                ((path, size, mtime_ns, digest) for path, (size, mtime_ns, digest) in digests.items())
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"保存文件哈希时出错: {e}")
+    
+    def close(self):
+        """关闭数据库连接"""
+        self.connection.close()
+    
+    @staticmethod
+    def encode_items(items: List) -> str:
+        """把命中项列表编码为JSON"""
+        return json.dumps(items, ensure_ascii=False)
+    
+    @staticmethod
+    def decode_items(result: str) -> List[Hit]:
+        """把JSON还原为命中项列表（每项保存为[起始位置, 结束位置, 校验和, [关键词编号]]）"""
+        return [Hit(start, end, checksum, tuple(label_ids)) for start, end, checksum, label_ids in json.loads(result)]
+
+def make_config_hash(*parts) -> str:
+    """计算配置哈希，parts为影响检测结果的配置项（关键词列表、检测器版本等）"""
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def open_scan_cache(directory: str) -> Optional[ScanCache]:
+    """在指定目录下打开扫描缓存，目录不可写等情况下返回None（不使用缓存）"""
+    try:
+        return ScanCache(os.path.join(directory, CACHE_FILENAME))
+    except sqlite3.Error as e:
+        print(f"打开扫描缓存时出错: {e}")
+        return None
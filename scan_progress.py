@@ -0,0 +1,56 @@
+import time
+
+class ScanProgress:
+    """扫描进度，由分析线程更新，GUI主线程定时读取"""
+    
+    def __init__(self):
+        self.total_files = 0
+        self.total_bytes = 0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.indexing = False  # 是否正在遍历目录（文件总数还未知）
+        self.start_time = time.monotonic()
+    
+    def start(self):
+        """开始分析（遍历目录之前调用），文件总数在遍历目录后用set_totals设置"""
+        self.total_files = 0
+        self.total_bytes = 0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.indexing = True
+        self.start_time = time.monotonic()
+    
+    def set_totals(self, total_files: int, total_bytes: int):
+        """遍历目录结束，记录文件总数和总字节数"""
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.indexing = False
+    
+    def advance(self, file_size: int):
+        """完成一个文件"""
+        self.done_files += 1
+        self.done_bytes += file_size
+    
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return max(time.monotonic() - self.start_time, 1e-6)
+    
+    @property
+    def files_per_second(self) -> float:
+        """每秒处理的文件数"""
+        return self.done_files / self.elapsed
+    
+    @property
+    def mb_per_second(self) -> float:
+        """每秒处理的数据量（MB）"""
+        return self.done_bytes / (1024 * 1024) / self.elapsed
+    
+    @property
+    def percent(self) -> float:
+        """完成百分比"""
+        if self.indexing:
+            return 0.0
+        if not self.total_files:
+            return 100.0
+        return self.done_files * 100.0 / self.total_files
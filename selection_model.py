@@ -0,0 +1,80 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator
+
+class SelectionModel:
+    """结果的选择状态，独立于界面控件保存
+    
+    每条结果占一个字节的选择标记，同一文件的结果编号连续，按文件记录起始编号、
+    结果数和已选数。单条切换是常数时间，全选和按文件选择是整段字节的批量赋值，
+    不需要遍历界面上的行。
+    """
+    
+    def __init__(self):
+        self.flags = bytearray()  # 每条结果一个字节，1表示选中
+        self.file_starts = array('I')  # 每个文件第一条结果的编号
+        self.file_sizes = array('I')  # 每个文件的结果数
+        self.file_selected = array('I')  # 每个文件已选中的结果数
+        self.selected_count = 0
+    
+    def __len__(self) -> int:
+        return len(self.flags)
+    
+    def add_file(self, count: int, selected: bool = True):
+        """为新文件追加count条结果（文件编号按添加顺序递增）"""
+        self.file_starts.append(len(self.flags))
+        self.file_sizes.append(count)
+        self.file_selected.append(count if selected else 0)
+        self.flags.extend((b'\x01' if selected else b'\x00') * count)
+        if selected:
+            self.selected_count += count
+    
+    def file_of(self, index: int) -> int:
+        """查找一条结果所属的文件编号"""
+        return bisect_right(self.file_starts, index) - 1
+    
+    def is_selected(self, index: int) -> bool:
+        """一条结果是否选中"""
+        return self.flags[index] == 1
+    
+    def set(self, index: int, selected: bool):
+        """设置一条结果的选择状态"""
+        value = 1 if selected else 0
+        if self.flags[index] == value:
+            return
+        self.flags[index] = value
+        delta = 1 if selected else -1
+        self.file_selected[self.file_of(index)] += delta
+        self.selected_count += delta
+    
+    def toggle(self, index: int) -> bool:
+        """切换一条结果的选择状态，返回切换后的状态"""
+        selected = not self.is_selected(index)
+        self.set(index, selected)
+        return selected
+    
+    def set_all(self, selected: bool):
+        """全选或全部取消"""
+        self.flags[:] = (b'\x01' if selected else b'\x00') * len(self.flags)
+        self.file_selected = array('I', self.file_sizes) if selected else array('I', [0]) * len(self.file_sizes)
+        self.selected_count = len(self.flags) if selected else 0
+    
+    def set_file(self, file_id: int, selected: bool):
+        """选择或取消一个文件的全部结果"""
+        start, size = self.file_starts[file_id], self.file_sizes[file_id]
+        self.flags[start:start + size] = (b'\x01' if selected else b'\x00') * size
+        new_count = size if selected else 0
+        self.selected_count += new_count - self.file_selected[file_id]
+        self.file_selected[file_id] = new_count
+    
+    def set_indices(self, indices: Iterable[int], selected: bool):
+        """批量设置一组结果的选择状态（例如同一关键词的全部结果）"""
+        for index in indices:
+            self.set(index, selected)
+    
+    def selected_indices(self) -> Iterator[int]:
+        """按编号顺序产出选中的结果，跳过未选中的部分由bytearray.find在C层完成"""
+        index = self.flags.find(1)
+        while index != -1:
+            yield index
+            index = self.flags.find(1, index + 1)
@@ -0,0 +1,57 @@
+import os
+import stat
+import tempfile
+import unittest
+from batch_writer import apply_batch, write_file_atomic
+
+class WriteFileAtomicTest(unittest.TestCase):
+    """原子写入：成功时替换内容并保留权限，失败时原文件和目录都保持原样"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'a.txt')
+        with open(self.path, 'wb') as f:
+            f.write('原来的内容\n'.encode('utf-8'))
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_replaces_content_and_keeps_mode(self):
+        os.chmod(self.path, 0o640)
+        write_file_atomic(self.path, '新的内容\r\n', 'gb18030')
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), '新的内容\r\n'.encode('gb18030'))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['a.txt'])
+    
+    def test_failed_write_leaves_original_and_no_temp_file(self):
+        with self.assertRaises(UnicodeEncodeError):
+            write_file_atomic(self.path, '无法编码的字符😀', 'gbk')
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), '原来的内容\n'.encode('utf-8'))
+        self.assertEqual(os.listdir(self.temp_dir.name), ['a.txt'])
+
+class ApplyBatchTest(unittest.TestCase):
+    """批量执行：结果顺序与任务一致，单个文件失败不影响其他文件"""
+    
+    def test_outcomes_follow_task_order(self):
+        def fail():
+            raise ValueError('失败原因')
+        
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                tasks = [(f'f{index}.txt', fail if index % 3 == 0 else (lambda: None)) for index in range(10)]
+                summary = apply_batch(tasks, workers)
+                self.assertEqual([outcome.filename for outcome in summary.outcomes], [name for name, _ in tasks])
+                self.assertEqual([outcome.filename for outcome in summary.failed], ['f0.txt', 'f3.txt', 'f6.txt', 'f9.txt'])
+                self.assertEqual({outcome.message for outcome in summary.failed}, {'失败原因'})
+                self.assertEqual(len(summary.succeeded), 6)
+                self.assertFalse(summary.ok)
+    
+    def test_empty_batch_is_ok(self):
+        summary = apply_batch([])
+        self.assertTrue(summary.ok)
+        self.assertEqual(len(summary), 0)
+
+if __name__ == '__main__':
+    unittest.main()
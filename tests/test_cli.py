@@ -0,0 +1,102 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import cli
+from cli import EXIT_ERROR, EXIT_HITS, EXIT_OK, main
+
+class CliExitCodeTest(unittest.TestCase):
+    """命令行退出码：配置无法读取、明确指定的模式缺少关键词时返回EXIT_ERROR，汇总中只列出实际分析的模式"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'files')
+        os.makedirs(self.directory)
+        self.config = os.path.join(self.temp_dir.name, 'config.txt')
+        self.output = os.path.join(self.temp_dir.name, 'out.jsonl')
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, path: str, text: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    
+    def run_cli(self, *args: str):
+        """运行命令行，返回(退出码, 输出的JSON记录)"""
+        argv = ['--dir', self.directory, '--config', self.config, '--output', self.output, '--no-cache'] + list(args)
+        with contextlib.redirect_stderr(io.StringIO()):
+            exit_code = main(argv)
+        records = []
+        if os.path.exists(self.output):
+            with open(self.output, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        return exit_code, records
+    
+    def summary(self, records):
+        return [record for record in records if record['type'] == 'summary'][0]
+    
+    def test_missing_directory(self):
+        self.write(self.config, 'keywords = 删除我\n')
+        self.directory = os.path.join(self.temp_dir.name, 'missing')
+        self.assertEqual(self.run_cli()[0], EXIT_ERROR)
+    
+    def test_missing_config(self):
+        self.write(os.path.join(self.directory, 'a.txt'), '删除我\n')
+        for args in ((), ('--mode', 'keyword'), ('--mode', 'garbled')):
+            with self.subTest(args=args):
+                self.assertEqual(self.run_cli(*args), (EXIT_ERROR, []))
+    
+    def test_exit_codes_are_distinct(self):
+        codes = [value for name, value in vars(cli).items() if name.startswith('EXIT_')]
+        self.assertEqual(len(codes), len(set(codes)))
+        # 1是Python未捕获异常时的退出码，不能与有命中混淆
+        self.assertNotIn(1, codes)
+    
+    def test_undecodable_config(self):
+        with open(self.config, 'wb') as f:
+            f.write('keywords = 删除我\n'.encode('gb18030'))
+        self.assertEqual(self.run_cli('--mode', 'keyword')[0], EXIT_ERROR)
+    
+    def test_english_only_does_not_need_config(self):
+        self.write(os.path.join(self.directory, 'a.txt'), '中文\nThis is an English sentence.\n')
+        exit_code, records = self.run_cli('--mode', 'english')
+        self.assertEqual(exit_code, EXIT_HITS)
+        self.assertEqual(self.summary(records)['modes'], ['english'])
+    
+    def test_requested_mode_without_keywords(self):
+        self.write(self.config, 'check_garbled = €\n')
+        self.write(os.path.join(self.directory, 'a.txt'), '删除我\n')
+        self.assertEqual(self.run_cli('--mode', 'keyword')[0], EXIT_ERROR)
+        self.assertEqual(self.run_cli('--mode', 'keyword', '--mode', 'garbled')[0], EXIT_ERROR)
+    
+    def test_default_modes_skip_modes_without_keywords(self):
+        self.write(self.config, 'check_garbled = €\n')
+        self.write(os.path.join(self.directory, 'a.txt'), '删除我\n')
+        exit_code, records = self.run_cli()
+        self.assertEqual(exit_code, EXIT_OK)
+        summary = self.summary(records)
+        self.assertNotIn('keyword', summary['modes'])
+        self.assertNotIn('keyword', summary['hits'])
+    
+    def test_hits_and_delete(self):
+        self.write(self.config, 'keywords = 删除我\n')
+        path = os.path.join(self.directory, 'a.txt')
+        self.write(path, '保留\n删除我\n')
+        
+        exit_code, records = self.run_cli('--mode', 'keyword')
+        self.assertEqual(exit_code, EXIT_HITS)
+        self.assertEqual(self.summary(records)['hits'], {'keyword': 1})
+        
+        exit_code, records = self.run_cli('--mode', 'keyword', '--delete', '--no-undo')
+        self.assertEqual(exit_code, EXIT_OK)
+        self.assertEqual([record['success'] for record in records if record['type'] == 'deletion'], [True])
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '保留\n')
+        
+        self.assertEqual(self.run_cli('--mode', 'keyword')[0], EXIT_OK)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import duplicate_finder
+from duplicate_finder import HEAD_SIZE, DuplicateResolver, file_digest
+from file_indexer import FileEntry
+from processor import TextProcessor
+from result_store import ResultStore
+
+class DuplicateResolverTest(unittest.TestCase):
+    """重复文件判断：只有内容完全相同的文件才合并，每个文件对应内容相同的第一个文件"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, name: str, data: bytes) -> FileEntry:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        stat = os.stat(path)
+        return FileEntry(path, stat.st_size, stat.st_mtime_ns)
+    
+    def originals(self, resolver: DuplicateResolver, entries):
+        return [resolver.find_original(entry.path) for entry in entries]
+    
+    def test_small_files(self):
+        entries = [self.write('a', b'same'), self.write('b', b'diff'), self.write('c', b'same'),
+                   self.write('d', b'unique size'), self.write('e', b''), self.write('f', b''), self.write('g', b'diff')]
+        resolver = DuplicateResolver(entries)
+        # 查询顺序不影响结果：先查后面的文件
+        self.assertEqual(resolver.find_original(entries[6].path), entries[1].path)
+        self.assertEqual(self.originals(resolver, entries),
+                         [None, None, entries[0].path, None, None, None, entries[1].path])
+        self.assertFalse(resolver.may_have_copies(entries[3].path))
+        # 空文件不合并
+        self.assertFalse(resolver.may_have_copies(entries[4].path))
+    
+    def test_large_files_with_same_head(self):
+        head = b'x' * HEAD_SIZE
+        entries = [self.write('a', head + b'tail1'), self.write('b', head + b'tail2'),
+                   self.write('c', head + b'tail2'), self.write('d', head + b'tail1')]
+        resolver = DuplicateResolver(entries)
+        self.assertEqual(self.originals(resolver, entries), [None, None, entries[1].path, entries[0].path])
+    
+    def test_unique_sizes_are_not_read(self):
+        entries = [self.write('a', b'1'), self.write('b', b'22'), self.write('c', b'333')]
+        with mock.patch.object(duplicate_finder, 'file_digest', side_effect=AssertionError):
+            resolver = DuplicateResolver(entries)
+            self.assertEqual(self.originals(resolver, entries), [None, None, None])
+    
+    def test_known_digests_are_reused(self):
+        entries = [self.write('a', b'same'), self.write('b', b'same')]
+        known = {entry.path: (entry.size, entry.mtime_ns, file_digest(entry.path)) for entry in entries}
+        with mock.patch.object(duplicate_finder, 'file_digest', side_effect=AssertionError):
+            resolver = DuplicateResolver(entries, known)
+            self.assertEqual(self.originals(resolver, entries), [None, entries[0].path])
+        self.assertEqual(resolver.digests, known)
+        
+        # 修改时间变化后重新计算
+        stale = {path: (size, mtime_ns - 1, digest) for path, (size, mtime_ns, digest) in known.items()}
+        self.assertEqual(DuplicateResolver(entries, stale).digests, {})
+    
+    def test_unreadable_file_is_unique(self):
+        entries = [self.write('a', b'same'), FileEntry(os.path.join(self.temp_dir.name, 'missing'), 4, 0),
+                   self.write('c', b'same')]
+        resolver = DuplicateResolver(entries)
+        self.assertEqual(self.originals(resolver, entries), [None, None, entries[0].path])
+
+class DuplicateScanTest(unittest.TestCase):
+    """合并重复文件后的分析结果与逐个分析完全相同，合并显示的副本删除时同样被处理"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'files')
+        os.makedirs(os.path.join(self.directory, 'sub'))
+        self.config = os.path.join(self.temp_dir.name, 'config.txt')
+        with open(self.config, 'w', encoding='utf-8') as f:
+            f.write('keywords = 删除我\n\ncheck_garbled = €\n')
+        contents = {
+            'a.txt': '保留\n删除我 一\nThis is an English sentence.\n',
+            'b.txt': '保留\n删除我 二\n',
+            'c.txt': '乱码€\n删除我\n',
+        }
+        for directory in ('', 'sub'):
+            for name, text in contents.items():
+                self.write(os.path.join(directory, name), text)
+        self.write('a_copy.txt', contents['a.txt'])
+        self.write('same_size.txt', contents['a.txt'].replace('一', '三'))
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, name: str, text: str):
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+    
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.directory, name), 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+    
+    def make_processor(self, detect_duplicates: bool, workers: int = 1) -> TextProcessor:
+        processor = TextProcessor()
+        processor.set_files_directory(self.directory)
+        processor.config_manager.set_config_path(self.config)
+        processor.set_parallel_options(workers, chunk_size=1)
+        processor.use_scan_cache = False
+        processor.write_workers = 1
+        processor.detect_duplicates = detect_duplicates
+        self.addCleanup(processor.close)
+        return processor
+    
+    def analyze(self, processor: TextProcessor):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return list(processor.iter_analysis())
+    
+    def test_results_match_scan_without_dedup(self):
+        expected = self.analyze(self.make_processor(False))
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                processor = self.make_processor(True, workers)
+                self.assertEqual(self.analyze(processor), expected)
+                group = processor.duplicate_groups['a.txt']
+                self.assertEqual(sorted(group), ['a.txt', 'a_copy.txt', os.path.join('sub', 'a.txt')])
+                self.assertEqual(group[0], min(group, key=[path for path, _ in expected].index))
+                self.assertNotIn('same_size.txt', processor.duplicate_groups)
+    
+    def test_grouped_deletion_applies_to_every_copy(self):
+        processor = self.make_processor(True)
+        store = ResultStore('keyword')
+        for filename, file_result in self.analyze(processor):
+            group = processor.duplicate_groups.get(filename)
+            if 'keyword' in file_result and not (group and store.add_copy(group, filename)):
+                store.add_file(filename, file_result['keyword'], processor.result_labels['keyword'])
+        self.assertEqual(store.copy_count, 4)
+        
+        selected = store.get_selected_items()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(processor.apply_deletion('keyword', selected).ok)
+        for name in ('a.txt', 'a_copy.txt', os.path.join('sub', 'a.txt')):
+            self.assertEqual(self.read(name), '保留\nThis is an English sentence.\n')
+        for name in ('b.txt', os.path.join('sub', 'b.txt')):
+            self.assertEqual(self.read(name), '保留\n')
+        self.assertEqual(self.read('same_size.txt'), '保留\nThis is an English sentence.\n')
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            updates = processor.reanalyze_files(selected)
+        self.assertEqual(updates['a.txt'], updates['a_copy.txt'])
+        self.assertNotIn('keyword', updates['a.txt'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import random
+import re
+import unittest
+from english_detector import EnglishDetector
+from verdict_cache import VerdictCache
+
+# 优化前（user-014之前）的判定规则：先去掉HTML标签，再查找"字母+空白+字母"
+_BASELINE_TAG = re.compile(r'<[^>]*>')
+_BASELINE_SENTENCE = re.compile(r'[a-zA-Z]+\s+[a-zA-Z]+')
+
+def baseline_contains_english_sentence(text: str) -> bool:
+    """优化前的contains_english_sentence，作为判定结果的基准"""
+    if not text or not text.strip():
+        return False
+    return _BASELINE_SENTENCE.search(_BASELINE_TAG.sub('', text)) is not None
+
+# 固定的边界用例：(文本, 期望的判定)，期望值与基准规则一致
+GOLDEN_CASES = [
+    # 空文本和空白
+    ('', False),
+    ('   ', False),
+    ('　', False),
+    # 普通文本
+    ('hello', False),
+    ('hello world', True),
+    ('a b', True),
+    ('a_b c', True),
+    ('a1 b', False),
+    ('中文 hello', False),
+    ('hello 中文 world', False),
+    ('é è', False),
+    ('ＡＢ ＣＤ', False),
+    # Unicode空白：\s匹配的空白都算单词分隔，零宽空格不算
+    ('A\tB', True),
+    ('a　b', True),
+    ('a\xa0b', True),
+    ('a b', True),
+    ('a​b', False),
+    ('a\nb', True),
+    # 标签内的英文不算，去掉标签后相邻的文字会连在一起
+    ('<td style="border:1px solid black;">', False),
+    ('<span lang="en">中文</span>', False),
+    ('中文<div class="content main">正文', False),
+    ('<a href="x y">hello world</a>', True),
+    ('<p>Hi there</p>', True),
+    ('foo <b>bar</b>', True),
+    ('foo<b>bar</b>', False),
+    ('foo<b> </b>bar', True),
+    ('It<i> </i>works', True),
+    ('a<br>b', False),
+    ('<a>b</a> <c>d</c>', True),
+    ('<>a b', True),
+    ('a<>b c', True),
+    ('<<>> x y', True),
+    # 没有闭合的'<'和单独的'>'
+    ('a < b', False),
+    ('x <y z', True),
+    ('hello <world', False),
+    ('<unclosed tag text', True),
+    ('<x y', True),
+    ('x<', False),
+    ('x y<', True),
+    ('closed> a b', True),
+    ('a> b', False),
+    ('<<a b>', False),
+    ('<a <b c> d', False),
+]
+
+# 随机用例的组成部分，覆盖标签、未闭合的'<'、各种空白和非ASCII字母
+_FRAGMENTS = ['a', 'Zb', 'hello', 'x1', '中文', 'é', ' ', '\t', '　', '\xa0', '​', '<', '>', '<b>', '</b>',
+              '<td style="a b">', '<>', '"', '_', '.', '\n']
+
+class EnglishDetectorGoldenTest(unittest.TestCase):
+    """英文句子判定必须与优化前的规则完全一致"""
+    
+    def setUp(self):
+        self.detector = EnglishDetector()
+    
+    def test_golden_cases_match_baseline(self):
+        for text, expected in GOLDEN_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(baseline_contains_english_sentence(text), expected)
+                self.assertEqual(self.detector.contains_english_sentence(text), expected)
+    
+    def test_random_texts_match_baseline(self):
+        rng = random.Random(14)
+        for _ in range(20000):
+            text = ''.join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 12)))
+            with self.subTest(text=text):
+                self.assertEqual(self.detector.contains_english_sentence(text), baseline_contains_english_sentence(text))
+    
+    def test_file_scan_matches_per_paragraph_verdicts(self):
+        # find_english_spans在整个文件上扫描，结果必须与逐段判定相同
+        rng = random.Random(15)
+        for _ in range(2000):
+            lines = [''.join(rng.choice(_FRAGMENTS[:-1]) for _ in range(rng.randint(0, 8))) for _ in range(rng.randint(0, 6))]
+            text = rng.choice(['\n', '\r\n']).join(lines)
+            expected = [(start, end, paragraph) for start, end, paragraph in self.detector.extract_paragraph_spans(text)
+                        if baseline_contains_english_sentence(paragraph)]
+            with self.subTest(text=text):
+                self.assertEqual(self.detector.find_english_spans(text), expected)
+                self.assertEqual(self.detector.find_english_spans(text, VerdictCache()), expected)
+    
+    def test_paragraph_mask_matches_per_paragraph_verdicts(self):
+        paragraphs = [text for text, _ in GOLDEN_CASES]
+        expected = [int(baseline_contains_english_sentence(paragraph)) for paragraph in paragraphs]
+        self.assertEqual(list(self.detector.english_sentence_mask(paragraphs)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
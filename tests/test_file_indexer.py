@@ -0,0 +1,144 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from cli import main
+from file_indexer import FileIndexer
+from scan_cache import open_scan_cache
+
+class FileIndexerTest(unittest.TestCase):
+    """目录索引：顺序与os.walk相同，支持排除模式、最大深度和复用上次的目录清单"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        for rel_path in ('a.txt', 'B.TXT', 'note.md', 'sub/c.txt', 'sub/deep/d.txt', 'sub/deep/e.log.txt',
+                         'skip/f.txt', 'other/g.txt', 'other/skip/h.txt'):
+            self.write(rel_path, rel_path)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, rel_path: str, text: str):
+        path = os.path.join(self.root, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    
+    def scan(self, **options):
+        indexer = FileIndexer(self.root, **options)
+        return indexer, [os.path.relpath(entry.path, self.root).replace(os.sep, '/') for entry in indexer.scan()]
+    
+    def walk(self):
+        """os.walk给出的参考顺序"""
+        paths = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.lower().endswith('.txt'):
+                    paths.append(os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/'))
+        return paths
+    
+    def test_order_matches_os_walk(self):
+        _, paths = self.scan()
+        self.assertEqual(paths, self.walk())
+        self.assertIn('B.TXT', paths)
+        self.assertNotIn('note.md', paths)
+    
+    def test_entries_carry_size_and_mtime(self):
+        indexer = FileIndexer(self.root)
+        for entry in indexer.scan():
+            stat = os.stat(entry.path)
+            self.assertEqual((entry.size, entry.mtime_ns), (stat.st_size, stat.st_mtime_ns))
+    
+    def test_exclude_patterns(self):
+        # 目录名匹配时不再进入，任意深度的同名目录都排除
+        _, paths = self.scan(exclude_patterns=['skip'])
+        self.assertEqual(paths, [path for path in self.walk() if 'skip/' not in path])
+        # 按相对路径匹配，只排除该目录
+        _, paths = self.scan(exclude_patterns=['other/skip'])
+        self.assertNotIn('other/skip/h.txt', paths)
+        self.assertIn('skip/f.txt', paths)
+        # 按文件名匹配
+        _, paths = self.scan(exclude_patterns=['*.log.txt', 'a.*'])
+        self.assertNotIn('sub/deep/e.log.txt', paths)
+        self.assertNotIn('a.txt', paths)
+        self.assertIn('sub/deep/d.txt', paths)
+        # Windows风格的分隔符
+        _, paths = self.scan(exclude_patterns=['sub\\deep'])
+        self.assertNotIn('sub/deep/d.txt', paths)
+        self.assertIn('sub/c.txt', paths)
+    
+    def test_max_depth(self):
+        _, paths = self.scan(max_depth=0)
+        self.assertEqual(sorted(paths), ['B.TXT', 'a.txt'])
+        _, paths = self.scan(max_depth=1)
+        self.assertEqual(paths, [path for path in self.walk() if path.count('/') <= 1])
+    
+    @unittest.skipUnless(hasattr(os, 'symlink'), '不支持符号链接')
+    def test_directory_symlinks_are_not_followed(self):
+        try:
+            os.symlink(os.path.join(self.root, 'sub'), os.path.join(self.root, 'link'), target_is_directory=True)
+        except OSError:
+            self.skipTest('无法创建符号链接')
+        _, paths = self.scan()
+        self.assertFalse(any(path.startswith('link/') for path in paths))
+    
+    def test_listing_reuse(self):
+        indexer, paths = self.scan()
+        listing = indexer.listing
+        
+        # 没有任何变化：全部目录复用清单，结果相同
+        reused, reused_paths = self.scan(listing=listing)
+        self.assertEqual(reused_paths, paths)
+        self.assertEqual(reused.reused_directories, len(listing))
+        
+        # 修改文件内容不改变目录的修改时间，但大小和修改时间会重新读取
+        self.write('sub/c.txt', 'changed content')
+        entries = FileIndexer(self.root, listing=listing).scan()
+        changed = [entry for entry in entries if entry.path.endswith('c.txt')][0]
+        self.assertEqual(changed.size, len('changed content'))
+        
+        # 新增和删除文件改变目录的修改时间，该目录重新列出
+        self.write('sub/new.txt', 'new')
+        os.remove(os.path.join(self.root, 'other', 'g.txt'))
+        updated, updated_paths = self.scan(listing=listing)
+        self.assertEqual(updated_paths, self.walk())
+        self.assertIn('sub/new.txt', updated_paths)
+        self.assertNotIn('other/g.txt', updated_paths)
+        self.assertEqual(updated.reused_directories, len(listing) - 2)
+    
+    def test_listing_reuse_with_exclusions(self):
+        indexer, paths = self.scan(exclude_patterns=['deep'], max_depth=1)
+        _, reused_paths = self.scan(exclude_patterns=['deep'], max_depth=1, listing=indexer.listing)
+        self.assertEqual(reused_paths, paths)
+
+class PersistListingTest(unittest.TestCase):
+    """命令行的--persist-listing把目录清单保存到扫描缓存，下次运行时复用"""
+    
+    def test_cli_persists_listing(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = os.path.join(temp_dir, 'files')
+            os.makedirs(os.path.join(directory, 'sub'))
+            with open(os.path.join(directory, 'sub', 'a.txt'), 'w', encoding='utf-8') as f:
+                f.write('This is an English sentence.\n')
+            argv = ['--dir', directory, '--mode', 'english', '--output', os.path.join(temp_dir, 'out.jsonl')]
+            
+            with contextlib.redirect_stderr(io.StringIO()):
+                main(argv)
+            cache = open_scan_cache(directory)
+            try:
+                self.assertEqual(cache.load_listing(), {})
+            finally:
+                cache.close()
+            
+            with contextlib.redirect_stderr(io.StringIO()):
+                main(argv + ['--persist-listing'])
+            cache = open_scan_cache(directory)
+            try:
+                self.assertEqual(sorted(cache.load_listing()), ['.', 'sub'])
+            finally:
+                cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
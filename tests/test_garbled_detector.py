@@ -0,0 +1,118 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+import garbled_detector
+from config_manager import ConfigManager
+from garbled_detector import DEFAULT_GARBLED_THRESHOLD, MIN_SAMPLE_CHARS, SAMPLE_CHARS, GarbledDetector, garbled_score
+
+class FindInFileTest(unittest.TestCase):
+    """按块读取的检测结果与读取整个文件后的find_in_text相同，关键词或多字节字符跨块时也一样"""
+    
+    ALPHABET = 'ab€╋中\n'
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'a.txt')
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def check(self, detector: GarbledDetector, text: str, encoding: str):
+        with open(self.path, 'wb') as f:
+            f.write(text.encode(encoding))
+        self.assertEqual(detector.find_in_file(self.path, encoding), detector.find_in_text(text))
+    
+    def test_marker_split_across_chunks(self):
+        detector = GarbledDetector(['€╋', '中中'], threshold=0)
+        for chunk_size in range(1, 12):
+            for offset in range(8):
+                text = 'a' * offset + '€╋' + 'b' * 5
+                for encoding in ('utf-8', 'gb18030'):
+                    with self.subTest(chunk_size=chunk_size, offset=offset, encoding=encoding), \
+                         mock.patch.object(garbled_detector, 'CHUNK_SIZE', chunk_size):
+                        self.check(detector, text, encoding)
+                        self.assertEqual(detector.find_in_file(self.path, encoding), 0)
+    
+    def test_earliest_marker_when_keywords_overlap(self):
+        # 较短的关键词在块内完整出现，而更靠前的较长关键词跨到下一块：应返回更靠前的关键词
+        detector = GarbledDetector(['b€', 'ab€╋'], threshold=0)
+        for chunk_size in range(1, 16):
+            with self.subTest(chunk_size=chunk_size), mock.patch.object(garbled_detector, 'CHUNK_SIZE', chunk_size):
+                self.check(detector, 'xxab€╋yy', 'utf-8')
+    
+    def test_random_texts(self):
+        rng = random.Random(10)
+        for _ in range(1500):
+            keywords = [''.join(rng.choice(self.ALPHABET[:-1]) for _ in range(rng.randint(1, 3)))
+                        for _ in range(rng.randint(1, 3))]
+            text = ''.join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 40)))
+            encoding = rng.choice(['utf-8', 'gb18030'])
+            chunk_size = rng.randint(1, 9)
+            with self.subTest(keywords=keywords, text=text, encoding=encoding, chunk_size=chunk_size), \
+                 mock.patch.object(garbled_detector, 'CHUNK_SIZE', chunk_size):
+                self.check(GarbledDetector(keywords, threshold=0), text, encoding)
+    
+    def test_score_sample_spans_chunks(self):
+        detector = GarbledDetector([], threshold=0.05)
+        for text in ('正常的中文内容' * 20, '正常' * 20 + '╋' * 10, 'ｱ' * 40):
+            for chunk_size in (1, 3, 7):
+                with self.subTest(text=text[:10], chunk_size=chunk_size), \
+                     mock.patch.object(garbled_detector, 'CHUNK_SIZE', chunk_size):
+                    self.check(detector, text, 'utf-8')
+    
+    def test_undecodable_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'abc\xff\xfe')
+        detector = GarbledDetector(['€'])
+        self.assertEqual(detector.find_in_file(self.path, 'utf-8'), garbled_detector.READ_FAILED)
+
+class ThresholdTest(unittest.TestCase):
+    """统计评分：可疑字符按权重计入比例，达到阈值才算乱码，阈值0关闭评分，样本太短不评分"""
+    
+    def test_score_weights(self):
+        self.assertEqual(garbled_score('中' * 100), 0)
+        self.assertEqual(garbled_score('╋' * 10 + '中' * 90), 0.1)
+        # 扩展A区汉字的权重是0.5
+        self.assertEqual(garbled_score('\u3400' * 10 + '中' * 90), 0.05)
+        # 制表符和换行符不是可疑字符
+        self.assertEqual(garbled_score('\t\n' * 50), 0)
+    
+    def test_threshold_boundary(self):
+        detector = GarbledDetector([], threshold=0.1)
+        self.assertTrue(detector.is_garbled_sample('╋' * 10 + '中' * 90))
+        self.assertFalse(detector.is_garbled_sample('╋' * 9 + '中' * 91))
+        self.assertEqual(detector.find_in_text('╋' * 10 + '中' * 90), detector.score_id)
+        self.assertIsNone(detector.find_in_text('╋' * 9 + '中' * 91))
+    
+    def test_zero_threshold_disables_scoring(self):
+        detector = GarbledDetector([], threshold=0)
+        self.assertFalse(detector.is_garbled_sample('╋' * 100))
+        self.assertIsNone(detector.find_in_text('╋' * 100))
+    
+    def test_short_samples_are_not_scored(self):
+        detector = GarbledDetector([], threshold=0.1)
+        self.assertIsNone(garbled_score('╋' * (MIN_SAMPLE_CHARS - 1)))
+        self.assertFalse(detector.is_garbled_sample('╋' * (MIN_SAMPLE_CHARS - 1)))
+        self.assertTrue(detector.is_garbled_sample('╋' * MIN_SAMPLE_CHARS))
+    
+    def test_only_sample_prefix_is_scored(self):
+        detector = GarbledDetector([], threshold=0.1)
+        self.assertFalse(detector.is_garbled_sample('中' * SAMPLE_CHARS + '╋' * SAMPLE_CHARS))
+    
+    def test_config_threshold(self):
+        parse = ConfigManager.parse_config
+        self.assertEqual(parse('check_garbled = €\n').garbled_threshold, DEFAULT_GARBLED_THRESHOLD)
+        self.assertEqual(parse('garbled_threshold = 0.2\n').garbled_threshold, 0.2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(parse('garbled_threshold = x\n').garbled_threshold, DEFAULT_GARBLED_THRESHOLD)
+            with tempfile.TemporaryDirectory() as directory:
+                # 没有配置文件时不做统计评分
+                manager = ConfigManager(os.path.join(directory, 'missing.txt'))
+                self.assertEqual(manager.get_snapshot().garbled_threshold, 0)
+
+if __name__ == '__main__':
+    unittest.main()
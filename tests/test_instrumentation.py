@@ -0,0 +1,85 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from instrumentation import Instrumentation, metrics
+from processor import TextProcessor
+
+class InstrumentationMergeTest(unittest.TestCase):
+    """合并工作进程的统计：耗时和计数累加，最慢文件只保留最慢的几个"""
+    
+    def test_merge_adds_up(self):
+        worker = Instrumentation(slowest_count=2)
+        worker.enable()
+        with worker.stage('read'):
+            pass
+        worker.count('files_analyzed', 3)
+        worker.record_file('a.txt', 0.5)
+        worker.record_file('b.txt', 0.1)
+        
+        parent = Instrumentation(slowest_count=2)
+        parent.enable()
+        parent.count('files_analyzed', 1)
+        parent.record_file('c.txt', 0.3)
+        parent.merge(worker.snapshot())
+        parent.merge(worker.snapshot())
+        
+        summary = parent.summary()
+        self.assertEqual(summary['counters'], {'files_analyzed': 7})
+        self.assertEqual(summary['stages']['read']['calls'], 2)
+        self.assertEqual([item['path'] for item in summary['slowest_files']], ['a.txt', 'a.txt'])
+    
+    def test_merge_ignored_when_disabled(self):
+        worker = Instrumentation()
+        worker.enable()
+        worker.count('files_analyzed')
+        parent = Instrumentation()
+        parent.merge(worker.snapshot())
+        self.assertEqual(parent.summary()['counters'], {})
+
+class ParallelMetricsTest(unittest.TestCase):
+    """多进程扫描时工作进程中的阶段和计数也计入统计，计数与顺序扫描相同"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'files')
+        os.makedirs(self.directory)
+        self.config = os.path.join(self.temp_dir.name, 'config.txt')
+        with open(self.config, 'w', encoding='utf-8') as f:
+            f.write('keywords = 删除我\n\ncheck_garbled = €\n')
+        for index in range(40):
+            with open(os.path.join(self.directory, f'{index:02d}.txt'), 'w', encoding='utf-8') as f:
+                f.write(f'第{index}个文件\n删除我 {index}\nThis is sentence number {index}.\n')
+    
+    def tearDown(self):
+        metrics.enable(False)
+        metrics.reset()
+        self.temp_dir.cleanup()
+    
+    def summary(self, workers: int):
+        processor = TextProcessor()
+        processor.set_files_directory(self.directory)
+        processor.config_manager.set_config_path(self.config)
+        processor.use_scan_cache = False
+        processor.set_parallel_options(workers, chunk_size=4)
+        metrics.enable()
+        metrics.reset()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                list(processor.iter_analysis())
+        finally:
+            processor.close()
+        return metrics.summary()
+    
+    def test_worker_metrics_are_merged(self):
+        sequential = self.summary(1)
+        parallel = self.summary(2)
+        self.assertEqual(parallel['counters'], sequential['counters'])
+        self.assertEqual(parallel['counters']['files_analyzed'], 40)
+        for stage in ('read', 'decode', 'keyword', 'english', 'garbled'):
+            self.assertEqual(parallel['stages'][stage]['calls'], sequential['stages'][stage]['calls'], stage)
+        self.assertEqual(len(parallel['slowest_files']), len(sequential['slowest_files']))
+
+if __name__ == '__main__':
+    unittest.main()
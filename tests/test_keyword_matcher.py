@@ -0,0 +1,66 @@
+import random
+import unittest
+from analysis_result import Hit
+from file_analyzer import FileAnalyzer, paragraph_checksum
+from keyword_matcher import KeywordMatcher, unique_keywords
+
+def naive_matches(keywords, text):
+    """逐个关键词用str.find查找的参考实现，结果为(起始位置, 关键词编号)的集合"""
+    matches = set()
+    for index, keyword in enumerate(unique_keywords(keywords)):
+        position = text.find(keyword)
+        while position != -1:
+            matches.add((position, index))
+            position = text.find(keyword, position + 1)
+    return matches
+
+def naive_keyword_hits(keywords, content):
+    """逐行判断是否包含关键词的参考实现"""
+    keywords = unique_keywords(keywords)
+    hits = []
+    start = 0
+    for line in content.split('\n'):
+        keyword_ids = tuple(index for index, keyword in enumerate(keywords) if keyword in line)
+        if keyword_ids:
+            hits.append(Hit(start, start + len(line), paragraph_checksum(line.strip()), keyword_ids))
+        start += len(line) + 1
+    return hits
+
+class KeywordMatcherTest(unittest.TestCase):
+    """自动机的命中必须与逐个关键词查找完全一致，包括重叠、互为前缀或后缀的关键词"""
+    
+    ALPHABET = 'ab图片此处\r\n 。'
+    
+    def random_text(self, rng: random.Random, length: int) -> str:
+        return ''.join(rng.choice(self.ALPHABET) for _ in range(length))
+    
+    def test_matches_agree_with_naive_search(self):
+        rng = random.Random(11)
+        for _ in range(2000):
+            keywords = [self.random_text(rng, rng.randint(1, 4)).replace('\n', 'a').replace(' ', 'b')
+                        for _ in range(rng.randint(1, 6))]
+            text = self.random_text(rng, rng.randint(0, 80))
+            with self.subTest(keywords=keywords, text=text):
+                matcher = KeywordMatcher(keywords)
+                self.assertEqual(set(matcher.iter_matches(text)), naive_matches(keywords, text))
+                expected = sorted({index for _, index in naive_matches(keywords, text)})
+                self.assertEqual(matcher.find_keyword_ids(text), tuple(expected))
+    
+    def test_duplicate_and_empty_keywords(self):
+        matcher = KeywordMatcher(['图片', '', '图片', '片'])
+        self.assertEqual(matcher.keywords, ['图片', '片'])
+        self.assertEqual(matcher.find_keywords('展示图片'), ['图片', '片'])
+        self.assertEqual(list(KeywordMatcher([]).iter_matches('图片')), [])
+    
+    def test_keyword_hits_agree_with_line_scan(self):
+        rng = random.Random(12)
+        for _ in range(2000):
+            keywords = [self.random_text(rng, rng.randint(1, 3)).replace('\n', 'a').replace(' ', 'b').replace('\r', 'b')
+                        for _ in range(rng.randint(1, 5))]
+            content = self.random_text(rng, rng.randint(0, 120))
+            with self.subTest(keywords=keywords, content=content):
+                analyzer = FileAnalyzer(keywords, [])
+                self.assertEqual(analyzer.find_keyword_hits(content), naive_keyword_hits(keywords, content))
+
+if __name__ == '__main__':
+    unittest.main()
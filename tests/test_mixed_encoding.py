@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from encoding_detector import SNIFF_SIZE, EncodingDetector
+from file_analyzer import FileAnalyzer
+
+class MixedEncodingTest(unittest.TestCase):
+    """开头SNIFF_SIZE个字节判断出的编码只是猜测：之后出现的GB18030内容中的关键词和乱码关键词也必须找到"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # 开头是纯ASCII（按UTF-8可以解码），关键词在SNIFF_SIZE之后，以GB18030编码
+        self.head = ('plain ascii line\n' * (SNIFF_SIZE // 17 + 1)).encode('ascii')
+        self.path = os.path.join(self.temp_dir.name, 'mixed.txt')
+        with open(self.path, 'wb') as f:
+            f.write(self.head + '前文\n此处省略若干字\n后文€'.encode('gb18030'))
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_sniff_only_sees_ascii_head(self):
+        self.assertGreater(len(self.head), SNIFF_SIZE)
+        self.assertEqual(EncodingDetector().detect(self.path), 'utf-8')
+    
+    def test_keyword_after_sniff_window(self):
+        result = FileAnalyzer(['此处省略'], []).analyze_file(self.path, ['keyword'])
+        hits = result.get('keyword', [])
+        self.assertEqual(len(hits), 1)
+        with open(self.path, 'rb') as f:
+            content = f.read().decode('gb18030')
+        self.assertEqual(content[hits[0].start:hits[0].end], '此处省略若干字')
+    
+    def test_garbled_keyword_after_sniff_window(self):
+        result = FileAnalyzer([], ['€'], garbled_threshold=0).analyze_file(self.path, ['garbled'])
+        self.assertEqual([hit.label_ids for hit in result.get('garbled', [])], [(0,)])
+
+if __name__ == '__main__':
+    unittest.main()
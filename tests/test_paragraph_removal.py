@@ -0,0 +1,115 @@
+import os
+import random
+import tempfile
+import unittest
+from file_analyzer import paragraph_checksum
+from processor import TextProcessor
+
+def expected_after_removal(content: str, removed_lines: set) -> str:
+    """
+    按行删除的期望结果：删除一行时连同行尾的换行符一起删除；最后一行没有换行符时删除它前面的换行符
+    （前一行也被删除时，该换行符已经随前一行删除）
+    """
+    lines = content.split('\n')
+    last = len(lines) - 1
+    pieces = [line + '\n' for line in lines[:-1]] + [lines[-1]]
+    kept = [piece for index, piece in enumerate(pieces) if index not in removed_lines]
+    if last in removed_lines and last > 0 and last - 1 not in removed_lines and kept:
+        kept[-1] = kept[-1][:-2] if kept[-1].endswith('\r\n') else kept[-1][:-1]
+    return ''.join(kept)
+
+class ParagraphRemovalTest(unittest.TestCase):
+    """按分析时记录的位置删除段落：只切除选中的行，其余内容逐字节保持不变"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.processor = TextProcessor()
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, data: bytes, name: str = 'a.txt') -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    
+    def read(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def spans_for(self, content: str, line_numbers: set):
+        """指定行的删除项 (起始位置, 结束位置, 段落校验和)"""
+        spans = []
+        start = 0
+        for number, line in enumerate(content.split('\n')):
+            end = start + len(line)
+            if number in line_numbers:
+                spans.append((start, end, paragraph_checksum(line.strip())))
+            start = end + 1
+        return spans
+    
+    def check_removal(self, content: str, line_numbers: set, encoding: str = 'utf-8'):
+        path = self.write(content.encode(encoding))
+        self.assertTrue(self.processor.remove_paragraphs_from_file(path, self.spans_for(content, line_numbers)))
+        self.assertEqual(self.read(path), expected_after_removal(content, line_numbers).encode(encoding))
+    
+    def test_removes_whole_lines_and_keeps_the_rest(self):
+        self.check_removal('第一段\n\n  缩进的第二段\t\n第三段\n', {2})
+        self.check_removal('第一段\n第二段\n第三段\n', {0, 1, 2})
+        self.check_removal('第一段\n第二段\n第三段\n', {0, 2})
+    
+    def test_last_line_without_newline(self):
+        self.check_removal('第一段\n第二段', {1})
+        self.check_removal('第一段\r\n第二段', {1})
+        self.check_removal('第一段\n第二段\n第三段', {1, 2})
+        self.check_removal('唯一的一段', {0})
+    
+    def test_crlf_lines(self):
+        self.check_removal('第一段\r\n第二段\r\n\r\n第三段\r\n', {1})
+        self.check_removal('第一段\r\n第二段\n第三段\r\n', {0, 2})
+    
+    def test_keeps_file_encoding(self):
+        self.check_removal('中文第一段\n要删除的段落\n中文第三段\n', {1}, 'gb18030')
+        path = self.write(b'\xef\xbb\xbf' + '保留\n删除\n'.encode('utf-8'))
+        self.assertTrue(self.processor.remove_paragraphs_from_file(path, self.spans_for('保留\n删除\n', {1})))
+        self.assertEqual(self.read(path), b'\xef\xbb\xbf' + '保留\n'.encode('utf-8'))
+    
+    def test_random_selections(self):
+        rng = random.Random(5)
+        pieces = ['中文', 'abc', ' ', '\t', '\r', '此处省略']
+        for _ in range(300):
+            lines = [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(1, 8))]
+            content = '\n'.join(lines)
+            # 只有去掉首尾空白后不为空的行才是段落
+            paragraph_lines = [number for number, line in enumerate(lines) if line.strip()]
+            if not paragraph_lines:
+                continue
+            selected = set(rng.sample(paragraph_lines, rng.randint(1, len(paragraph_lines))))
+            with self.subTest(content=content, selected=selected):
+                self.check_removal(content, selected)
+    
+    def test_refuses_when_content_does_not_match(self):
+        content = '第一段\n第二段\n'
+        path = self.write(content.encode('utf-8'))
+        start, end, _ = self.spans_for(content, {1})[0]
+        self.assertFalse(self.processor.remove_paragraphs_from_file(path, [(start, end, paragraph_checksum('别的段落'))]))
+        self.assertEqual(self.read(path), content.encode('utf-8'))
+    
+    def test_refuses_when_file_changed_after_analysis(self):
+        content = '第一段\n第二段\n'
+        path = self.write(content.encode('utf-8'))
+        stat = os.stat(path)
+        self.assertFalse(self.processor.remove_paragraphs_from_file(
+            path, self.spans_for(content, {1}), (stat.st_size + 1, stat.st_mtime_ns)))
+        self.assertEqual(self.read(path), content.encode('utf-8'))
+    
+    def test_refuses_files_with_undecodable_bytes(self):
+        data = '第一段\n第二段\n'.encode('utf-8') + b'\xff\xfe\x80\n'
+        path = self.write(data)
+        content = data.decode('utf-8', errors='replace')
+        self.assertFalse(self.processor.remove_paragraphs_from_file(path, self.spans_for(content, {0})))
+        self.assertEqual(self.read(path), data)
+
+if __name__ == '__main__':
+    unittest.main()
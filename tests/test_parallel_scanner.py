@@ -0,0 +1,90 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+from file_analyzer import FileAnalyzer
+from parallel_scanner import ParallelScanner
+from processor import TextProcessor
+
+KEYWORDS = ['删除我', '图片', 'AI']
+GARBLED_KEYWORDS = ['€']
+LINES = ['普通的一行', '删除我', '展示图片', '一个AI写的', 'This is an English sentence.', '乱码€', '', '  ']
+
+class ParallelScannerTest(unittest.TestCase):
+    """多进程扫描的结果和顺序与顺序扫描完全相同，包括部分文件来自扫描缓存的情况"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'files')
+        self.config = os.path.join(self.temp_dir.name, 'config.txt')
+        with open(self.config, 'w', encoding='utf-8') as f:
+            f.write(f"keywords = {' '.join(KEYWORDS)}\n\ncheck_garbled = {' '.join(GARBLED_KEYWORDS)}\n")
+        self.rng = random.Random(3)
+        self.paths = []
+        for index in range(60):
+            rel_path = os.path.join(f'd{index % 4}', f'{index:03d}.txt')
+            self.paths.append(os.path.join(self.directory, rel_path))
+            self.write(rel_path)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, rel_path: str):
+        path = os.path.join(self.directory, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        text = '\n'.join(self.rng.choice(LINES) for _ in range(self.rng.randint(0, 12)))
+        with open(path, 'w', encoding=self.rng.choice(['utf-8', 'gb18030']), newline='') as f:
+            f.write(text)
+    
+    def analyze(self, workers: int, chunk_size: int = 4, use_cache: bool = False):
+        processor = TextProcessor()
+        processor.set_files_directory(self.directory)
+        processor.config_manager.set_config_path(self.config)
+        processor.set_parallel_options(workers, chunk_size)
+        processor.use_scan_cache = use_cache
+        processor.detect_duplicates = False
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return list(processor.iter_analysis())
+        finally:
+            processor.close()
+    
+    def test_scan_matches_sequential_analysis(self):
+        analyzer = FileAnalyzer(KEYWORDS, GARBLED_KEYWORDS)
+        modes = [['keyword'], ['english'], ['garbled'], ['keyword', 'english', 'garbled']]
+        tasks = [(path, modes[index % len(modes)]) for index, path in enumerate(self.paths)]
+        expected = [(path, analyzer.analyze_file(path, task_modes)) for path, task_modes in tasks]
+        
+        for workers, chunk_size in ((2, 1), (2, 7), (3, 64)):
+            with self.subTest(workers=workers, chunk_size=chunk_size):
+                scanner = ParallelScanner(workers, chunk_size)
+                try:
+                    # 任务以迭代器给出，按需逐块取出
+                    results = list(scanner.scan(iter(tasks), KEYWORDS, GARBLED_KEYWORDS, 0.05))
+                finally:
+                    scanner.close()
+                self.assertEqual(results, expected)
+    
+    def test_processor_results_match_across_workers(self):
+        expected = self.analyze(1)
+        self.assertTrue(expected)
+        for workers, chunk_size in ((2, 1), (2, 5), (4, 3)):
+            with self.subTest(workers=workers, chunk_size=chunk_size):
+                self.assertEqual(self.analyze(workers, chunk_size), expected)
+    
+    def test_cached_and_pending_split(self):
+        self.analyze(1, use_cache=True)
+        # 修改一部分文件，这些文件重新分析，其余文件使用缓存
+        for path in self.rng.sample(self.paths, 20):
+            self.write(os.path.relpath(path, self.directory))
+            os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1000))
+        expected = self.analyze(1)
+        
+        self.assertEqual(self.analyze(2, chunk_size=3, use_cache=True), expected)
+        # 全部来自缓存
+        self.assertEqual(self.analyze(2, chunk_size=3, use_cache=True), expected)
+
+if __name__ == '__main__':
+    unittest.main()
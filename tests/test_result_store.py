@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import result_store
+from analysis_result import Hit
+from result_store import PREVIEW_LENGTH, ResultStore
+
+LABELS = ['甲', '乙']
+
+def hit(start: int, checksum: int, label: int = 0) -> Hit:
+    return Hit(start, start + 5, checksum, (label,))
+
+class ReplaceFilesTest(unittest.TestCase):
+    """删除后用重新分析的结果替换部分文件：按校验和沿用选择状态，其余文件原样保留"""
+    
+    def make_store(self) -> ResultStore:
+        store = ResultStore('keyword')
+        store.add_file('a.txt', [hit(0, 1), hit(10, 2, 1), hit(20, 3)], LABELS)
+        store.add_file('b.txt', [hit(0, 4), hit(10, 5)], LABELS)
+        return store
+    
+    def test_selection_follows_checksums(self):
+        store = self.make_store()
+        store.selection.set(1, False)  # a.txt的第二段（校验和2）
+        store.selection.set(4, False)  # b.txt的第二段
+        
+        # a.txt中校验和1的段落已删除，其余段落位置前移，新出现一个校验和9的段落
+        new = store.replace_files({'a.txt': [hit(0, 2, 1), hit(10, 3), hit(15, 9)]}, LABELS)
+        
+        self.assertEqual(new.filenames, ['a.txt', 'b.txt'])
+        self.assertEqual([new.get_span(index) for index in range(3)], [(0, 5, 2), (10, 15, 3), (15, 20, 9)])
+        self.assertEqual([new.selection.is_selected(index) for index in range(len(new))],
+                         [False, True, True, True, False])
+        self.assertEqual(new.get_selected_items(), {'a.txt': [(10, 15, 3), (15, 20, 9)], 'b.txt': [(0, 5, 4)]})
+        self.assertEqual(new.get_row(0)[1], '乙')
+    
+    def test_files_without_hits_are_dropped(self):
+        store = self.make_store()
+        new = store.replace_files({'a.txt': [], 'c.txt': [hit(0, 7)]}, LABELS)
+        self.assertEqual(new.filenames, ['b.txt', 'c.txt'])
+        self.assertEqual(new.get_selected_items(), {'b.txt': [(0, 5, 4), (10, 15, 5)], 'c.txt': [(0, 5, 7)]})
+
+class DuplicateCopiesTest(unittest.TestCase):
+    """合并显示的副本：删除时使用同样的选择，重新分析后内容不再相同的副本单独显示"""
+    
+    def make_store(self) -> ResultStore:
+        store = ResultStore('keyword')
+        group = ['a.txt', 'copy1.txt', 'copy2.txt']
+        store.add_file('a.txt', [hit(0, 1), hit(10, 2)], LABELS)
+        self.assertTrue(store.add_copy(group, 'copy1.txt'))
+        self.assertTrue(store.add_copy(group, 'copy2.txt'))
+        store.add_file('b.txt', [hit(0, 3)], LABELS)
+        return store
+    
+    def test_copies_share_selection(self):
+        store = self.make_store()
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.copy_count, 2)
+        self.assertEqual(store.get_row(0)[0], 'a.txt (+2个副本)')
+        self.assertFalse(ResultStore('keyword').add_copy(['x.txt', 'y.txt'], 'y.txt'))
+        
+        store.selection.set(0, False)
+        self.assertEqual(store.get_selected_items(), {
+            'a.txt': [(10, 15, 2)], 'copy1.txt': [(10, 15, 2)], 'copy2.txt': [(10, 15, 2)], 'b.txt': [(0, 5, 3)],
+        })
+    
+    def test_unchanged_copies_stay_grouped(self):
+        store = self.make_store()
+        results = {name: [hit(0, 1)] for name in ('a.txt', 'copy1.txt', 'copy2.txt')}
+        new = store.replace_files(results, LABELS)
+        self.assertEqual(new.filenames, ['a.txt', 'b.txt'])
+        self.assertEqual(new.copies, {0: ['copy1.txt', 'copy2.txt']})
+    
+    def test_changed_copy_is_split_off(self):
+        store = self.make_store()
+        # 只有copy2.txt在删除后内容不同（例如删除失败），单独显示
+        new = store.replace_files({'a.txt': [hit(0, 1)], 'copy1.txt': [hit(0, 1)], 'copy2.txt': [hit(0, 1), hit(10, 2)]},
+                                  LABELS)
+        self.assertEqual(new.filenames, ['a.txt', 'b.txt', 'copy2.txt'])
+        self.assertEqual(new.copies, {0: ['copy1.txt']})
+        self.assertEqual(new.get_selected_items()['copy2.txt'], [(0, 5, 1), (10, 15, 2)])
+    
+    def test_copies_without_hits_are_dropped(self):
+        store = self.make_store()
+        new = store.replace_files({name: [] for name in ('a.txt', 'copy1.txt', 'copy2.txt')}, LABELS)
+        self.assertEqual(new.filenames, ['b.txt'])
+        self.assertEqual(new.copies, {})
+    
+    def test_unreanalyzed_copy_keeps_old_hits(self):
+        store = self.make_store()
+        # 只有代表文件被重新分析：没有重新分析的副本保留原来的命中项，与代表文件不再相同时单独显示
+        new = store.replace_files({'a.txt': [hit(0, 1)]}, LABELS)
+        self.assertEqual(new.filenames, ['a.txt', 'b.txt', 'copy1.txt', 'copy2.txt'])
+        self.assertEqual(new.get_selected_items()['copy1.txt'], [(0, 5, 1), (10, 15, 2)])
+
+class GarbledPreviewTest(unittest.TestCase):
+    """乱码检测模式的预览只按检测出的编码读取文件开头，不读取整个文件"""
+    
+    def test_preview_reads_prefix_only(self):
+        text = '乱码€预览' * 200000
+        with tempfile.TemporaryDirectory() as directory:
+            for name, encoding in (('gb.txt', 'gb18030'), ('bom.txt', 'utf-8-sig'), ('le.txt', 'utf-16'), ('short.txt', 'utf-8')):
+                with open(os.path.join(directory, name), 'w', encoding=encoding, newline='') as f:
+                    f.write(text[:10] if name == 'short.txt' else text)
+            store = ResultStore('garbled')
+            for name in ('gb.txt', 'bom.txt', 'le.txt', 'short.txt'):
+                store.add_file(name, [Hit(0, 0, 0, (0,))], ['€'])
+            
+            with mock.patch.object(result_store, 'read_file_content', side_effect=AssertionError):
+                store.load_previews(range(len(store)), directory)
+        
+        for index in range(3):
+            self.assertEqual(store.previews[index], text[:PREVIEW_LENGTH] + '...')
+        self.assertEqual(store.previews[3], text[:10])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import undo_journal
+from processor import TextProcessor
+
+CONFIG = 'keywords = 删除我\n\ncheck_garbled = €\n\ngarbled_threshold = 0\n'
+
+class UndoJournalTest(unittest.TestCase):
+    """删除与撤销：撤销后文件逐字节恢复，删除后被修改过的文件不做恢复，中断的批次仍可撤销"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'files')
+        os.makedirs(self.directory)
+        # 配置文件放在待处理目录之外，不参与分析
+        config_path = os.path.join(self.temp_dir.name, 'config.txt')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(CONFIG)
+        self.processor = TextProcessor()
+        self.processor.set_files_directory(self.directory)
+        self.processor.config_manager.set_config_path(config_path)
+        self.processor.use_scan_cache = False
+        self.processor.write_workers = 1
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write(self, name: str, data: bytes):
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(data)
+    
+    def read(self, name: str) -> bytes:
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            return f.read()
+    
+    def analyze(self, mode: str):
+        """分析后返回apply_deletion所需的全部选择项"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = self.processor.analyze_files([mode])
+        return {filename: [(hit.start, hit.end, hit.checksum) for hit in hits]
+                for filename, hits in result[mode].items()}
+    
+    def delete(self, mode: str):
+        selected = self.analyze(mode)
+        self.assertTrue(selected)
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = self.processor.apply_deletion(mode, selected)
+        self.assertTrue(summary.ok, [outcome.message for outcome in summary.failed])
+        return selected
+    
+    def undo(self, count: int = 1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.processor.undo_deletions(count)
+    
+    def test_spans_round_trip(self):
+        originals = {
+            'lf.txt': '第一段\n删除我 一\n中间\n删除我 二'.encode('utf-8'),
+            'crlf.txt': '删除我\r\n保留\r\n\r\n删除我 末尾\r\n'.encode('gb18030'),
+            'bom.txt': '﻿保留\n删除我\n保留'.encode('utf-8'),
+        }
+        for name, data in originals.items():
+            self.write(name, data)
+        
+        self.delete('keyword')
+        for name, data in originals.items():
+            self.assertNotEqual(self.read(name), data)
+            self.assertNotIn('删除我'.encode('utf-8'), self.read(name))
+        
+        summary = self.undo()
+        self.assertTrue(summary.ok)
+        self.assertEqual(len(summary), len(originals))
+        for name, data in originals.items():
+            self.assertEqual(self.read(name), data)
+        self.assertEqual(self.undo().outcomes, [])
+    
+    def test_garbled_round_trip(self):
+        os.makedirs(os.path.join(self.directory, 'sub'))
+        self.write(os.path.join('sub', 'bad.txt'), '乱码€€€'.encode('utf-8'))
+        self.write('good.txt', '正常内容'.encode('utf-8'))
+        
+        self.delete('garbled')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'sub', 'bad.txt')))
+        
+        self.assertTrue(self.undo().ok)
+        self.assertEqual(self.read(os.path.join('sub', 'bad.txt')), '乱码€€€'.encode('utf-8'))
+        self.assertEqual(os.listdir(os.path.join(self.directory, undo_journal.BACKUP_DIRNAME)), [])
+    
+    def test_undo_consecutive_batches(self):
+        original = '删除我 一\n保留\n删除我 二\n'.encode('utf-8')
+        self.write('a.txt', original)
+        # 第一批只删除第一段，第二批删除剩下的一段
+        selected = self.analyze('keyword')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.processor.apply_deletion('keyword', {'a.txt': selected['a.txt'][:1]}).ok)
+        self.delete('keyword')
+        self.assertEqual(self.read('a.txt'), '保留\n'.encode('utf-8'))
+        
+        summary = self.undo(2)
+        self.assertTrue(summary.ok)
+        self.assertEqual(len(summary), 2)
+        self.assertEqual(self.read('a.txt'), original)
+    
+    def test_undo_several_batches_newest_first(self):
+        original = '删除我 一\n保留\n'.encode('utf-8')
+        self.write('a.txt', original)
+        self.delete('keyword')
+        after_first = self.read('a.txt')
+        
+        self.write('a.txt', after_first + '删除我 二\n'.encode('utf-8'))
+        appended = self.read('a.txt')
+        self.delete('keyword')
+        self.assertEqual(self.read('a.txt'), after_first)
+        
+        self.assertTrue(self.undo().ok)
+        self.assertEqual(self.read('a.txt'), appended)
+        # 第一批删除之后文件被追加过内容，不能再撤销
+        summary = self.undo()
+        self.assertFalse(summary.ok)
+        self.assertEqual(self.read('a.txt'), appended)
+    
+    def test_refuses_to_undo_modified_file(self):
+        self.write('a.txt', '删除我\n保留\n'.encode('utf-8'))
+        self.delete('keyword')
+        self.write('a.txt', '用户修改后的内容\n'.encode('utf-8'))
+        
+        summary = self.undo()
+        self.assertFalse(summary.ok)
+        self.assertEqual(self.read('a.txt'), '用户修改后的内容\n'.encode('utf-8'))
+        # 恢复失败的文件保留在日志中
+        journal = undo_journal.UndoJournal(self.directory)
+        try:
+            self.assertEqual(journal.batch_count(), 1)
+        finally:
+            journal.close()
+    
+    def test_interrupted_batch_is_undoable(self):
+        names = ['a.txt', 'b.txt', 'c.txt']
+        for name in names:
+            self.write(name, f'{name} €€€'.encode('utf-8'))
+        selected = self.analyze('garbled')
+        self.assertEqual(sorted(selected), names)
+        
+        real_replace = os.replace
+        calls = []
+        
+        def interrupted_replace(src, dst):
+            calls.append(src)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            real_replace(src, dst)
+        
+        with mock.patch.object(undo_journal.os, 'replace', interrupted_replace):
+            with self.assertRaises(KeyboardInterrupt), contextlib.redirect_stdout(io.StringIO()):
+                self.processor.apply_deletion('garbled', selected)
+        
+        self.assertTrue(self.undo().ok)
+        for name in names:
+            self.assertEqual(self.read(name), f'{name} €€€'.encode('utf-8'))
+    
+    def test_old_batches_are_pruned_with_backups(self):
+        for index in range(undo_journal.MAX_UNDO_BATCHES + 2):
+            self.write(f'{index}.txt', f'{index} €€€'.encode('utf-8'))
+            self.delete('garbled')
+        
+        backup_directory = os.path.join(self.directory, undo_journal.BACKUP_DIRNAME)
+        self.assertEqual(len(os.listdir(backup_directory)), undo_journal.MAX_UNDO_BATCHES)
+        journal = undo_journal.UndoJournal(self.directory)
+        try:
+            self.assertEqual(journal.batch_count(), undo_journal.MAX_UNDO_BATCHES)
+        finally:
+            journal.close()
+        self.assertFalse(os.path.exists(os.path.join(backup_directory, '1_0.bak')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+from batch_writer import BatchSummary, FileOutcome, write_file_atomic
+
+# 撤销日志文件名，与扫描缓存一样保存在待处理文件目录下
+JOURNAL_FILENAME = '.txt_undo_journal.sqlite3'
+
+# 被删除的整个文件移动到这个目录中保存（扩展名不是.txt，不会被当作待处理文件）
+BACKUP_DIRNAME = '.txt_undo_files'
+
+# 最多保留的删除批次数，更早的批次连同备份文件一起清除
+MAX_UNDO_BATCHES = 20
+
+# 日志条目：(类型, 编码, 删除后的文件大小, 删除后的修改时间, 数据)
+# 'spans'类型的数据是被删除的内容[(在删除后内容中的位置, 被删除的文本)]，'file'类型的数据是备份文件名
+JournalEntry = Tuple[str, Optional[str], int, int, object]
+
+# 文件在两次删除之间被修改过时，更早批次的条目改用这个签名，任何文件都不会与之相同，撤销时总是拒绝恢复
+STALE_SIGNATURE = (-1, -1)
+
+class UndoJournal:
+    """删除操作的撤销日志
+    
+    删除段落时只记录被切除的文本及其在删除后内容中的位置，删除整个文件时把文件移动到备份目录
+    （同一文件系统内的重命名，不复制内容），日志的大小和记录耗时只与删除的内容有关，与目录中的
+    文件总数无关。撤销时按批次从新到旧恢复，文件在删除之后又被修改过时不做恢复。
+    
+    每个文件的日志条目在处理该文件时立即提交（移动文件之前、改写文件之后），批次在中途被中断
+    （Ctrl+C、崩溃）时已处理的文件仍然可以撤销。删除批次中的各线程共用一个连接，写入时加锁。
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.backup_directory = os.path.join(directory, BACKUP_DIRNAME)
+        self.connection = sqlite3.connect(os.path.join(directory, JOURNAL_FILENAME), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS batches ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'mode TEXT NOT NULL, '
+            'created REAL NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'batch_id INTEGER NOT NULL, '
+            'path TEXT NOT NULL, '
+            'kind TEXT NOT NULL, '
+            'encoding TEXT, '
+            'size INTEGER NOT NULL, '
+            'mtime_ns INTEGER NOT NULL, '
+            'data TEXT NOT NULL, '
+            'PRIMARY KEY (batch_id, path))'
+        )
+        self.connection.commit()
+    
+    def begin_batch(self, mode: str) -> int:
+        """开始一个删除批次，返回批次编号"""
+        cursor = self.connection.execute('INSERT INTO batches (mode, created) VALUES (?, ?)', (mode, time.time()))
+        self.connection.commit()
+        return cursor.lastrowid
+    
+    def stash_file(self, batch_id: int, index: int, rel_path: str, file_path: str):
+        """
+        把要删除的文件移动到备份目录（代替删除）。先提交日志条目再移动，中途被中断时
+        备份文件总能按日志找回原来的路径
+        
+        Args:
+            batch_id: 批次编号
+            index: 文件在批次中的序号，用于生成备份文件名
+            rel_path: 相对路径
+            file_path: 文件路径
+        
+        Raises:
+            OSError, sqlite3.Error: 移动或记录失败，此时文件没有被移动
+        """
+        os.makedirs(self.backup_directory, exist_ok=True)
+        backup_name = f'{batch_id}_{index}.bak'
+        stat = os.stat(file_path)
+        self.record_entry(batch_id, rel_path, ('file', None, stat.st_size, stat.st_mtime_ns, backup_name),
+                          (stat.st_size, stat.st_mtime_ns))
+        try:
+            os.replace(file_path, os.path.join(self.backup_directory, backup_name))
+        except OSError:
+            with self._lock:
+                self.connection.execute('DELETE FROM entries WHERE batch_id = ? AND path = ?', (batch_id, rel_path))
+                self.connection.commit()
+            raise
+    
+    def record_entry(self, batch_id: int, rel_path: str, entry: JournalEntry,
+                     previous_signature: Optional[Tuple[int, int]] = None):
+        """
+        保存并立即提交一个文件的日志条目（可以在删除批次的各线程中调用）
+        
+        Args:
+            batch_id: 批次编号
+            rel_path: 相对路径
+            entry: 日志条目
+            previous_signature: 删除前的文件签名(文件大小, 修改时间)。更早批次中该文件的条目签名与之不同
+                （两次删除之间文件被修改过）时，这些条目不能再撤销；为None时同样按被修改过处理
+        
+        Raises:
+            sqlite3.Error: 记录失败
+        """
+        kind, encoding, size, mtime_ns, data = entry
+        previous_size, previous_mtime_ns = previous_signature or STALE_SIGNATURE
+        with self._lock:
+            self.connection.execute(
+                'UPDATE entries SET size = ?, mtime_ns = ? '
+                'WHERE path = ? AND batch_id < ? AND NOT (size = ? AND mtime_ns = ?)',
+                STALE_SIGNATURE + (rel_path, batch_id, previous_size, previous_mtime_ns)
+            )
+            self.connection.execute(
+                'INSERT OR REPLACE INTO entries (batch_id, path, kind, encoding, size, mtime_ns, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (batch_id, rel_path, kind, encoding, size, mtime_ns, json.dumps(data, ensure_ascii=False))
+            )
+            self.connection.commit()
+    
+    def finish_batch(self, batch_id: int):
+        """
+        结束一个批次：没有任何文件被处理时删除该批次，并清除超出MAX_UNDO_BATCHES的旧批次
+        
+        Args:
+            batch_id: 批次编号
+        """
+        try:
+            self.connection.execute(
+                'DELETE FROM batches WHERE id = ? AND NOT EXISTS (SELECT 1 FROM entries WHERE batch_id = ?)',
+                (batch_id, batch_id)
+            )
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"保存撤销日志时出错: {e}")
+            return
+        
+        old_batches = [row[0] for row in self.connection.execute(
+            'SELECT id FROM batches ORDER BY id DESC LIMIT -1 OFFSET ?', (MAX_UNDO_BATCHES,)
+        )]
+        for old_batch_id in old_batches:
+            self._drop_batch(old_batch_id)
+        self.connection.commit()
+    
+    def batch_count(self) -> int:
+        """可以撤销的批次数"""
+        return self.connection.execute('SELECT COUNT(*) FROM batches').fetchone()[0]
+    
+    def undo(self, count: int = 1) -> BatchSummary:
+        """
+        撤销最近的count个删除批次，从新到旧逐个恢复
+        
+        Args:
+            count: 撤销的批次数
+        
+        Returns:
+            BatchSummary: 各文件的恢复结果；恢复失败的文件保留在日志中，处理冲突后可以再次撤销
+        """
+        outcomes: List[FileOutcome] = []
+        batch_ids = [row[0] for row in self.connection.execute(
+            'SELECT id FROM batches ORDER BY id DESC LIMIT ?', (max(0, int(count)),)
+        )]
+        
+        for batch_id in batch_ids:
+            rows = self.connection.execute(
+                'SELECT path, kind, encoding, size, mtime_ns, data FROM entries WHERE batch_id = ?', (batch_id,)
+            ).fetchall()
+            for path, kind, encoding, size, mtime_ns, data in rows:
+                try:
+                    self._restore(path, kind, encoding, (size, mtime_ns), json.loads(data))
+                except Exception as e:
+                    outcomes.append(FileOutcome(path, False, str(e)))
+                    continue
+                self.connection.execute('DELETE FROM entries WHERE batch_id = ? AND path = ?', (batch_id, path))
+                # 恢复后的内容就是更早批次删除后的内容，但修改时间变了，更早批次按新的签名核对
+                # （两次删除之间被修改过的条目在记录时已标记，保持不能撤销）
+                stat = os.stat(os.path.join(self.directory, path))
+                self.connection.execute(
+                    'UPDATE entries SET size = ?, mtime_ns = ? '
+                    'WHERE path = ? AND batch_id < ? AND NOT (size = ? AND mtime_ns = ?)',
+                    (stat.st_size, stat.st_mtime_ns, path, batch_id) + STALE_SIGNATURE
+                )
+                outcomes.append(FileOutcome(path, True))
+            
+            self.connection.execute(
+                'DELETE FROM batches WHERE id = ? AND NOT EXISTS (SELECT 1 FROM entries WHERE batch_id = ?)',
+                (batch_id, batch_id)
+            )
+            self.connection.commit()
+        
+        return BatchSummary(outcomes)
+    
+    def _restore(self, rel_path: str, kind: str, encoding: Optional[str], signature: Tuple[int, int], data):
+        """恢复一个文件，失败时抛出异常（ValueError的信息是失败原因）"""
+        file_path = os.path.join(self.directory, rel_path)
+        
+        if kind == 'file':
+            backup_path = os.path.join(self.backup_directory, data)
+            if not os.path.exists(backup_path):
+                if os.path.exists(file_path):
+                    # 日志已提交但移动前被中断，文件仍在原处
+                    return
+                raise ValueError(f"备份文件不存在，无法恢复: {rel_path}")
+            if os.path.exists(file_path):
+                raise ValueError(f"文件已存在，不覆盖: {rel_path}")
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(backup_path, file_path)
+            return
+        
+        stat = os.stat(file_path)
+        if (stat.st_size, stat.st_mtime_ns) != signature:
+            raise ValueError(f"文件在删除后已被修改，无法撤销: {rel_path}")
+        with open(file_path, 'rb') as f:
+            content = f.read().decode(encoding)
+        
+        # 被删除的内容按位置从前往后插回
+        pieces = []
+        cursor = 0
+        for offset, text in data:
+            pieces.append(content[cursor:offset])
+            pieces.append(text)
+            cursor = offset
+        pieces.append(content[cursor:])
+        write_file_atomic(file_path, ''.join(pieces), encoding)
+    
+    def _drop_batch(self, batch_id: int):
+        """清除一个批次及其备份文件"""
+        rows = self.connection.execute(
+            "SELECT data FROM entries WHERE batch_id = ? AND kind = 'file'", (batch_id,)
+        ).fetchall()
+        for (data,) in rows:
+            try:
+                os.remove(os.path.join(self.backup_directory, json.loads(data)))
+            except OSError:
+                pass
+        self.connection.execute('DELETE FROM entries WHERE batch_id = ?', (batch_id,))
+        self.connection.execute('DELETE FROM batches WHERE id = ?', (batch_id,))
+    
+    def close(self):
+        """关闭日志"""
+        self.connection.close()
+
+def open_undo_journal(directory: str) -> Optional[UndoJournal]:
+    """在指定目录下打开撤销日志，目录不可写等情况下返回None（不记录撤销信息）"""
+    try:
+        return UndoJournal(directory)
+    except sqlite3.Error as e:
+        print(f"打开撤销日志时出错: {e}")
+        return None
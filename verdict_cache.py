@@ -0,0 +1,86 @@
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# 默认最多缓存的段落判定数（每条只保存16字节的摘要和判定结果）
+DEFAULT_VERDICT_CACHE_SIZE = 65536
+
+_MISSING = object()
+
+def paragraph_digest(paragraph: str) -> bytes:
+    """段落内容的摘要，作为缓存键（不保存段落文本本身，缓存占用的内存与段落长度无关）"""
+    return hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).digest()
+
+class VerdictCache:
+    """英文段落判定结果的LRU缓存
+    
+    英文检测用正则表达式在整个文件上扫描，只有候选行中含'<'的段落需要按标签规则逐段核对
+    （contains_english_sentence），缓存的就是这一步的结果：语料中大量文件重复同样的带标签段落
+    （页眉、免责声明等），同一段落只核对一次。关键词由自动机扫描、乱码按文件判定，都不经过缓存。
+    
+    键为(判定类型, 段落摘要)，判定类型目前只有'english'。缓存只对一个配置版本有效，版本变化时清空。
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_VERDICT_CACHE_SIZE, version: Optional[str] = None):
+        self.max_size = max_size
+        self.version = version
+        self._entries: 'OrderedDict[Tuple[str, bytes], object]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def set_version(self, version: Optional[str]):
+        """切换配置版本，版本变化时清空缓存"""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+    
+    def lookup(self, kind: str, paragraph: str, compute: Callable[[str], object]) -> object:
+        """
+        获取段落的判定结果，缓存中没有时调用compute计算并缓存
+        
+        Args:
+            kind: 判定类型（目前只有'english'）
+            paragraph: 段落内容
+            compute: 计算判定结果的函数，参数为段落内容
+        
+        Returns:
+            object: 判定结果
+        """
+        key = (kind, paragraph_digest(paragraph))
+        entries = self._entries
+        value = entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            value = compute(paragraph)
+            entries[key] = value
+            if len(entries) > self.max_size:
+                entries.popitem(last=False)
+        else:
+            self.hits += 1
+            entries.move_to_end(key)
+        return value
+    
+    def items(self) -> Iterable[Tuple[str, bytes, object]]:
+        """按从旧到新的顺序产出缓存内容 (判定类型, 段落摘要, 判定结果)，用于保存"""
+        return ((kind, digest, value) for (kind, digest), value in self._entries.items())
+    
+    def load(self, items: Iterable[Tuple[str, bytes, object]]):
+        """载入保存的缓存内容（不计入命中统计）"""
+        for kind, digest, value in items:
+            self._entries[(kind, digest)] = value
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, float]:
+        """命中统计，用于调整缓存大小"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }